@@ -19,6 +19,19 @@
 #include <Python.h>
 #include <secp256k1.h>
 
+static secp256k1_context *ctx = NULL;
+
+static secp256k1_context * get_ctx(void) {
+	if (ctx == NULL) {
+	/*	puts ("Initializing context"); */
+		ctx = secp256k1_context_create(SECP256K1_CONTEXT_SIGN | SECP256K1_CONTEXT_VERIFY);
+	}
+	if (ctx == NULL) {
+		PyErr_SetString(PyExc_RuntimeError, "Context initialization failed");
+	}
+	return ctx;
+}
+
 static PyObject * priv2pub(PyObject *self, PyObject *args) {
 	const unsigned char * privkey;
 	const int klen;
@@ -34,13 +47,7 @@ static PyObject * priv2pub(PyObject *self, PyObject *args) {
 	secp256k1_pubkey pubkey;
 	size_t pubkeyclen = compressed == 1 ? 33 : 65;
 	unsigned char pubkeyc[pubkeyclen];
-	static secp256k1_context *ctx = NULL;
-	if (ctx == NULL) {
-	/*	puts ("Initializing context"); */
-		ctx = secp256k1_context_create(SECP256K1_CONTEXT_SIGN | SECP256K1_CONTEXT_VERIFY);
-	}
-	if (ctx == NULL) {
-		PyErr_SetString(PyExc_RuntimeError, "Context initialization failed");
+	if (get_ctx() == NULL) {
 		return NULL;
 	}
 	if (secp256k1_ec_pubkey_create(ctx, &pubkey, privkey) != 1) {
@@ -55,6 +62,66 @@ static PyObject * priv2pub(PyObject *self, PyObject *args) {
 	return Py_BuildValue("y#", pubkeyc,pubkeyclen);
 }
 
+/*
+  Takes a contiguous buffer of N 32-byte privkeys and returns a bytes object
+  containing the N serialized pubkeys, each 33 (compressed) or 65 bytes long.
+  The GIL is released during key generation.
+*/
+static PyObject * priv2pub_batch(PyObject *self, PyObject *args) {
+	Py_buffer keys;
+	int compressed;
+	if (!PyArg_ParseTuple(args, "y*I", &keys, &compressed)) {
+		PyErr_SetString(PyExc_ValueError, "Unable to parse extension mod arguments");
+		return NULL;
+	}
+	if (keys.len % 32) {
+		PyBuffer_Release(&keys);
+		PyErr_SetString(PyExc_ValueError, "Private key buffer length not a multiple of 32 bytes");
+		return NULL;
+	}
+	if (get_ctx() == NULL) {
+		PyBuffer_Release(&keys);
+		return NULL;
+	}
+	Py_ssize_t nkeys = keys.len / 32;
+	size_t pubkeyclen = compressed == 1 ? 33 : 65;
+	PyObject *ret = PyBytes_FromStringAndSize(NULL, nkeys * pubkeyclen);
+	if (ret == NULL) {
+		PyBuffer_Release(&keys);
+		return NULL;
+	}
+	const unsigned char *privkeys = keys.buf;
+	unsigned char *out = (unsigned char *)PyBytes_AS_STRING(ret);
+	Py_ssize_t i, failed = -1;
+	int serialize_failed = 0;
+
+	Py_BEGIN_ALLOW_THREADS
+	for (i = 0; i < nkeys; i++) {
+		secp256k1_pubkey pubkey;
+		size_t outlen = pubkeyclen;
+		if (secp256k1_ec_pubkey_create(ctx, &pubkey, privkeys + i*32) != 1) {
+			failed = i;
+			break;
+		}
+		if (secp256k1_ec_pubkey_serialize(ctx, out + i*pubkeyclen, &outlen, &pubkey,
+				compressed == 1 ? SECP256K1_EC_COMPRESSED : SECP256K1_EC_UNCOMPRESSED) != 1) {
+			failed = i;
+			serialize_failed = 1;
+			break;
+		}
+	}
+	Py_END_ALLOW_THREADS
+
+	PyBuffer_Release(&keys);
+	if (failed != -1) {
+		Py_DECREF(ret);
+		PyErr_Format(PyExc_RuntimeError, "Public key %s failed for key #%zd",
+			serialize_failed ? "serialization" : "creation", failed + 1);
+		return NULL;
+	}
+	return ret;
+}
+
 /* https://docs.python.org/3/howto/cporting.html */
 
 struct module_state {
@@ -65,6 +132,7 @@ struct module_state {
 
 static PyMethodDef secp256k1_methods[] = {
 	{"priv2pub", priv2pub, METH_VARARGS, "Generate pubkey from privkey using libsecp256k1"},
+	{"priv2pub_batch", priv2pub_batch, METH_VARARGS, "Generate packed pubkeys from a buffer of packed privkeys using libsecp256k1"},
     {NULL, NULL}
 };
 
@@ -26,6 +26,16 @@ from mmgen.obj import *
 
 pnm = g.proj_name
 
+def get_keccak():
+	"return keccak_256 and keccak_256_many, using pysha3 if available"
+	try:
+		assert not g.use_internal_keccak_module
+		from sha3 import keccak_256
+		return keccak_256,lambda msgs: [keccak_256(m).digest() for m in msgs]
+	except:
+		from mmgen.keccak import keccak_256,keccak_256_many
+		return keccak_256,keccak_256_many
+
 def dmsg_sc(desc,data):
 	if g.debug_addrlist: Msg('sc_debug_{}: {}'.format(desc,data))
 
@@ -50,29 +60,47 @@ class AddrGenerator(MMGenObject):
 		me.desc = gen_methods
 		return me
 
-class AddrGeneratorP2PKH(AddrGenerator):
+	# to_addr() and to_viewkey() are wrappers for the bytes-native methods used by AddrList
 	def to_addr(self,pubhex):
-		from mmgen.protocol import hash160
 		assert type(pubhex) == PubKey
-		return CoinAddr(g.proto.pubhash2addr(hash160(pubhex),p2sh=False))
+		return self.to_addr_bin(bytes.fromhex(pubhex))
+
+	def to_viewkey(self,pubhex):
+		return self.to_viewkey_bin(bytes.fromhex(pubhex))
+
+	# batch methods used by AddrList.generate(); subclasses override them where batching pays
+	def to_addr_bin_batch(self,pubkeys):
+		return [self.to_addr_bin(pubkey) for pubkey in pubkeys]
+
+	def to_viewkey_bin_batch(self,pubkeys):
+		return [self.to_viewkey_bin(pubkey) for pubkey in pubkeys]
+
+	def to_addr_viewkey_bin_batch(self,pubkeys):
+		"return (addr,viewkey) pairs, for generators that derive both from the same data"
+		return list(zip(self.to_addr_bin_batch(pubkeys),self.to_viewkey_bin_batch(pubkeys)))
+
+class AddrGeneratorP2PKH(AddrGenerator):
+	def to_addr_bin(self,pubkey):
+		from mmgen.protocol import hash160_bin
+		return CoinAddr(g.proto.pubhash2addr_bin(hash160_bin(pubkey),p2sh=False))
 
 	def to_segwit_redeem_script(self,pubhex):
 		raise NotImplementedError('Segwit redeem script not supported by this address type')
 
 class AddrGeneratorSegwit(AddrGenerator):
-	def to_addr(self,pubhex):
-		assert pubhex.compressed,'Uncompressed public keys incompatible with Segwit'
-		return CoinAddr(g.proto.pubhex2segwitaddr(pubhex))
+	def to_addr_bin(self,pubkey):
+		assert len(pubkey) == 33,'Uncompressed public keys incompatible with Segwit'
+		return CoinAddr(g.proto.pubkey2segwitaddr_bin(pubkey))
 
 	def to_segwit_redeem_script(self,pubhex):
 		assert pubhex.compressed,'Uncompressed public keys incompatible with Segwit'
 		return HexStr(g.proto.pubhex2redeem_script(pubhex))
 
 class AddrGeneratorBech32(AddrGenerator):
-	def to_addr(self,pubhex):
-		assert pubhex.compressed,'Uncompressed public keys incompatible with Segwit'
-		from mmgen.protocol import hash160
-		return CoinAddr(g.proto.pubhash2bech32addr(hash160(pubhex)))
+	def to_addr_bin(self,pubkey):
+		assert len(pubkey) == 33,'Uncompressed public keys incompatible with Segwit'
+		from mmgen.protocol import hash160_bin
+		return CoinAddr(g.proto.pubhash2bech32addr_bin(hash160_bin(pubkey)))
 
 	def to_segwit_redeem_script(self,pubhex):
 		raise NotImplementedError('Segwit redeem script not supported by this address type')
@@ -81,21 +109,18 @@ class AddrGeneratorEthereum(AddrGenerator):
 
 	def __init__(self,addr_type):
 
-		try:
-			assert not g.use_internal_keccak_module
-			from sha3 import keccak_256
-		except:
-			from mmgen.keccak import keccak_256
-		self.keccak_256 = keccak_256
+		self.keccak_256,self.keccak_256_many = get_keccak()
 
 		from mmgen.protocol import hash256
 		self.hash256 = hash256
 
 		return AddrGenerator.__init__(addr_type)
 
-	def to_addr(self,pubhex):
-		assert type(pubhex) == PubKey
-		return CoinAddr(self.keccak_256(bytes.fromhex(pubhex[2:])).hexdigest()[24:])
+	def to_addr_bin(self,pubkey):
+		return self.to_addr_bin_batch([pubkey])[0]
+
+	def to_addr_bin_batch(self,pubkeys):
+		return [CoinAddr(h[12:].hex()) for h in self.keccak_256_many([pubkey[1:] for pubkey in pubkeys])]
 
 	def to_wallet_passwd(self,sk_hex):
 		return WalletPassword(self.hash256(sk_hex)[:32])
@@ -110,34 +135,54 @@ class AddrGeneratorZcashZ(AddrGenerator):
 	vk_width = 97
 
 	def zhash256(self,s,t):
-		s = bytearray(s + bytes(32))
-		s[0] |= 0xc0
-		s[32] = t
-		from mmgen.sha2 import Sha256
-		return Sha256(s,preprocess=False).digest()
+		return self.zhash256_pairs([s])[0][t]
 
-	def to_addr(self,pubhex): # pubhex is really privhex
-		key = bytes.fromhex(pubhex)
-		assert len(key) == 32,'{}: incorrect privkey length'.format(len(key))
+	def zhash256_pairs(self,keys):
+		"return the pair (zhash256(s,0),zhash256(s,1)) for each key, computed in one batch"
+		from mmgen.sha2 import Sha256
+		blocks = []
+		for s in keys:
+			assert len(s) == 32,'{}: incorrect privkey length'.format(len(s))
+			for t in (0,1):
+				b = bytearray(s + bytes(32))
+				b[0] |= 0xc0
+				b[32] = t
+				blocks.append(b)
+		hs = Sha256.compress_blocks(blocks)
+		return [(hs[n],hs[n+1]) for n in range(0,len(hs),2)]
+
+	def pair2addr(self,h0,h1):
 		from nacl.bindings import crypto_scalarmult_base
-		p2 = crypto_scalarmult_base(self.zhash256(key,1))
-		from mmgen.protocol import _b58chk_encode
-		ret = _b58chk_encode(g.proto.addr_ver_num['zcash_z'][0] + (self.zhash256(key,0)+p2).hex())
+		from mmgen.protocol import _b58chk_encode_bin
+		p2 = crypto_scalarmult_base(h1)
+		ret = _b58chk_encode_bin(bytes.fromhex(g.proto.addr_ver_num['zcash_z'][0]) + h0 + p2)
 		assert len(ret) == self.addr_width,'Invalid Zcash z-address length'
 		return CoinAddr(ret)
 
-	def to_viewkey(self,pubhex): # pubhex is really privhex
-		key = bytes.fromhex(pubhex)
-		assert len(key) == 32,'{}: incorrect privkey length'.format(len(key))
-		vk = bytearray(self.zhash256(key,0)+self.zhash256(key,1))
+	def pair2viewkey(self,h0,h1):
+		vk = bytearray(h0 + h1)
 		vk[32] &= 0xf8
 		vk[63] &= 0x7f
 		vk[63] |= 0x40
-		from mmgen.protocol import _b58chk_encode
-		ret = _b58chk_encode(g.proto.addr_ver_num['viewkey'][0] + vk.hex())
+		from mmgen.protocol import _b58chk_encode_bin
+		ret = _b58chk_encode_bin(bytes.fromhex(g.proto.addr_ver_num['viewkey'][0]) + vk)
 		assert len(ret) == self.vk_width,'Invalid Zcash view key length'
 		return ZcashViewKey(ret)
 
+	# keys are really privkeys
+	def to_addr_bin(self,key):
+		return self.pair2addr(*self.zhash256_pairs([key])[0])
+
+	def to_addr_bin_batch(self,keys):
+		return [self.pair2addr(h0,h1) for h0,h1 in self.zhash256_pairs(keys)]
+
+	def to_viewkey_bin(self,key):
+		return self.pair2viewkey(*self.zhash256_pairs([key])[0])
+
+	def to_addr_viewkey_bin_batch(self,keys):
+		"the address and view key use the same two hashes, so compute them only once"
+		return [(self.pair2addr(h0,h1),self.pair2viewkey(h0,h1)) for h0,h1 in self.zhash256_pairs(keys)]
+
 	def to_segwit_redeem_script(self,pubhex):
 		raise NotImplementedError('Zcash z-addresses incompatible with Segwit')
 
@@ -145,26 +190,30 @@ class AddrGeneratorMonero(AddrGenerator):
 
 	def __init__(self,addr_type):
 
-		try:
-			assert not g.use_internal_keccak_module
-			from sha3 import keccak_256
-		except:
-			from mmgen.keccak import keccak_256
-		self.keccak_256 = keccak_256
+		self.keccak_256,self.keccak_256_many = get_keccak()
 
 		from mmgen.protocol import hash256
 		self.hash256 = hash256
 
 		if opt.use_old_ed25519:
 			from mmgen.ed25519 import edwards,encodepoint,B,scalarmult
-		else:
-			from mmgen.ed25519ll_djbec import scalarmult
-			from mmgen.ed25519 import edwards,encodepoint,B
 
-		self.edwards     = edwards
-		self.encodepoint = encodepoint
-		self.scalarmult  = scalarmult
-		self.B           = B
+			# Source and license for scalarmultbase function:
+			#   https://github.com/bigreddmachine/MoneroPy/blob/master/moneropy/crypto/ed25519.py
+			# Copyright (c) 2014-2016, The Monero Project
+			# All rights reserved.
+			def scalarmultbase(e):
+				if e == 0: return [0, 1]
+				Q = scalarmult(B, e//2)
+				Q = edwards(Q, Q)
+				if e & 1: Q = edwards(Q, B)
+				return Q
+		else: # fixed-base multiplication with precomputed table
+			from mmgen.ed25519ll_djbec import scalarmult_base as scalarmultbase
+			from mmgen.ed25519 import encodepoint
+
+		self.encodepoint    = encodepoint
+		self.scalarmultbase = scalarmultbase
 
 		return AddrGenerator.__init__(addr_type)
 
@@ -175,35 +224,29 @@ class AddrGeneratorMonero(AddrGenerator):
 		b = enc((addr_bytes[l-l%8:]).hex(),'b58',pad=7,tostr=True)
 		return a + b
 
-	def to_addr(self,sk_hex): # sk_hex instead of pubhex
-
-		# Source and license for scalarmultbase function:
-		#   https://github.com/bigreddmachine/MoneroPy/blob/master/moneropy/crypto/ed25519.py
-		# Copyright (c) 2014-2016, The Monero Project
-		# All rights reserved.
-		def scalarmultbase(e):
-			if e == 0: return [0, 1]
-			Q = self.scalarmult(self.B, e//2)
-			Q = self.edwards(Q, Q)
-			if e & 1: Q = self.edwards(Q, self.B)
-			return Q
-
-		def hex2int_le(hexstr):
-			return int((bytes.fromhex(hexstr)[::-1]).hex(),16)
-
-		vk_hex = self.to_viewkey(sk_hex)
-		pk_str  = self.encodepoint(scalarmultbase(hex2int_le(sk_hex)))
-		pvk_str = self.encodepoint(scalarmultbase(hex2int_le(vk_hex)))
-		addr_p1 = bytes.fromhex(g.proto.addr_ver_num['monero'][0]) + pk_str + pvk_str
+	def to_addr_bin(self,sk): # sk instead of pubkey
+		return self.to_addr_bin_batch([sk])[0]
 
-		return CoinAddr(self.b58enc(addr_p1 + self.keccak_256(addr_p1).digest()[:4]))
+	def to_addr_bin_batch(self,sks):
+		ver = bytes.fromhex(g.proto.addr_ver_num['monero'][0])
+		addr_p1s = []
+		for sk,vk_hex in zip(sks,self.to_viewkey_bin_batch(sks)):
+			pk_str  = self.encodepoint(self.scalarmultbase(int.from_bytes(sk,'little')))
+			pvk_str = self.encodepoint(self.scalarmultbase(int.from_bytes(bytes.fromhex(vk_hex),'little')))
+			addr_p1s.append(ver + pk_str + pvk_str)
+		return [CoinAddr(self.b58enc(addr_p1 + chk[:4]))
+					for addr_p1,chk in zip(addr_p1s,self.keccak_256_many(addr_p1s))]
 
 	def to_wallet_passwd(self,sk_hex):
 		return WalletPassword(self.hash256(sk_hex)[:32])
 
-	def to_viewkey(self,sk_hex):
-		assert len(sk_hex) == 64,'{}: incorrect privkey length'.format(len(sk_hex))
-		return MoneroViewKey(g.proto.preprocess_key(self.keccak_256(bytes.fromhex(sk_hex)).hexdigest(),None))
+	def to_viewkey_bin(self,sk):
+		return self.to_viewkey_bin_batch([sk])[0]
+
+	def to_viewkey_bin_batch(self,sks):
+		for sk in sks:
+			assert len(sk) == 32,'{}: incorrect privkey length'.format(len(sk)*2)
+		return [MoneroViewKey(g.proto.preprocess_key(h.hex(),None)) for h in self.keccak_256_many(sks)]
 
 	def to_segwit_redeem_script(self,sk_hex):
 		raise NotImplementedError('Monero addresses incompatible with Segwit')
@@ -219,12 +262,16 @@ class KeyGenerator(MMGenObject):
 		else:
 			raise TypeError('{}: incorrect argument type for {}()'.format(type(addr_type),cls.__name__))
 		if pubkey_type == 'std':
-			if cls.test_for_secp256k1(silent=silent) and generator != 1:
-				if not opt.key_generator or opt.key_generator == 2 or generator == 2:
-					return super(cls,cls).__new__(KeyGeneratorSecp256k1)
-			else:
+			gen = generator or opt.key_generator or g.key_generator
+			if gen == 2 and cls.test_for_secp256k1(silent=silent):
+				return super(cls,cls).__new__(KeyGeneratorSecp256k1)
+			elif gen == 1:
 				qmsg('Using (slow) native Python ECDSA library for address generation')
 				return super(cls,cls).__new__(KeyGeneratorPython)
+			else:
+				if gen == 2:
+					qmsg('Using native Python fixed-base secp256k1 engine for address generation')
+				return super(cls,cls).__new__(KeyGeneratorPythonFixedBase)
 		elif pubkey_type in ('zcash_z','monero'):
 			me = super(cls,cls).__new__(KeyGeneratorDummy)
 			me.desc = 'mmgen-'+pubkey_type
@@ -232,6 +279,34 @@ class KeyGenerator(MMGenObject):
 		else:
 			raise ValueError('{}: invalid pubkey_type argument'.format(pubkey_type))
 
+	# to_pubhex() and to_pubhex_batch() are wrappers for the bytes-native methods used by AddrList
+	def to_pubhex(self,privhex):
+		assert type(privhex) == PrivKey
+		return PubKey(self.to_pubkey_bin(bytes.fromhex(privhex),privhex.compressed).hex(),
+						compressed=privhex.compressed)
+
+	def to_pubhex_batch(self,privhexs): # privhexs must all have the same compression
+		if not privhexs: return []
+		compressed = privhexs[0].compressed
+		for privhex in privhexs:
+			assert type(privhex) == PrivKey
+			assert privhex.compressed == compressed,'Keys in batch differ in compression'
+		pubkeys = self.to_pubkey_bin_batch([bytes.fromhex(privhex) for privhex in privhexs],compressed)
+		return [PubKey(pubkey.hex(),compressed=compressed) for pubkey in pubkeys]
+
+	def to_pubkey_bin_batch(self,privkeys,compressed):
+		return [self.to_pubkey_bin(privkey,compressed) for privkey in privkeys]
+
+	def to_pubkey_bin_mixed(self,privhexs):
+		"batch-convert PrivKeys of mixed compression to public keys in bytes form, preserving order"
+		ret = [None] * len(privhexs)
+		for compressed in (False,True):
+			ns = [n for n,k in enumerate(privhexs) if k.compressed == compressed]
+			pubkeys = self.to_pubkey_bin_batch([bytes.fromhex(privhexs[n]) for n in ns],compressed)
+			for n,pubkey in zip(ns,pubkeys):
+				ret[n] = pubkey
+		return ret
+
 	@classmethod
 	def test_for_secp256k1(self,silent=False):
 		try:
@@ -242,12 +317,13 @@ class KeyGenerator(MMGenObject):
 		except:
 			return False
 
-import ecdsa
 class KeyGeneratorPython(KeyGenerator):
 
 	desc = 'mmgen-python-ecdsa'
 
 	def __init__(self,*args,**kwargs):
+		import ecdsa
+		self.ecdsa = ecdsa
 		# secp256k1: http://www.oid-info.com/get/1.3.132.0.10
 		p = 0xfffffffffffffffffffffffffffffffffffffffffffffffffffffffefffffc2f
 		r = 0xfffffffffffffffffffffffffffffffebaaedce6af48a03bbfd25e8cd0364141
@@ -263,33 +339,49 @@ class KeyGeneratorPython(KeyGenerator):
 	# devdoc/guide_wallets.md:
 	# Uncompressed public keys start with 0x04; compressed public keys begin with 0x03 or
 	# 0x02 depending on whether they're greater or less than the midpoint of the curve.
-	def privnum2pubhex(self,numpriv,compressed=False):
-		pko = ecdsa.SigningKey.from_secret_exponent(numpriv,self.secp256k1)
+	def privnum2pubkey_bin(self,numpriv,compressed=False):
+		pko = self.ecdsa.SigningKey.from_secret_exponent(numpriv,self.secp256k1)
 		# pubkey = x (32 bytes) + y (32 bytes) (unsigned big-endian)
-		pubkey = (pko.get_verifying_key().to_string()).hex()
+		pubkey = pko.get_verifying_key().to_string()
 		if compressed: # discard Y coord, replace with appropriate version byte
 			# even y: <0, odd y: >0 -- https://bitcointalk.org/index.php?topic=129652.0
-			return ('03','02')[pubkey[-1] in '02468ace'] + pubkey[:64]
+			return (b'\x03',b'\x02')[pubkey[-1] & 1 == 0] + pubkey[:32]
 		else:
-			return '04' + pubkey
+			return b'\x04' + pubkey
 
-	def to_pubhex(self,privhex):
-		assert type(privhex) == PrivKey
-		return PubKey(self.privnum2pubhex(
-			int(privhex,16),compressed=privhex.compressed),compressed=privhex.compressed)
+	def privnum2pubhex(self,numpriv,compressed=False):
+		return self.privnum2pubkey_bin(numpriv,compressed).hex()
+
+	def to_pubkey_bin(self,privkey,compressed):
+		return self.privnum2pubkey_bin(int.from_bytes(privkey,'big'),compressed)
+
+class KeyGeneratorPythonFixedBase(KeyGenerator):
+	desc = 'mmgen-python-fixedbase'
+	def to_pubkey_bin(self,privkey,compressed):
+		return self.to_pubkey_bin_batch([privkey],compressed)[0]
+
+	def to_pubkey_bin_batch(self,privkeys,compressed):
+		from mmgen.secp256k1_fixedbase import privnums2pubkeys
+		return privnums2pubkeys([int.from_bytes(privkey,'big') for privkey in privkeys],compressed)
 
 class KeyGeneratorSecp256k1(KeyGenerator):
 	desc = 'mmgen-secp256k1'
-	def to_pubhex(self,privhex):
-		assert type(privhex) == PrivKey
+	def to_pubkey_bin(self,privkey,compressed):
 		from mmgen.secp256k1 import priv2pub
-		return PubKey(priv2pub(bytes.fromhex(privhex),int(privhex.compressed)).hex(),compressed=privhex.compressed)
+		return priv2pub(privkey,int(compressed))
+
+	def to_pubkey_bin_batch(self,privkeys,compressed):
+		from mmgen import secp256k1
+		if not privkeys or not hasattr(secp256k1,'priv2pub_batch'): # module built from older source
+			return KeyGenerator.to_pubkey_bin_batch(self,privkeys,compressed)
+		w = (65,33)[compressed]
+		ret = secp256k1.priv2pub_batch(b''.join(privkeys),int(compressed))
+		return [ret[i:i+w] for i in range(0,len(ret),w)]
 
 class KeyGeneratorDummy(KeyGenerator):
 	desc = 'mmgen-dummy'
-	def to_pubhex(self,privhex):
-		assert type(privhex) == PrivKey
-		return PubKey(privhex,compressed=privhex.compressed)
+	def to_pubkey_bin(self,privkey,compressed):
+		return privkey
 
 class AddrListEntry(MMGenListItem):
 	addr    = MMGenListItemAttr('addr','CoinAddr')
@@ -309,19 +401,23 @@ class AddrListChksum(str,Hilite):
 	color = 'pink'
 	trunc_ok = False
 
-	def __new__(cls,addrlist):
+	# 'entries' may be an iterator, in which case entries are hashed as they're generated
+	def __new__(cls,addrlist,entries=None):
 		ea = addrlist.al_id.mmtype.extra_attrs # add viewkey and passwd to the mix, if present
-		lines = [' '.join(
+		h = sha256()
+		for n,e in enumerate(addrlist.data if entries is None else entries):
+			h.update(((' ','')[n==0] + ' '.join(
 					addrlist.chksum_rec_f(e) +
 					tuple(getattr(e,a) for a in ea if getattr(e,a))
-				) for e in addrlist.data]
-		return str.__new__(cls,make_chksum_N(' '.join(lines), nchars=16, sep=True))
+				)).encode())
+		s = sha256(h.digest()).hexdigest().upper() # cf. make_chksum_N()
+		return str.__new__(cls,' '.join([s[i*4:i*4+4] for i in range(4)]))
 
 class AddrListIDStr(str,Hilite):
 	color = 'green'
 	trunc_ok = False
-	def __new__(cls,addrlist,fmt_str=None):
-		idxs = [e.idx for e in addrlist.data]
+	def __new__(cls,addrlist,fmt_str=None,idxs=None):
+		idxs = idxs or [e.idx for e in addrlist.data]
 		prev = idxs[0]
 		ret = prev,
 		for i in idxs[1:]:
@@ -359,7 +455,7 @@ Record this checksum: it will be used to verify the address file in the future
 """.strip(),
 	'check_chksum': 'Check this value against your records',
 	'removed_dup_keys': """
-Removed {{}} duplicate WIF key{{}} from keylist (also in {pnm} key-address file
+Removed {{}} duplicate WIF key{{}} from keylist (also in {pnm} key-address file)
 """.strip().format(pnm=pnm)
 	}
 	entry_type = AddrListEntry
@@ -373,10 +469,14 @@ Removed {{}} duplicate WIF key{{}} from keylist (also in {pnm} key-address file
 	gen_keys = False
 	has_keys = False
 	ext      = 'addrs'
+	gen_batch_size = 100
+	verify_mp_min = 1000 # check keys in parallel only if the list has at least this many entries
+	spool    = None
+	_index_sig = None
 	chksum_rec_f = lambda foo,e: (str(e.idx), e.addr)
 
 	def __init__(self,addrfile='',al_id='',adata=[],seed='',addr_idxs='',src='',
-					addrlist='',keylist='',mmtype=None):
+					addrlist='',keylist='',mmtype=None,stream=False):
 
 		do_chksum = True
 		self.update_msgs()
@@ -385,6 +485,8 @@ Removed {{}} duplicate WIF key{{}} from keylist (also in {pnm} key-address file
 
 		if seed and addr_idxs:   # data from seed + idxs
 			self.al_id,src = AddrListID(seed.sid,mmtype),'gen'
+			if stream:
+				return self.init_stream(seed,addr_idxs)
 			adata = self.generate(seed,addr_idxs)
 		elif addrfile:           # data from MMGen address file
 			adata = self.parse_file(addrfile) # sets self.al_id
@@ -426,6 +528,45 @@ Removed {{}} duplicate WIF key{{}} from keylist (also in {pnm} key-address file
 		self.msgs.update(type(self).msgs)
 
 	def generate(self,seed,addrnums):
+		return AddrListList(self.gen_entries(seed,addrnums))
+
+	def init_stream(self,seed,addrnums,id_fmt_str=None):
+		"""
+		Streaming mode: entries are generated, formatted, checksummed and written to an encrypted
+		spool file in a single pass, and aren't retained, so memory use is independent of the
+		number of entries.  Output is from the spool via write_to_file().
+		"""
+		from mmgen.crypto import EncryptedSpool
+		self.spool = EncryptedSpool()
+		self.enc_params = None
+		self.data = AddrListList() # remains empty
+		self.num_addrs = len(addrnums)
+		self.fmt_data = ''
+		self.chksum = None
+		self.id_str = AddrListIDStr(self,id_fmt_str,idxs=addrnums)
+
+		fs = self.entry_fs(addrnums[-1])
+
+		def spool_entries(entries):
+			lines = []
+			for e in entries:
+				lines += self.format_entry(e,fs)
+				if len(lines) >= self.gen_batch_size:
+					self.spool.write(self.join_lines(lines).encode())
+					lines = []
+				yield e
+			self.spool.write(self.join_lines(lines).encode())
+
+		entries = spool_entries(self.gen_entries(seed,addrnums))
+
+		if type(self) == KeyList:
+			for e in entries: pass
+		else:
+			self.chksum = AddrListChksum(self,entries)
+			qmsg('Checksum for {} data {}: {}'.format(self.data_desc,self.id_str.hl(),self.chksum.hl()))
+			qmsg(self.msgs['record_chksum'])
+
+	def gen_entries(self,seed,addrnums):
 		assert type(addrnums) is AddrIdxList
 
 		seed = self.scramble_seed(seed.data)
@@ -441,43 +582,80 @@ Removed {{}} duplicate WIF key{{}} from keylist (also in {pnm} key-address file
 			kg = KeyGenerator(self.al_id.mmtype)
 			ag = AddrGenerator(self.al_id.mmtype)
 
-		t_addrs,num,pos,out = len(addrnums),0,0,AddrListList()
-		le = self.entry_type
+		def gen_entry_data(batch):
+			out = [{ 'idx': num, 'sec': PrivKey(sec_bin,compressed=compressed,pubkey_type=pubkey_type) }
+						for num,sec_bin in batch]
+			if self.gen_addrs:
+				privkeys = [bytes.fromhex(d['sec']) for d in out]
+				pubkeys = kg.to_pubkey_bin_batch(privkeys,compressed)
+				if gen_viewkey:
+					for d,(addr,viewkey) in zip(out,ag.to_addr_viewkey_bin_batch(pubkeys)):
+						d['addr'] = addr
+						d['viewkey'] = viewkey
+				else:
+					for d,addr in zip(out,ag.to_addr_bin_batch(pubkeys)):
+						d['addr'] = addr
+				if gen_wallet_passwd:
+					for d in out:
+						d['wallet_passwd'] = ag.to_wallet_passwd(d['sec'])
+			if type(self) == PasswordList:
+				for d in out:
+					d['passwd'] = str(self.make_passwd(d['sec'])) # TODO - own type
+			return out
 
-		while pos != t_addrs:
-			seed = sha512(seed).digest()
-			num += 1 # round
+		t_addrs = len(addrnums)
+		le = self.entry_type
 
-			if num != addrnums[pos]: continue
+		if g.chain_ckpt_interval:
+			from mmgen.chaincache import ChainCheckpointCache
+			ckpt = ChainCheckpointCache(self.al_id.sid,seed)
+		else:
+			ckpt = None
+
+		# The seed chain is walked in this process, while keys and addresses may be derived in parallel
+		secs = self.gen_secs(seed,addrnums,ckpt)
+		jobs = get_mp_jobs()
+		if jobs:
+			qmsg('Using {} worker processes'.format(jobs))
+			entry_data = mp_imap(gen_entry_data,get_chunks(secs,mp_chunksize(t_addrs,jobs)),jobs)
+		else:
+			entry_data = map(gen_entry_data,get_chunks(secs,self.gen_batch_size))
 
-			pos += 1
+		for pos,d in enumerate((d for batch in entry_data for d in batch),1):
 
 			if not g.debug:
-				qmsg_r('\rGenerating {} #{} ({} of {})'.format(self.gen_desc,num,pos,t_addrs))
-
-			e = le(idx=num)
+				qmsg_r('\rGenerating {} #{} ({} of {})'.format(self.gen_desc,d['idx'],pos,t_addrs))
 
-			# Secret key is double sha256 of seed hash round /num/
-			e.sec = PrivKey(sha256(sha256(seed).digest()).digest(),compressed=compressed,pubkey_type=pubkey_type)
-
-			if self.gen_addrs:
-				pubhex = kg.to_pubhex(e.sec)
-				e.addr = ag.to_addr(pubhex)
-				if gen_viewkey:
-					e.viewkey = ag.to_viewkey(pubhex)
-				if gen_wallet_passwd:
-					e.wallet_passwd = ag.to_wallet_passwd(e.sec)
+			e = le(**d)
 
 			if type(self) == PasswordList:
-				e.passwd = str(self.make_passwd(e.sec)) # TODO - own type
 				dmsg('Key {:>03}: {}'.format(pos,e.passwd))
 
-			out.append(e)
 			if g.debug_addrlist: Msg('generate():\n{}'.format(e.pformat()))
+			yield e
+
+		if ckpt: ckpt.save()
 
 		qmsg('\r{}: {} {}{} generated{}'.format(
 				self.al_id.hl(),t_addrs,self.gen_desc,suf(t_addrs,self.gen_desc_pl),' '*15))
-		return out
+
+	def gen_secs(self,seed,addrnums,ckpt=None):
+		"walk the seed chain, yielding an (idx,secret) pair for each requested index"
+		t_addrs,num,pos = len(addrnums),0,0
+		if ckpt:
+			start = ckpt.get_start(addrnums[0])
+			if start: num,seed = start
+		while pos != t_addrs:
+			seed = sha512(seed).digest()
+			num += 1 # round
+			if ckpt: ckpt.add(num,seed)
+
+			if num != addrnums[pos]: continue
+
+			pos += 1
+
+			# Secret key is double sha256 of seed hash round /num/
+			yield num,sha256(sha256(seed).digest()).digest()
 
 	def check_format(self,addr): return True # format is checked when added to list entry object
 
@@ -497,15 +675,36 @@ Removed {{}} duplicate WIF key{{}} from keylist (also in {pnm} key-address file
 		return scramble_seed(seed,scramble_key.encode(),g.scramble_hash_rounds)
 
 	def encrypt(self,desc='new key list'):
-		from mmgen.crypto import mmgen_encrypt
-		self.fmt_data = mmgen_encrypt(self.fmt_data.encode(),desc,'')
+		if self.spool: # data will be encrypted as it's written
+			from mmgen.crypto import get_mmgen_encrypt_params
+			self.enc_params = get_mmgen_encrypt_params(desc,'')
+			self.enc_desc = desc
+		else:
+			from mmgen.crypto import mmgen_encrypt
+			self.fmt_data = mmgen_encrypt(self.fmt_data.encode(),desc,'')
 		self.ext += '.'+g.mmenc_ext
 
+	def get_stream_data(self):
+		"return an iterator over the formatted (and possibly encrypted) data in the spool, in chunks"
+		def get_chunks():
+			yield self.join_lines(self.format_header()).encode()
+			for chunk in self.spool.read_chunks():
+				yield chunk
+			yield b'}\n'
+		if self.enc_params:
+			from mmgen.crypto import mmgen_encrypt_stream
+			return mmgen_encrypt_stream(get_chunks,self.enc_params,self.enc_desc)
+		else:
+			import codecs
+			dec = codecs.getincrementaldecoder('utf8')()
+			return (dec.decode(chunk) for chunk in get_chunks())
+
 	def write_to_file(self,ask_tty=True,ask_write_default_yes=False,binary=False,desc=None):
 		tn = ('','.testnet')[g.proto.is_testnet()]
 		fn = '{}{x}{}.{}'.format(self.id_str,tn,self.ext,x='-α' if g.debug_utf8 else '')
 		ask_tty = self.has_keys and not opt.quiet
-		write_data_to_file(fn,self.fmt_data,desc or self.file_desc,ask_tty=ask_tty,binary=binary)
+		data = self.get_stream_data() if self.spool else self.fmt_data
+		write_data_to_file(fn,data,desc or self.file_desc,ask_tty=ask_tty,binary=binary)
 
 	def idxs(self):
 		return [e.idx for e in self.data]
@@ -522,48 +721,60 @@ Removed {{}} duplicate WIF key{{}} from keylist (also in {pnm} key-address file
 	def comments(self):
 		return [e.label for e in self.data]
 
+	def get_index(self,key):
+		"""
+		Return a dict mapping attribute 'key' ('idx' or 'addr') of each entry to the entry.
+		Indexes are built on first use and discarded when the list is modified, either by
+		the methods of this class or by replacing, growing or shrinking self.data.  Code
+		changing the 'idx' or 'addr' attributes of existing entries must call invalidate_indexes().
+		"""
+		sig = (id(self.data),len(self.data))
+		if self._index_sig != sig:
+			self._indexes,self._index_sig = {},sig
+		if key not in self._indexes: # reversed(), so the first of any duplicate entries wins
+			self._indexes[key] = {getattr(e,key):e for e in reversed(self.data) if getattr(e,key)}
+		return self._indexes[key]
+
+	def invalidate_indexes(self):
+		self._index_sig = None
+
 	def entry(self,idx):
-		for e in self.data:
-			if idx == e.idx: return e
+		return self.get_index('idx').get(idx)
 
 	def coinaddr(self,idx):
-		for e in self.data:
-			if idx == e.idx: return e.addr
+		e = self.entry(idx)
+		return e.addr if e else None
 
 	def comment(self,idx):
-		for e in self.data:
-			if idx == e.idx: return e.label
+		e = self.entry(idx)
+		return e.label if e else None
 
 	def set_comment(self,idx,comment):
-		for e in self.data:
-			if idx == e.idx:
-				e.label = comment
+		e = self.entry(idx)
+		if e: e.label = comment
 
 	def make_reverse_dict(self,coinaddrs):
-		d,b = MMGenDict(),coinaddrs
-		for e in self.data:
-			try:
-				d[b[b.index(e.addr)]] = MMGenID('{}:{}'.format(self.al_id,e.idx)),e.label
-			except: pass
+		d,idx = MMGenDict(),self.get_index('addr')
+		for addr in coinaddrs:
+			e = idx.get(addr)
+			if e: d[addr] = MMGenID('{}:{}'.format(self.al_id,e.idx)),e.label
 		return d
 
 	def remove_dup_keys(self,cmplist):
 		assert self.has_keys
-		pop_list = []
-		for n,d in enumerate(self.data):
-			for e in cmplist.data:
-				if e.sec.wif == d.sec.wif:
-					pop_list.append(n)
-		for n in reversed(pop_list): self.data.pop(n)
-		if pop_list:
-			vmsg(self.msgs['removed_dup_keys'].format(len(pop_list),suf(removed,'s')))
+		cmp_wifs = {e.sec.wif for e in cmplist.data}
+		n = len(self.data)
+		self.data = AddrListList([d for d in self.data if d.sec.wif not in cmp_wifs])
+		removed = n - len(self.data)
+		if removed:
+			vmsg(self.msgs['removed_dup_keys'].format(removed,suf(removed,'s')))
 
 	def add_wifs(self,key_list):
 		if not key_list: return
+		secs = {e.addr:e.sec for e in key_list.data if e.addr and e.sec}
 		for d in self.data:
-			for e in key_list.data:
-				if e.addr and e.sec and e.addr == d.addr:
-					d.sec = e.sec
+			if d.addr in secs:
+				d.sec = secs[d.addr]
 
 	def list_missing(self,key):
 		return [d.addr for d in self.data if not getattr(d,key)]
@@ -573,15 +784,36 @@ Removed {{}} duplicate WIF key{{}} from keylist (also in {pnm} key-address file
 		t = MMGenAddrType(g.proto.mmtypes[0])
 		kg = KeyGenerator(t.pubkey_type)
 		ag = AddrGenerator(t.gen_method)
-		d = self.data
-		for n,e in enumerate(d,1):
+		d,n = self.data,0
+		for chunk in get_chunks(d,self.gen_batch_size):
+			for e,pubkey in zip(chunk,kg.to_pubkey_bin_mixed([e.sec for e in chunk])):
+				e.addr = ag.to_addr_bin(pubkey)
+				if g.debug_addrlist: Msg('generate_addrs_from_keys():\n{}'.format(e.pformat()))
+			n += len(chunk)
 			qmsg_r('\rGenerating addresses from keylist: {}/{}'.format(n,len(d)))
-			e.addr = ag.to_addr(kg.to_pubhex(e.sec))
-			if g.debug_addrlist: Msg('generate_addrs_from_keys():\n{}'.format(e.pformat()))
+		self.invalidate_indexes()
 		qmsg('\rGenerated addresses from keylist: {}/{} '.format(n,len(d)))
 
 	def format(self,enable_comments=False):
 
+		if self.spool: return # streaming mode: data was formatted at generation time
+
+		out = self.format_header()
+		fs = self.entry_fs(self.data[-1].idx)
+		for e in self.data:
+			out += self.format_entry(e,fs,enable_comments)
+		out.append('}')
+		self.fmt_data = self.join_lines(out)
+
+	@staticmethod
+	def join_lines(lines):
+		return ''.join([l.rstrip()+'\n' for l in lines])
+
+	def entry_fs(self,last_idx):
+		return '  {:<%s}  {:<34}{}' % len(str(last_idx))
+
+	def format_header(self):
+
 		out = [self.msgs['file_header']+'\n']
 		if self.chksum:
 			out.append('# {} data checksum for {}: {}'.format(
@@ -600,25 +832,23 @@ Removed {{}} duplicate WIF key{{}} from keylist (also in {pnm} key-address file
 
 		dmsg_sc('lbl',lbl[9:])
 		out.append('{} {{'.format(lbl))
+		return out
 
-		fs = '  {:<%s}  {:<34}{}' % len(str(self.data[-1].idx))
-		for e in self.data:
-			c = ' '+e.label if enable_comments and e.label else ''
-			if type(self) == KeyList:
-				out.append(fs.format(e.idx,'{} {}'.format(self.al_id.mmtype.wif_label,e.sec.wif),c))
-			elif type(self) == PasswordList:
-				out.append(fs.format(e.idx,e.passwd,c))
-			else: # First line with idx
-				out.append(fs.format(e.idx,e.addr,c))
-				if self.has_keys:
-					if opt.b16: out.append(fs.format('', 'orig_hex: '+e.sec.orig_hex,c))
-					out.append(fs.format('','{} {}'.format(self.al_id.mmtype.wif_label,e.sec.wif),c))
-					for k in ('viewkey','wallet_passwd'):
-						v = getattr(e,k)
-						if v: out.append(fs.format('','{}: {}'.format(k,v),c))
-
-		out.append('}')
-		self.fmt_data = '\n'.join([l.rstrip() for l in out]) + '\n'
+	def format_entry(self,e,fs,enable_comments=False):
+		c = ' '+e.label if enable_comments and e.label else ''
+		if type(self) == KeyList:
+			return [fs.format(e.idx,'{} {}'.format(self.al_id.mmtype.wif_label,e.sec.wif),c)]
+		elif type(self) == PasswordList:
+			return [fs.format(e.idx,e.passwd,c)]
+		else: # First line with idx
+			out = [fs.format(e.idx,e.addr,c)]
+			if self.has_keys:
+				if opt.b16: out.append(fs.format('', 'orig_hex: '+e.sec.orig_hex,c))
+				out.append(fs.format('','{} {}'.format(self.al_id.mmtype.wif_label,e.sec.wif),c))
+				for k in ('viewkey','wallet_passwd'):
+					v = getattr(e,k)
+					if v: out.append(fs.format('','{}: {}'.format(k,v),c))
+			return out
 
 	def parse_file_body(self,lines):
 
@@ -654,17 +884,44 @@ Removed {{}} duplicate WIF key{{}} from keylist (also in {pnm} key-address file
 
 		if self.has_keys:
 			if (hasattr(opt,'yes') and opt.yes) or keypress_confirm('Check key-to-address validity?'):
-				kg = KeyGenerator(self.al_id.mmtype)
-				ag = AddrGenerator(self.al_id.mmtype)
-				llen = len(ret)
-				for n,e in enumerate(ret):
-					qmsg_r('\rVerifying keys {}/{}'.format(n+1,llen))
-					assert e.addr == ag.to_addr(kg.to_pubhex(e.sec)),(
-						"Key doesn't match address!\n  {}\n  {}".format(e.sec.wif,e.addr))
-				qmsg(' - done')
+				self.verify_keys(ret)
 
 		return ret
 
+	def verify_keys(self,entries):
+		"""
+		Check that the key of each entry produces its address.  Large lists are checked in chunks
+		in parallel if --jobs is set.  Stops at the first mismatch, raising an AssertionError.
+		"""
+		kg = KeyGenerator(self.al_id.mmtype)
+		ag = AddrGenerator(self.al_id.mmtype)
+
+		def check_batch(batch): # return the first non-matching (sec,addr) pair, if any
+			for (sec,addr),pubkey in zip(batch,kg.to_pubkey_bin_mixed([sec for sec,addr in batch])):
+				if ag.to_addr_bin(pubkey) != addr:
+					return sec,addr
+
+		t_keys = len(entries)
+		pairs = ((e.sec,e.addr) for e in entries)
+		jobs = get_mp_jobs() if t_keys >= self.verify_mp_min else 0
+		if jobs:
+			vmsg('Verifying keys with {} worker processes'.format(jobs))
+			chunk_size = mp_chunksize(t_keys,jobs,max_size=1000)
+			res = mp_imap(check_batch,get_chunks(pairs,chunk_size),jobs)
+		else:
+			chunk_size = self.gen_batch_size
+			res = map(check_batch,get_chunks(pairs,chunk_size))
+
+		import time
+		last_t = 0
+		for n,bad in enumerate(res,1):
+			assert not bad,"Key doesn't match address!\n  {}\n  {}".format(bad[0].wif,bad[1])
+			if time.time() - last_t > 0.2: # throttle progress output
+				qmsg_r('\rVerifying keys {}/{}'.format(min(n*chunk_size,t_keys),t_keys))
+				last_t = time.time()
+
+		qmsg('\rVerifying keys {}/{} - done'.format(t_keys,t_keys))
+
 	def parse_file(self,fn,buf=[],exit_on_error=True):
 
 		def parse_addrfile_label(lbl): # we must maintain backwards compat, so parse is tricky
@@ -748,6 +1005,15 @@ class KeyAddrList(AddrList):
 	ext      = 'akeys'
 	chksum_rec_f = lambda foo,e: (str(e.idx), e.addr, e.sec.wif)
 
+	def merge_keylist(self,key_list):
+		"""
+		Add keys from flat key list 'key_list' to the entries with matching coin addresses,
+		in time linear in the combined length of the lists.  Return the addresses for which
+		no key was found.
+		"""
+		self.add_wifs(key_list)
+		return self.list_missing('sec')
+
 class KeyList(AddrList):
 	msgs = {
 	'file_header': """
@@ -804,7 +1070,7 @@ Record this checksum: it will be used to verify the password file in the future
 
 	def __init__(   self,infile=None,seed=None,
 					pw_idxs=None,pw_id_str=None,pw_len=None,pw_fmt=None,
-					chk_params_only=False):
+					chk_params_only=False,stream=False):
 
 		self.update_msgs()
 
@@ -818,17 +1084,21 @@ Record this checksum: it will be used to verify the password file in the future
 			self.set_pw_len(pw_len)
 			if chk_params_only: return
 			self.al_id = AddrListID(seed.sid,MMGenPasswordType('P'))
+			if stream:
+				return self.init_stream(seed,pw_idxs,self.id_fmt_str())
 			self.data = self.generate(seed,pw_idxs)
 
 		self.num_addrs = len(self.data)
 		self.fmt_data = ''
 		self.chksum = AddrListChksum(self)
 
-		fs = '{}-{}-{}-{}[{{}}]'.format(self.al_id.sid,self.pw_id_str,self.pw_fmt,self.pw_len)
-		self.id_str = AddrListIDStr(self,fs)
+		self.id_str = AddrListIDStr(self,self.id_fmt_str())
 		qmsg('Checksum for {} data {}: {}'.format(self.data_desc,self.id_str.hl(),self.chksum.hl()))
 		qmsg(self.msgs[('record_chksum','check_chksum')[bool(infile)]])
 
+	def id_fmt_str(self):
+		return '{}-{}-{}-{}[{{}}]'.format(self.al_id.sid,self.pw_id_str,self.pw_fmt,self.pw_len)
+
 	def set_pw_fmt(self,pw_fmt):
 		assert pw_fmt in self.pw_info
 		self.pw_fmt = pw_fmt
@@ -900,6 +1170,7 @@ re-import your addresses.
 
 	def __init__(self,source=None):
 		self.al_ids = {}
+		self._coinaddr_index = None
 		if source == 'tw': self.add_tw_data()
 
 	def seed_ids(self):
@@ -918,8 +1189,25 @@ re-import your addresses.
 		return coinaddr or None
 
 	def coinaddr2mmaddr(self,coinaddr):
-		d = self.make_reverse_dict([coinaddr])
-		return (list(d.values())[0][0]) if d else None
+		ret = self.coinaddr2entry(coinaddr)
+		return ret[0] if ret else None
+
+	def coinaddr_index(self):
+		"""
+		Return a dict mapping each coin address in all address lists to an (al_id,entry) pair.
+		Built on first use and discarded when an address list is added.
+		"""
+		if self._coinaddr_index is None:
+			self._coinaddr_index = {}
+			for al_id,al in self.al_ids.items():
+				for addr,e in al.get_index('addr').items():
+					self._coinaddr_index[addr] = (al_id,e)
+		return self._coinaddr_index
+
+	def coinaddr2entry(self,coinaddr):
+		"return an (MMGenID,AddrListEntry) pair for 'coinaddr', or None if not found"
+		ret = self.coinaddr_index().get(coinaddr)
+		return (MMGenID('{}:{}'.format(ret[0],ret[1].idx)),ret[1]) if ret else None
 
 	@classmethod
 	def get_tw_data(cls):
@@ -952,12 +1240,14 @@ re-import your addresses.
 	def add(self,addrlist):
 		if type(addrlist) == AddrList:
 			self.al_ids[addrlist.al_id] = addrlist
+			self._coinaddr_index = None
 			return True
 		else:
 			raise TypeError('Error: object {!r} is not of type AddrList'.format(addrlist))
 
 	def make_reverse_dict(self,coinaddrs):
 		d = MMGenDict()
-		for al_id in self.al_ids:
-			d.update(self.al_ids[al_id].make_reverse_dict(coinaddrs))
+		for addr in coinaddrs:
+			ret = self.coinaddr2entry(addr)
+			if ret: d[addr] = ret[0],ret[1].label
 		return d
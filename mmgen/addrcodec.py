@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+#
+# mmgen = Multi-Mode GENerator, command-line Bitcoin cold storage solution
+# Copyright (C)2013-2019 The MMGen Project <mmgen@tuta.io>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+addrcodec.py:  Base58Check and Bech32 address codecs for the MMGen suite
+
+All functions take and return bytes, with addresses as str.  Lookups are done
+with precomputed tables, and big-integer arithmetic is done several base-58 digits
+at a time.  The *_many() functions process lists of payloads or addresses.
+
+The Bech32 functions are equivalent to bech32.encode() and bech32.decode(), the
+reference implementation, which is retained for testing.
+"""
+
+import hashlib
+
+def _hash256_chk(data):
+	return hashlib.sha256(hashlib.sha256(data).digest()).digest()[:4]
+
+# Base58Check
+
+b58a = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+_b58rev = { ch: n for n,ch in enumerate(b58a) }
+_b58pairs = tuple(a+b for a in b58a for b in b58a) # two digits per big-integer division
+_b58_chunk_len = 10
+_b58_chunk_base = 58 ** _b58_chunk_len
+
+def _b58_encode_int(n):
+	out = []
+	while n:
+		n,r = divmod(n,58*58)
+		out.append(_b58pairs[r])
+	return ''.join(reversed(out)).lstrip('1')
+
+def b58chk_encode(data):
+	"encode bytes 'data' with a four-byte checksum appended"
+	lzeroes = len(data) - len(data.lstrip(b'\x00'))
+	return ('1' * lzeroes) + _b58_encode_int(int.from_bytes(data+_hash256_chk(data),'big'))
+
+def b58chk_decode(s):
+	"""
+	decode Base58Check string 's' and return the payload without its checksum.  Raises
+	ValueError on an invalid character or checksum
+	"""
+	lzeroes = len(s) - len(s.lstrip('1'))
+	n,cl = 0,_b58_chunk_len
+	try:
+		for i in range(0,len(s),cl):
+			chunk = s[i:i+cl]
+			m = 0
+			for ch in chunk:
+				m = m * 58 + _b58rev[ch]
+			n = n * 58**len(chunk) + m
+	except KeyError as e:
+		raise ValueError('{!r}: invalid Base58 character'.format(e.args[0]))
+	data = bytes(lzeroes) + n.to_bytes((n.bit_length() + 7) // 8,'big')
+	ret,chk = data[:-4],data[-4:]
+	if chk != _hash256_chk(ret):
+		fs = 'b58chk_decode(): {}: incorrect checksum for {!r}, expected {}'
+		raise ValueError(fs.format(chk.hex(),ret.hex(),_hash256_chk(ret).hex()))
+	return ret
+
+def b58chk_encode_many(payloads):
+	return [b58chk_encode(data) for data in payloads]
+
+def b58chk_verify_many(addrs):
+	"return a list of decoded payloads, with None for each invalid address"
+	ret = []
+	for s in addrs:
+		try: ret.append(b58chk_decode(s))
+		except ValueError: ret.append(None)
+	return ret
+
+# Bech32 (BIP 173)
+
+bech32_charset = 'qpzry9x8gf2tvdw0s3jn54khce6mua7l'
+_bech32_rev = { ch: n for n,ch in enumerate(bech32_charset) }
+_bech32_gen = (0x3b6a57b2,0x26508e6d,0x1ea119fa,0x3d4233dd,0x2a1462b3)
+
+# XOR of the generator values selected by each possible 5-bit 'top' value
+_bech32_table = tuple(
+	(_bech32_gen[0] if t & 1 else 0) ^ (_bech32_gen[1] if t & 2 else 0) ^ (_bech32_gen[2] if t & 4 else 0) ^
+	(_bech32_gen[3] if t & 8 else 0) ^ (_bech32_gen[4] if t & 16 else 0)
+	for t in range(32) )
+
+def _bech32_polymod(values,chk=1):
+	tbl = _bech32_table
+	for v in values:
+		chk = (chk & 0x1ffffff) << 5 ^ v ^ tbl[chk >> 25]
+	return chk
+
+_hrp_chk_cache = {}
+
+def _bech32_hrp_chk(hrp):
+	"polymod state after the expanded HRP, which is constant for a given HRP"
+	if hrp not in _hrp_chk_cache:
+		_hrp_chk_cache[hrp] = _bech32_polymod([ord(x) >> 5 for x in hrp] + [0] + [ord(x) & 31 for x in hrp])
+	return _hrp_chk_cache[hrp]
+
+def _convertbits(data,frombits,tobits,pad):
+	acc,bits,ret = 0,0,[]
+	maxv = (1 << tobits) - 1
+	for value in data:
+		acc = (acc << frombits) | value
+		bits += frombits
+		while bits >= tobits:
+			bits -= tobits
+			ret.append((acc >> bits) & maxv)
+		acc &= (1 << bits) - 1
+	if pad:
+		if bits:
+			ret.append((acc << (tobits - bits)) & maxv)
+	elif bits >= frombits or acc:
+		return None
+	return ret
+
+def bech32_encode(hrp,witver,witprog):
+	"encode witness program bytes 'witprog' as a segwit address"
+	data = [witver] + _convertbits(witprog,8,5,True)
+	polymod = _bech32_polymod(data + [0,0,0,0,0,0],_bech32_hrp_chk(hrp)) ^ 1
+	cs = bech32_charset
+	return hrp + '1' + ''.join([cs[d] for d in data] + [cs[(polymod >> 5 * (5 - i)) & 31] for i in range(6)])
+
+def bech32_decode(hrp,addr):
+	"return (witver,witprog) for a valid segwit address with HRP 'hrp', else (None,None)"
+	if len(addr) > 90 or any(ord(x) < 33 or ord(x) > 126 for x in addr):
+		return (None,None)
+	if addr.lower() != addr:
+		if addr.upper() != addr:
+			return (None,None)
+		addr = addr.lower()
+	pos = addr.rfind('1')
+	if pos < 1 or pos + 7 > len(addr) or addr[:pos] != hrp:
+		return (None,None)
+	try:
+		data = [_bech32_rev[x] for x in addr[pos+1:]]
+	except KeyError:
+		return (None,None)
+	if _bech32_polymod(data,_bech32_hrp_chk(hrp)) != 1:
+		return (None,None)
+	decoded = _convertbits(data[1:-6],5,8,False)
+	if decoded is None or len(decoded) < 2 or len(decoded) > 40 or data[0] > 16:
+		return (None,None)
+	if data[0] == 0 and len(decoded) not in (20,32):
+		return (None,None)
+	return (data[0],bytes(decoded))
+
+def bech32_encode_many(hrp,witver,witprogs):
+	return [bech32_encode(hrp,witver,witprog) for witprog in witprogs]
+
+def bech32_verify_many(hrp,addrs):
+	"return a list of (witver,witprog) pairs, with (None,None) for each invalid address"
+	return [bech32_decode(hrp,addr) for addr in addrs]
@@ -63,6 +63,11 @@ class Token(MMGenObject): # ERC20
 	def balance(self,acct_addr):
 		return self.do_call('balanceOf(address)',acct_addr.rjust(64,'0'),toUnit=True)
 
+	def balances(self,acct_addrs): # fetched in parallel
+		data = '0x' + create_method_id('balanceOf(address)')
+		ret = g.rpch.gather('eth_call',[({ 'to': '0x'+self.addr, 'data': data+a.rjust(64,'0') },) for a in acct_addrs])
+		return [int(r,16) * self.base_unit for r in ret]
+
 	def strip(self,s):
 		return ''.join([chr(b) for b in s if 32 <= b <= 127]).strip()
 
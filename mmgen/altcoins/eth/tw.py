@@ -27,6 +27,9 @@ from mmgen.tw import TrackingWallet,TwAddrList,TwUnspentOutputs
 from mmgen.addr import AddrData
 from .contract import Token
 
+def get_eth_balances(addrs): # fetched in parallel
+	return [ETHAmt(int(r,16),'wei') for r in g.rpch.gather('eth_getBalance',[('0x'+a,) for a in addrs])]
+
 class EthereumTrackingWallet(TrackingWallet):
 
 	desc = 'Ethereum tracking wallet'
@@ -198,17 +201,18 @@ Actions:         [q]uit view, [p]rint to file, pager [v]iew, [w]ide view,
 		if key == 'txid': return
 		super(EthereumTwUnspentOutputs,self).do_sort(key=key,reverse=reverse)
 
-	def get_addr_bal(self,addr):
-		return ETHAmt(int(g.rpch.eth_getBalance('0x'+addr),16),'wei')
+	def get_addr_bals(self,addrs):
+		return get_eth_balances(addrs)
 
 	def get_unspent_rpc(self):
 		rpc_init()
+		data = TrackingWallet().sorted_list()
 		return [{
 				'account': TwLabel(d['mmid']+' '+d['comment'],on_fail='raise'),
 				'address': d['addr'],
-				'amount': self.get_addr_bal(d['addr']),
+				'amount': bal,
 				'confirmations': 0, # TODO
-				} for d in TrackingWallet().sorted_list()]
+				} for d,bal in zip(data,self.get_addr_bals([d['addr'] for d in data]))]
 
 class EthereumTokenTwUnspentOutputs(EthereumTwUnspentOutputs):
 
@@ -218,13 +222,13 @@ class EthereumTokenTwUnspentOutputs(EthereumTwUnspentOutputs):
 
 	def get_display_precision(self): return 10 # truncate precision for narrow display
 
-	def get_addr_bal(self,addr):
-		return Token(g.token).balance(addr)
+	def get_addr_bals(self,addrs):
+		return Token(g.token).balances(addrs)
 
 	def get_unspent_data(self):
 		super(type(self),self).get_unspent_data()
-		for e in self.unspent:
-			e.amt2 = ETHAmt(int(g.rpch.eth_getBalance('0x'+e.addr),16),'wei')
+		for e,bal in zip(self.unspent,get_eth_balances([e.addr for e in self.unspent])):
+			e.amt2 = bal
 
 class EthereumTwAddrList(TwAddrList):
 
@@ -237,11 +241,11 @@ class EthereumTwAddrList(TwAddrList):
 		self.total = g.proto.coin_amt('0')
 
 		from mmgen.obj import CoinAddr
-		for mmid,d in list(tw.items()):
+		entries = [(TwLabel(mmid+' '+d['comment'],on_fail='raise'),d) for mmid,d in list(tw.items())]
+		if usr_addr_list:
+			entries = [(label,d) for label,d in entries if label.mmid in usr_addr_list]
+		for (label,d),bal in zip(entries,self.get_addr_balances([d['addr'] for label,d in entries])):
 #			if d['confirmations'] < minconf: continue # cannot get confirmations for eth account
-			label = TwLabel(mmid+' '+d['comment'],on_fail='raise')
-			if usr_addr_list and (label.mmid not in usr_addr_list): continue
-			bal = self.get_addr_balance(d['addr'])
 			if bal == 0 and not showempty:
 				if not label.comment: continue
 				if not all_labels: continue
@@ -252,13 +256,13 @@ class EthereumTwAddrList(TwAddrList):
 			self[label.mmid]['amt'] += bal
 			self.total += bal
 
-	def get_addr_balance(self,addr):
-		return ETHAmt(int(g.rpch.eth_getBalance('0x'+addr),16),'wei')
+	def get_addr_balances(self,addrs):
+		return get_eth_balances(addrs)
 
 class EthereumTokenTwAddrList(EthereumTwAddrList):
 
-	def get_addr_balance(self,addr):
-		return self.token.balance(addr)
+	def get_addr_balances(self,addrs):
+		return self.token.balances(addrs)
 
 from mmgen.tw import TwGetBalance
 class EthereumTwGetBalance(TwGetBalance):
@@ -267,7 +271,8 @@ class EthereumTwGetBalance(TwGetBalance):
 
 	def create_data(self):
 		data = TrackingWallet().mmid_ordered_dict()
-		for d in data:
+		bals = self.get_addr_balances([data[d]['addr'] for d in data])
+		for d,amt in zip(data,bals):
 			if d.type == 'mmgen':
 				key = d.obj.sid
 				if key not in self.data:
@@ -276,18 +281,17 @@ class EthereumTwGetBalance(TwGetBalance):
 				key = 'Non-MMGen'
 
 			conf_level = 2 # TODO
-			amt = self.get_addr_balance(data[d]['addr'])
 
 			self.data['TOTAL'][conf_level] += amt
 			self.data[key][conf_level] += amt
 
-	def get_addr_balance(self,addr):
-		return ETHAmt(int(g.rpch.eth_getBalance('0x'+addr),16),'wei')
+	def get_addr_balances(self,addrs):
+		return get_eth_balances(addrs)
 
 class EthereumTokenTwGetBalance(EthereumTwGetBalance):
 
-	def get_addr_balance(self,addr):
-		return Token(g.token).balance(addr)
+	def get_addr_balances(self,addrs):
+		return Token(g.token).balances(addrs)
 
 class EthereumAddrData(AddrData):
 
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+#
+# mmgen = Multi-Mode GENerator, command-line Bitcoin cold storage solution
+# Copyright (C)2013-2019 The MMGen Project <mmgen@tuta.io>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+chaincache.py:  Persistent seed chain checkpoint cache for the MMGen suite
+"""
+
+import os
+from hashlib import sha256
+from mmgen.common import *
+from mmgen.obj import MMGenObject
+
+class ChainCheckpointCache(MMGenObject):
+	"""
+	Encrypted on-disk store of sha512 seed chain states, saved every g.chain_ckpt_interval
+	rounds, so that generating high address indexes needn't restart the chain from round 1.
+
+	There's one file per scrambled seed, i.e. per (Seed ID,scramble key) pair.  The file is
+	named after the Seed ID and a hash of the scrambled seed, and its contents are encrypted
+	with a key derived from the scrambled seed, so they're readable only by holders of the seed.
+
+	File format: IV + AES256_CTR(sha256(data) + data), where data is a series of
+	4-byte big-endian round numbers each followed by the 64-byte chain state.
+	"""
+	dir_name = 'chain_ckpt'
+	ext = 'ckpt'
+	rec_len = 4 + 64
+
+	def __init__(self,sid,scr_seed):
+		self.key = sha256(b'chain checkpoint key:' + scr_seed).digest()
+		file_id = sha256(b'chain checkpoint id:' + scr_seed).hexdigest()[:8].upper()
+		self.fn = os.path.join(self.get_dir(),'{}-{}.{}'.format(sid,file_id,self.ext))
+		self.interval = g.chain_ckpt_interval
+		self.modified = False
+		self.ckpts = self.load()
+
+	@classmethod
+	def get_dir(cls):
+		return os.path.join(g.data_dir_root,cls.dir_name)
+
+	@classmethod
+	def get_files(cls,sid=None):
+		try: fns = os.listdir(cls.get_dir())
+		except: return []
+		return sorted(os.path.join(cls.get_dir(),fn) for fn in fns
+					if fn.endswith('.'+cls.ext) and (sid is None or fn.split('-')[0] == sid))
+
+	def load(self):
+		try:
+			data = open(self.fn,'rb').read()
+		except:
+			return {}
+		from mmgen.crypto import decrypt_data
+		iv = data[:g.aesctr_iv_len]
+		dec = decrypt_data(data[g.aesctr_iv_len:],self.key,iv,desc='seed chain checkpoints')
+		d = dec[sha256().digest_size:]
+		if dec[:sha256().digest_size] != sha256(d).digest() or len(d) % self.rec_len:
+			ymsg("Warning: seed chain checkpoint file '{}' is corrupted, ignoring".format(self.fn))
+			return {}
+		os.utime(self.fn) # record access for eviction
+		rl = self.rec_len
+		return { int.from_bytes(d[i:i+4],'big'): d[i+4:i+rl] for i in range(0,len(d),rl) }
+
+	def get_start(self,idx):
+		"return the (round,state) pair for the highest checkpoint preceding index 'idx', or None"
+		rounds = [n for n in self.ckpts if n < idx]
+		if rounds:
+			n = max(rounds)
+			dmsg('Starting seed chain at cached checkpoint for round {}'.format(n))
+			return n,self.ckpts[n]
+
+	def add(self,num,state):
+		if self.interval and not num % self.interval and num not in self.ckpts:
+			self.ckpts[num] = state
+			self.modified = True
+
+	def save(self):
+		if not self.modified: return
+
+		# size policy for a single seed chain: halve the checkpoint density as needed
+		while len(self.ckpts) > g.chain_ckpt_max_per_seed:
+			self.ckpts = { n: self.ckpts[n] for n in sorted(self.ckpts)[1::2] }
+
+		from mmgen.crypto import encrypt_data
+		d = b''.join(n.to_bytes(4,'big') + self.ckpts[n] for n in sorted(self.ckpts))
+		iv = os.urandom(g.aesctr_iv_len)
+		data = iv + encrypt_data(sha256(d).digest()+d,self.key,iv,desc='seed chain checkpoints',verify=False)
+
+		check_or_create_dir(self.get_dir())
+		tmp_fn = self.fn + '.tmp'
+		with open(tmp_fn,'wb') as f:
+			os.chmod(tmp_fn,0o600)
+			f.write(data)
+		os.replace(tmp_fn,self.fn)
+		self.modified = False
+		self.evict(keep=self.fn)
+
+	@classmethod
+	def evict(cls,keep=None):
+		"delete least recently used files until the cache is no larger than g.chain_ckpt_max_size"
+		files = sorted(((os.stat(fn),fn) for fn in cls.get_files()),key=lambda e: e[0].st_mtime)
+		total = sum(st.st_size for st,fn in files)
+		for st,fn in files:
+			if total <= g.chain_ckpt_max_size: break
+			if fn == keep: continue
+			os.unlink(fn)
+			total -= st.st_size
+			vmsg("Evicted seed chain checkpoint file '{}'".format(fn))
+
+	@classmethod
+	def purge(cls,sid=None):
+		"delete all cache files, or those for Seed ID 'sid', returning the number of files deleted"
+		fns = cls.get_files(sid)
+		for fn in fns:
+			os.unlink(fn)
+		return len(fns)
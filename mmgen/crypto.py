@@ -22,6 +22,7 @@ crypto.py:  Cryptographic and related routines for the MMGen suite
 
 from cryptography.hazmat.primitives.ciphers import Cipher,algorithms,modes
 from cryptography.hazmat.backends import default_backend
+import itertools
 from hashlib import sha256
 from mmgen.common import *
 
@@ -104,6 +105,8 @@ def decrypt_data(enc_data,key,iv=g.aesctr_dfl_iv,desc='data'):
 	encryptor = c.encryptor()
 	return encryptor.update(enc_data) + encryptor.finalize()
 
+scrypt_key_cache = {} # hashes computed in advance by precompute_scrypt_hashes()
+
 def scrypt_hash_passphrase(passwd,salt,hash_preset,buflen=32):
 
 	# Buflen arg is for brainwallets only, which use this function to generate
@@ -111,6 +114,9 @@ def scrypt_hash_passphrase(passwd,salt,hash_preset,buflen=32):
 	N,r,p = get_hash_params(hash_preset)
 	if type(passwd) == str: passwd = passwd.encode()
 
+	if (passwd,salt,hash_preset,buflen) in scrypt_key_cache:
+		return scrypt_key_cache.pop((passwd,salt,hash_preset,buflen))
+
 	try:
 		assert not g.use_standalone_scrypt_module
 		from hashlib import scrypt # Python >= v3.6
@@ -119,6 +125,41 @@ def scrypt_hash_passphrase(passwd,salt,hash_preset,buflen=32):
 		import scrypt
 		return scrypt.hash(passwd,salt,2**N,r,p,buflen=buflen)
 
+def _scrypt_hash_params(params):
+	try:
+		return scrypt_hash_passphrase(*params)
+	except Exception: # leave the error to the serial computation
+		return None
+
+def precompute_scrypt_hashes(params,mem_budget,jobs=None):
+	"""
+	Compute the scrypt hashes for the (passwd,salt,hash_preset) tuples in 'params' in parallel,
+	running as many at a time as fit in 'mem_budget' bytes.  Each result is then returned, once,
+	by scrypt_hash_passphrase() in place of a fresh computation.  Failed computations are left
+	to the caller's serial pass, which reports the error.  Return the number of hashes computed,
+	or 0 if there's no room for more than one computation at a time, in which case the caller
+	computes the hashes serially as usual.  Callers should clear 'scrypt_key_cache' when done.
+	"""
+	params = sorted({(p.encode() if type(p) == str else p,s,hp) for p,s,hp in params})
+	if len(params) < 2:
+		return 0
+	mem = max(128 * get_hash_params(hp)[1] * 2**get_hash_params(hp)[0] for p,s,hp in params)
+	cpus = jobs or os.cpu_count() or 1
+	jobs = min(len(params),cpus,mem_budget // mem)
+	if jobs < 2:
+		qmsg('Not enough {} for parallel key derivation ({} MB needed per job), continuing serially'.format(
+			('memory','CPUs')[cpus < 2],-(-mem // 1024**2)))
+		return 0
+	if not get_mp_jobs(jobs):
+		return 0
+	vmsg('Computing {} scrypt hashes in {} parallel processes'.format(len(params),jobs))
+	n = 0
+	for key,k in zip(mp_imap(_scrypt_hash_params,params,jobs),params):
+		if key is not None:
+			scrypt_key_cache[k+(32,)] = key
+			n += 1
+	return n
+
 def make_key(passwd,salt,hash_preset,desc='encryption key',from_what='passphrase',verbose=False):
 	if from_what: desc += ' from '
 	if opt.verbose or verbose:
@@ -182,7 +223,8 @@ def get_hash_preset_from_user(hp=g.hash_preset,desc='data'):
 
 _salt_len,_sha256_len,_nonce_len = 32,32,32
 
-def mmgen_encrypt(data,desc='data',hash_preset=''):
+def get_mmgen_encrypt_params(desc='data',hash_preset=''):
+	"get salt, IV, nonce and key (prompting the user for passphrase) for mmgen_encrypt*()"
 	salt  = get_random(_salt_len)
 	iv    = get_random(g.aesctr_iv_len)
 	nonce = get_random(_nonce_len)
@@ -193,28 +235,210 @@ def mmgen_encrypt(data,desc='data',hash_preset=''):
 	qmsg("Using {} hash preset of '{}'".format(m,hp))
 	passwd = get_new_passphrase(desc,{})
 	key    = make_key(passwd,salt,hp)
+	return salt,iv,nonce,key
+
+def mmgen_encrypt(data,desc='data',hash_preset=''):
+	salt,iv,nonce,key = get_mmgen_encrypt_params(desc,hash_preset)
 	enc_d  = encrypt_data(sha256(nonce+data).digest() + nonce + data, key, iv, desc=desc)
 	return salt+iv+enc_d
 
-def mmgen_decrypt(data,desc='data',hash_preset=''):
-	vmsg('Preparing to decrypt {}'.format(desc))
+def mmgen_encrypt_stream(get_chunks,params,desc='data'):
+	"""
+	Streaming version of mmgen_encrypt(), yielding the encrypted data in chunks.  'get_chunks'
+	must return a new iterator over the plaintext chunks each time it's called, since the data
+	is hashed in a first pass.  Output is identical to that of mmgen_encrypt() for the same
+	parameters.
+	"""
+	salt,iv,nonce,key = params
+	h = sha256(nonce)
+	for chunk in get_chunks():
+		h.update(chunk)
+	vmsg('Encrypting {}'.format(desc))
+	c = Cipher(algorithms.AES(key),modes.CTR(iv),backend=default_backend())
+	encryptor,decryptor = c.encryptor(),c.decryptor()
+	yield salt + iv
+	for chunk in itertools.chain((h.digest()+nonce,),get_chunks()):
+		enc_chunk = encryptor.update(chunk)
+		if decryptor.update(enc_chunk) != chunk: # test decryption
+			die(2,"ERROR.\nDecrypted {s} doesn't match original {s}".format(s=desc))
+		yield enc_chunk
+	yield encryptor.finalize()
+
+class EncryptedSpool(object):
+	"""
+	Anonymous temporary file for staging large amounts of sensitive data.  The data is
+	encrypted with a random key that exists only in memory, so it's never written to
+	disk in the clear.
+	"""
+	read_chunk_size = 65536
+
+	def __init__(self):
+		import tempfile
+		self.f = tempfile.TemporaryFile()
+		self.key = os.urandom(32)
+		self.encryptor = self.make_cipher().encryptor()
+		self.size = 0
+
+	def make_cipher(self):
+		return Cipher(algorithms.AES(self.key),modes.CTR(g.aesctr_dfl_iv),backend=default_backend())
+
+	def write(self,data):
+		self.f.write(self.encryptor.update(data))
+		self.size += len(data)
+
+	def read_chunks(self):
+		"return an iterator over the spooled data.  May be called repeatedly"
+		self.f.flush()
+		self.f.seek(0)
+		decryptor = self.make_cipher().decryptor()
+		while True:
+			d = self.f.read(self.read_chunk_size)
+			if not d: break
+			yield decryptor.update(d)
+
+	def close(self):
+		self.f.close()
+
+# Chunked format, for data of any size:
+#   header: salt, IV and the chunk size (4 bytes, masked with a value derived from the key),
+#           followed by an HMAC-SHA256 tag over the header, which serves as a passphrase check
+#   body:   AES-CTR ciphertext in chunks of 'chunk size' bytes (the last may be shorter or empty),
+#           each followed by an HMAC-SHA256 tag over the header, the chunk number, a final-chunk
+#           flag and the chunk's ciphertext
+# Encryption and authentication keys are derived from the scrypt-hashed passphrase.  Chunks
+# are authenticated before they're output, and the final-chunk flag reveals truncation.
+# There's no magic number, so that encrypted data remains indistinguishable from random data:
+# the format is instead recognized by the header tag once the key has been computed, with
+# the original format (which uses the same salt and key) as the fallback.
+_chunked_hdr_len = _salt_len + g.aesctr_iv_len + 4
+_mac_len = 32
+mmenc_chunk_size = 1 << 20
+
+def _chunked_keys(key):
+	"return the encryption key, authentication key and chunk size mask"
+	import hmac
+	return (hmac.new(key,b'encrypt',sha256).digest(),
+			hmac.new(key,b'authenticate',sha256).digest(),
+			hmac.new(key,b'chunk size',sha256).digest()[:4])
+
+def _mask(a,b):
+	return bytes(i^j for i,j in zip(a,b))
+
+def _hdr_mac(mac_key,hdr):
+	import hmac
+	return hmac.new(mac_key,b'header:'+hdr,sha256).digest()
+
+def _chunk_mac(mac_key,hdr,n,final,enc_chunk):
+	import hmac
+	h = hmac.new(mac_key,hdr,sha256)
+	h.update(n.to_bytes(8,'big') + bytes([final]))
+	h.update(enc_chunk)
+	return h.digest()
+
+def mmgen_encrypt_chunked(data,desc='data',hash_preset='',chunk_size=mmenc_chunk_size):
+	"""
+	Encrypt 'data', which may be bytes or any buffer such as an mmap object, in the chunked
+	format.  The passphrase is requested immediately, and an iterator over the encrypted data
+	is returned, so that memory use is independent of the data size.
+	"""
+	salt,iv,nonce,key = get_mmgen_encrypt_params(desc,hash_preset)
+	enc_key,mac_key,size_mask = _chunked_keys(key)
+	hdr = salt + iv + _mask(chunk_size.to_bytes(4,'big'),size_mask)
+
+	def gen_chunks():
+		yield hdr + _hdr_mac(mac_key,hdr)
+		encryptor = Cipher(algorithms.AES(enc_key),modes.CTR(iv),backend=default_backend()).encryptor()
+		size = len(data)
+		for n,pos in enumerate(range(0,size or 1,chunk_size)): # empty data makes one empty chunk
+			enc_chunk = encryptor.update(data[pos:pos+chunk_size])
+			yield enc_chunk + _chunk_mac(mac_key,hdr,n,pos+chunk_size >= size,enc_chunk)
+
+	return gen_chunks()
+
+def _decrypt_unchunked(data,key,desc):
+	"""
+	Decrypt 'data' in the original format, checking its hash in a first pass, so that the
+	decrypted data needn't be held in memory.  Return an iterator over the decrypted data, or
+	False if the hash doesn't match.
+	"""
 	dstart = _salt_len + g.aesctr_iv_len
-	salt   = data[:_salt_len]
-	iv     = data[_salt_len:dstart]
-	enc_d  = data[dstart:]
-	hp     = hash_preset or (
+	if len(data) < dstart + _sha256_len + _nonce_len:
+		return False
+	iv = bytes(data[_salt_len:dstart])
+
+	def decrypt_chunks(): # the first chunk holds the whole hash and nonce
+		decryptor = Cipher(algorithms.AES(key),modes.CTR(iv),backend=default_backend()).decryptor()
+		for pos in range(dstart,len(data),mmenc_chunk_size):
+			yield decryptor.update(data[pos:pos+mmenc_chunk_size])
+
+	vmsg_r('Decrypting {} with key...'.format(desc))
+	h = sha256()
+	for n,d in enumerate(decrypt_chunks()):
+		if n == 0:
+			chksum,d = d[:_sha256_len],d[_sha256_len:]
+		h.update(d)
+	if h.digest() != chksum:
+		return False
+
+	def gen_chunks():
+		for n,d in enumerate(decrypt_chunks()):
+			yield d[_sha256_len+_nonce_len:] if n == 0 else d
+
+	return gen_chunks()
+
+def mmgen_decrypt_chunked(data,desc='data',hash_preset=''):
+	"""
+	Decrypt 'data', which may be bytes or a buffer, in either the chunked or the original
+	format.  Return an iterator over the decrypted data, or False if the passphrase or hash
+	preset is incorrect.  Chunked data of the wrong length is rejected before any data is
+	output, and authentication failure of a chunk is fatal, so consumers of the iterator
+	must discard any output on error.
+	"""
+	vmsg('Preparing to decrypt {}'.format(desc))
+	hp = hash_preset or (
 		opt.hash_preset if 'hash_preset' in opt.set_by_user else get_hash_preset_from_user('3',desc))
 	m  = ('user-requested','default')[hp=='3']
 	qmsg("Using {} hash preset of '{}'".format(m,hp))
 	passwd = get_mmgen_passphrase(desc)
-	key    = make_key(passwd,salt,hp)
-	dec_d  = decrypt_data(enc_d,key,iv,desc)
-	if dec_d[:_sha256_len] == sha256(dec_d[_sha256_len:]).digest():
+	key = make_key(passwd,bytes(data[:_salt_len]),hp)
+
+	hl = _chunked_hdr_len
+	hdr = bytes(data[:hl])
+	enc_key,mac_key,size_mask = _chunked_keys(key)
+	if len(data) < hl + _mac_len or _hdr_mac(mac_key,hdr) != bytes(data[hl:hl+_mac_len]):
+		ret = _decrypt_unchunked(data,key,desc)
+		if ret: vmsg('OK')
+		else: msg('Incorrect passphrase or hash preset')
+		return ret
+
+	chunk_size = int.from_bytes(_mask(hdr[-4:],size_mask),'big')
+	if not chunk_size:
+		die(2,'Encrypted {} has an invalid header'.format(desc))
+	iv = hdr[_salt_len:_salt_len+g.aesctr_iv_len]
+
+	# every chunk but the last is full-size, and the last has at least its tag
+	body_len = len(data) - hl - _mac_len
+	rec_len = chunk_size + _mac_len
+	nchunks = max(1,-(-body_len // rec_len))
+	if body_len - (nchunks-1) * rec_len < _mac_len:
+		die(2,'Encrypted {} has been truncated or extended'.format(desc))
+
+	def gen_chunks():
+		decryptor = Cipher(algorithms.AES(enc_key),modes.CTR(iv),backend=default_backend()).decryptor()
+		for n in range(nchunks):
+			pos = hl + _mac_len + n * rec_len
+			rec = data[pos:pos+rec_len]
+			enc_chunk = rec[:-_mac_len]
+			if _chunk_mac(mac_key,hdr,n,n == nchunks-1,enc_chunk) != rec[-_mac_len:]:
+				die(2,'Encrypted {} failed authentication at chunk {}: data is corrupted, truncated or extended'.format(desc,n))
+			yield decryptor.update(enc_chunk)
 		vmsg('OK')
-		return dec_d[_sha256_len+_nonce_len:]
-	else:
-		msg('Incorrect passphrase or hash preset')
-		return False
+
+	return gen_chunks()
+
+def mmgen_decrypt(data,desc='data',hash_preset=''):
+	ret = mmgen_decrypt_chunked(data,desc,hash_preset)
+	return ret and b''.join(ret)
 
 def mmgen_decrypt_retry(d,desc='data'):
 	while True:
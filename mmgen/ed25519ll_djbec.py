@@ -24,16 +24,8 @@
 
 q = 2**255 - 19
 
-def expmod(b,e,m):
-	if e == 0: return 1
-	t = expmod(b,e//2,m)**2 % m
-	if e & 1: t = (t*b) % m
-	return t
-
-# Can probably get some extra speedup here by replacing this with
-# an extended-euclidean, but performance seems OK without that
 def inv(x):
-	return expmod(x,q-2,q)
+	return pow(x,q-2,q)
 
 # Faster (!) version based on:
 # http://www.hyperelliptic.org/EFD/g1p/auto-twisted-extended-1.html
@@ -87,3 +79,84 @@ def xpt_mult (pt, n):
 
 def scalarmult(pt, e):
 	return pt_unxform(xpt_mult(pt_xform(pt), e))
+
+# Fixed-base scalar multiplication (MMGen addition):
+#   The multiples j*16**i*B of the base point B (1 <= j <= 15, 0 <= i < 64) are precomputed
+#   once per process, after which n*B is the sum of one table entry per nonzero hex digit of n,
+#   with no doublings.  Entries are stored in affine form as (y+x, y-x, 2*d*x*y), for use with
+#   the mixed addition formula madd-2008-hwcd-3, which, unlike xpt_add() above, is complete.
+
+l  = 2**252 + 27742317777372353535851937790883648493 # order of B
+d2 = 2 * -121665 * inv(121666) % q
+Bpt = ( 15112221349535400772501151409588531511454012693041857206046113283949847762202,
+		46316835694926478169428394003475163141307993866256225615783033603165251855960 )
+
+table_rows,table_cols = 64,15
+
+def xpt_add_complete(pt1, pt2): # add-2008-hwcd-3
+	(X1, Y1, Z1, T1) = pt1
+	(X2, Y2, Z2, T2) = pt2
+	A = ((Y1-X1)*(Y2-X2)) % q
+	B = ((Y1+X1)*(Y2+X2)) % q
+	C = (T1*d2*T2) % q
+	D = (Z1*2*Z2) % q
+	E = (B-A) % q
+	F = (D-C) % q
+	G = (D+C) % q
+	H = (B+A) % q
+	return ((E*F) % q, (G*H) % q, (F*G) % q, (E*H) % q)
+
+def xpt_madd(pt, ne): # madd-2008-hwcd-3
+	(X1, Y1, Z1, T1) = pt
+	(ypx2, ymx2, xy2d2) = ne
+	A = ((Y1-X1)*ymx2) % q
+	B = ((Y1+X1)*ypx2) % q
+	C = (T1*xy2d2) % q
+	D = (2*Z1) % q
+	E = (B-A) % q
+	F = (D-C) % q
+	G = (D+C) % q
+	H = (B+A) % q
+	return ((E*F) % q, (G*H) % q, (F*G) % q, (E*H) % q)
+
+def batch_inv(xs): # Montgomery's trick: a single modular inversion for the whole list
+	acc,prods = 1,[]
+	for x in xs:
+		prods.append(acc)
+		acc = (acc*x) % q
+	acc = inv(acc)
+	ret = [0] * len(xs)
+	for n in range(len(xs)-1,-1,-1):
+		ret[n] = (acc*prods[n]) % q
+		acc = (acc*xs[n]) % q
+	return ret
+
+def make_base_table():
+	pts = []
+	P = pt_xform(Bpt)
+	for i in range(table_rows):
+		Q = P
+		for j in range(table_cols):
+			pts.append(Q) # (j+1) * 16**i * B
+			Q = xpt_add_complete(Q, P)
+		P = Q
+	ret = []
+	for (X, Y, Z, _),zi in zip(pts,batch_inv([pt[2] for pt in pts])):
+		x,y = (X*zi) % q, (Y*zi) % q
+		ret.append(((y+x) % q, (y-x) % q, (d2*x*y) % q))
+	return [ret[i*table_cols:(i+1)*table_cols] for i in range(table_rows)]
+
+base_table = None
+
+def scalarmult_base(e):
+	"return e*B in affine coordinates, using the precomputed table (built on first call)"
+	global base_table
+	if base_table is None:
+		base_table = make_base_table()
+	e %= l
+	pt = (0, 1, 1, 0) # identity
+	for row in base_table:
+		if e & 15:
+			pt = xpt_madd(pt, row[(e & 15) - 1])
+		e >>= 4
+	return pt_unxform(pt)
@@ -53,6 +53,10 @@ class g(object):
 	stderr = sys.stderr
 
 	http_timeout = 60
+	rpc_max_concurrency = 8 # maximum number of concurrent requests for parallel RPC calls
+	rpc_batch_chunk_size = 1000 # maximum number of requests sent in one batch RPC call
+	rpc_cache_check_interval = 5 # seconds between checks of the best block hash by the RPC cache
+	rpc_cache_persist = False # save cached RPC responses to the data dir for use by later commands
 
 	# Variables - these might be altered at runtime:
 
@@ -145,7 +149,7 @@ class g(object):
 		'quiet','verbose','debug','outdir','echo_passphrase','passwd_file','stdout',
 		'show_hash_presets','label','keep_passphrase','keep_hash_preset','yes',
 		'brain_params','b16','usr_randchars','coin','bob','alice','key_generator',
-		'hidden_incog_input_params','in_fmt'
+		'hidden_incog_input_params','in_fmt','jobs'
 	)
 	incompatible_opts = (
 		('base32','hex'), # mmgen-passgen
@@ -157,12 +161,13 @@ class g(object):
 		('batch','rescan') # still incompatible as of Core 0.15.0
 	)
 	cfg_file_opts = (
-		'color','debug','hash_preset','http_timeout','no_license','rpc_host','rpc_port',
+		'color','debug','hash_preset','http_timeout','rpc_max_concurrency','rpc_batch_chunk_size','rpc_cache_check_interval','rpc_cache_persist','no_license','rpc_host','rpc_port',
 		'quiet','tx_fee_adj','usr_randchars','testnet','rpc_user','rpc_password',
 		'daemon_data_dir','force_256_color','regtest','subseeds',
 		'btc_max_tx_fee','ltc_max_tx_fee','bch_max_tx_fee','eth_max_tx_fee',
 		'eth_mainnet_chain_name','eth_testnet_chain_name',
-		'max_tx_file_size','max_input_size','mswin_pw_warning'
+		'max_tx_file_size','max_input_size','mswin_pw_warning',
+		'chain_ckpt_interval','chain_ckpt_max_per_seed','chain_ckpt_max_size'
 	)
 	# Supported environmental vars
 	# The corresponding vars (lowercase, minus 'mmgen_') must be initialized in g
@@ -209,13 +214,17 @@ class g(object):
 	scramble_hash_rounds = 10
 	subseeds = 100
 
+	chain_ckpt_interval     = 0 # seed chain checkpoint cache is disabled by default
+	chain_ckpt_max_per_seed = 1000
+	chain_ckpt_max_size     = 1024 * 1024
+
 	mmenc_ext      = 'mmenc'
 	salt_len       = 16
 	aesctr_iv_len  = 16
 	aesctr_dfl_iv  = b'\x00' * (aesctr_iv_len-1) + b'\x01'
 	hincog_chk_len = 8
 
-	key_generators = 'python-ecdsa','secp256k1' # '1','2'
+	key_generators = 'python-ecdsa','secp256k1','python-fixedbase' # '1','2','3'
 	key_generator  = 2 # secp256k1 is default
 
 	use_standalone_scrypt_module = False
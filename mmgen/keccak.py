@@ -10,6 +10,7 @@ from math import log
 from operator import xor
 from copy import deepcopy
 from functools import reduce
+from struct import Struct
 
 # The Keccak-f round constants.
 RoundConstants = [
@@ -98,12 +99,136 @@ def keccak_f(state):
 		# iota
 		A[0][0] ^= RC
 
+	if state.lanew == 64: # Keccak-f[1600]: use the fast implementation
+		s = state.s
+		A = keccak_f1600([s[x][y] for y in range(5) for x in range(5)])
+		for y in range(5):
+			for x in range(5):
+				s[x][y] = A[x+5*y]
+		return
+
 	l = int(log(state.lanew, 2))
 	nr = 12 + 2 * l
 
 	for ir in range(nr):
 		round(state.s, RoundConstants[ir])
 
+def keccak_f1600(A):
+	"""
+	Keccak-f[1600] permutation of the flat 25-lane state A, where lane (x,y) is A[x+5*y].
+	The round function is unrolled, with rotation offsets and lane positions precomputed.
+	Returns the permuted state as a new list.
+	"""
+	M = 0xffffffffffffffff
+	a0,a1,a2,a3,a4,a5,a6,a7,a8,a9,a10,a11,a12,a13,a14,a15,a16,a17,a18,a19,a20,a21,a22,a23,a24 = A
+	for rc in RoundConstants:
+		# theta
+		c0 = a0 ^ a5 ^ a10 ^ a15 ^ a20
+		c1 = a1 ^ a6 ^ a11 ^ a16 ^ a21
+		c2 = a2 ^ a7 ^ a12 ^ a17 ^ a22
+		c3 = a3 ^ a8 ^ a13 ^ a18 ^ a23
+		c4 = a4 ^ a9 ^ a14 ^ a19 ^ a24
+		d0 = c4 ^ ((c1 << 1 | c1 >> 63) & M)
+		d1 = c0 ^ ((c2 << 1 | c2 >> 63) & M)
+		d2 = c1 ^ ((c3 << 1 | c3 >> 63) & M)
+		d3 = c2 ^ ((c4 << 1 | c4 >> 63) & M)
+		d4 = c3 ^ ((c0 << 1 | c0 >> 63) & M)
+		# rho and pi
+		b0 = a0 ^ d0
+		t = a5 ^ d0
+		b16 = (t << 36 | t >> 28) & M
+		t = a10 ^ d0
+		b7 = (t << 3 | t >> 61) & M
+		t = a15 ^ d0
+		b23 = (t << 41 | t >> 23) & M
+		t = a20 ^ d0
+		b14 = (t << 18 | t >> 46) & M
+		t = a1 ^ d1
+		b10 = (t << 1 | t >> 63) & M
+		t = a6 ^ d1
+		b1 = (t << 44 | t >> 20) & M
+		t = a11 ^ d1
+		b17 = (t << 10 | t >> 54) & M
+		t = a16 ^ d1
+		b8 = (t << 45 | t >> 19) & M
+		t = a21 ^ d1
+		b24 = (t << 2 | t >> 62) & M
+		t = a2 ^ d2
+		b20 = (t << 62 | t >> 2) & M
+		t = a7 ^ d2
+		b11 = (t << 6 | t >> 58) & M
+		t = a12 ^ d2
+		b2 = (t << 43 | t >> 21) & M
+		t = a17 ^ d2
+		b18 = (t << 15 | t >> 49) & M
+		t = a22 ^ d2
+		b9 = (t << 61 | t >> 3) & M
+		t = a3 ^ d3
+		b5 = (t << 28 | t >> 36) & M
+		t = a8 ^ d3
+		b21 = (t << 55 | t >> 9) & M
+		t = a13 ^ d3
+		b12 = (t << 25 | t >> 39) & M
+		t = a18 ^ d3
+		b3 = (t << 21 | t >> 43) & M
+		t = a23 ^ d3
+		b19 = (t << 56 | t >> 8) & M
+		t = a4 ^ d4
+		b15 = (t << 27 | t >> 37) & M
+		t = a9 ^ d4
+		b6 = (t << 20 | t >> 44) & M
+		t = a14 ^ d4
+		b22 = (t << 39 | t >> 25) & M
+		t = a19 ^ d4
+		b13 = (t << 8 | t >> 56) & M
+		t = a24 ^ d4
+		b4 = (t << 14 | t >> 50) & M
+		# chi and iota
+		a0 = b0 ^ (~b1 & b2) ^ rc
+		a1 = b1 ^ (~b2 & b3)
+		a2 = b2 ^ (~b3 & b4)
+		a3 = b3 ^ (~b4 & b0)
+		a4 = b4 ^ (~b0 & b1)
+		a5 = b5 ^ (~b6 & b7)
+		a6 = b6 ^ (~b7 & b8)
+		a7 = b7 ^ (~b8 & b9)
+		a8 = b8 ^ (~b9 & b5)
+		a9 = b9 ^ (~b5 & b6)
+		a10 = b10 ^ (~b11 & b12)
+		a11 = b11 ^ (~b12 & b13)
+		a12 = b12 ^ (~b13 & b14)
+		a13 = b13 ^ (~b14 & b10)
+		a14 = b14 ^ (~b10 & b11)
+		a15 = b15 ^ (~b16 & b17)
+		a16 = b16 ^ (~b17 & b18)
+		a17 = b17 ^ (~b18 & b19)
+		a18 = b18 ^ (~b19 & b15)
+		a19 = b19 ^ (~b15 & b16)
+		a20 = b20 ^ (~b21 & b22)
+		a21 = b21 ^ (~b22 & b23)
+		a22 = b22 ^ (~b23 & b24)
+		a23 = b23 ^ (~b24 & b20)
+		a24 = b24 ^ (~b20 & b21)
+	return [a0,a1,a2,a3,a4,a5,a6,a7,a8,a9,a10,a11,a12,a13,a14,a15,a16,a17,a18,a19,a20,a21,a22,a23,a24]
+
+def keccak_256_many(msgs):
+	"""
+	Batch entry point: return a list of the keccak-256 digests of the byte strings in
+	'msgs'.  Messages are absorbed directly into flat lane lists, bypassing the sponge
+	objects.
+	"""
+	rate = 136
+	unpack_block,pack_digest = Struct('<17Q').unpack,Struct('<4Q').pack
+	ret = []
+	for m in msgs:
+		padlen = rate - len(m) % rate
+		m = bytes(m) + (b'\x81' if padlen == 1 else b'\x01' + bytes(padlen-2) + b'\x80')
+		A = [0] * 25
+		for i in range(0,len(m),rate):
+			A = keccak_f1600([a ^ b for a,b in zip(A,unpack_block(m[i:i+rate]))] + A[17:])
+		ret.append(pack_digest(*A[:4]))
+	return ret
+
 class KeccakState(object):
 	"""
 	A keccak state container.
@@ -34,7 +34,7 @@ if g.prog_name == 'mmgen-keygen':
 else:
 	gen_what = 'addresses'
 	gen_desc = 'addresses'
-	opt_filter = 'hbcdeEiHOkKlpzPqrStUv-'
+	opt_filter = 'hbcdeEiHOjkKlpzPqrsStUv-'
 	note_addrkey = ''
 
 opts_data = {
@@ -58,6 +58,7 @@ opts_data = {
 -H, --hidden-incog-input-params=f,o  Read hidden incognito data from file
                       'f' at offset 'o' (comma-separated)
 -O, --old-incog-fmt   Specify old-format incognito input
+-j, --jobs=        n  Derive keys and {what} in 'n' parallel worker processes
 -k, --use-internal-keccak-module Force use of the internal keccak module
 -K, --key-generator=m Use method 'm' for public key generation
                       Options: {kgs} (default: {kg})
@@ -71,6 +72,8 @@ opts_data = {
 -q, --quiet           Produce quieter output; suppress some warnings
 -r, --usr-randchars=n Get 'n' characters of additional randomness from user
                       (min={g.min_urandchars}, max={g.max_urandchars}, default={g.usr_randchars})
+-s, --stream          Generate, checksum and write {what} in a single pass,
+                      with constant memory use (for very large ranges)
 -S, --stdout          Print {what} to stdout
 -t, --type=t          Choose address type. Options: see ADDRESS TYPES below
                       (default: {dmat})
@@ -144,7 +147,7 @@ ss = SeedSource(sf)
 ss_seed = ss.seed if opt.subwallet is None else ss.seed.subseed(opt.subwallet,print_msg=True)
 
 i = (gen_what=='addresses') or bool(opt.no_addresses)*2
-al = (KeyAddrList,AddrList,KeyList)[i](seed=ss_seed,addr_idxs=idxs,mmtype=addr_type)
+al = (KeyAddrList,AddrList,KeyList)[i](seed=ss_seed,addr_idxs=idxs,mmtype=addr_type,stream=opt.stream)
 al.format()
 
 if al.gen_addrs and opt.print_checksum:
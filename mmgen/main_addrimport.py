@@ -56,6 +56,8 @@ opts_data = {
 --, --longhelp     Print help message for long options (common options)
 -a, --address=a    Import the single coin address 'a'
 -b, --batch        Import all addresses in one RPC call
+-j, --jobs=n       Verify the keys of a key-address file in 'n' parallel
+                   worker processes
 -l, --addrlist     Address source is a flat list of non-MMGen coin addresses
 -k, --keyaddr-file Address source is a key-address file
 -q, --quiet        Suppress warnings
@@ -180,7 +182,11 @@ for n,e in enumerate(al.data):
 		msg(' - OK')
 
 if opt.batch:
-	ret = tw.batch_import_address(arg_list)
+	def progress(n,total):
+		msg_r('\rImporting addresses: {}/{}'.format(n,total))
+	ret = tw.batch_import_address(arg_list,progress=progress)
+	if len(arg_list) > g.rpc_batch_chunk_size: # progress was displayed
+		msg('')
 	msg('OK: {} addresses imported'.format(len(ret)))
 
 tw.write()
@@ -28,6 +28,7 @@ tx_dir       = '/mnt/tx/tx'
 part_label   = 'MMGEN_TX'
 wallet_dir   = '/dev/shm/autosign'
 key_fn       = 'autosign.key'
+unlock_mem_dfl = 256
 
 from mmgen.common import *
 prog_name = os.path.basename(sys.argv[0])
@@ -40,6 +41,8 @@ opts_data = {
 --, --longhelp      Print help message for long options (common options)
 -c, --coins=c       Coins to sign for (comma-separated list)
 -I, --no-insert-check Don't check for device insertion
+-L, --cache-lifetime=s Keep decrypted wallets and generated keys in memory for
+                    's' seconds after unlocking (default: 0, don't cache)
 -l, --led           Use status LED to signal standby, busy and error
 -m, --mountpoint=m  Specify an alternate mountpoint (default: '{mp}')
 -s, --stealth-led   Stealth LED mode - signal busy and error only, and only
@@ -47,9 +50,12 @@ opts_data = {
 -S, --full-summary  Print a full summary of each signed transaction after
                     each autosign run. The default list of non-MMGen outputs
                     will not be printed.
+-u, --unlock-mem=m  Unlock multiple wallets in parallel, using up to 'm' MB
+                    of memory for key derivation (default: {um}, 0 to unlock
+                    serially)
 -q, --quiet         Produce quieter output
 -v, --verbose       Produce more verbose output
-""".format(mp=mountpoint),
+""".format(mp=mountpoint,um=unlock_mem_dfl),
 	'notes': """
 
                               COMMANDS
@@ -96,20 +102,30 @@ wallet using the -P (--passwd-file) option:
 
 Note that the hash preset must be '1'.  Multiple wallets are permissible.
 
+Subseeds of the first wallet are scanned as needed, and the results are saved
+in an encrypted index in the wallet directory, so that subsequent signing
+sessions needn't rescan them.
+
 For good security, it's advisable to re-generate a new wallet and key for
 each signing session.
 
+In 'wait' mode, the --cache-lifetime option spares repeat insertions the
+expense of unlocking the wallets and generating keys.  The cache is discarded
+when it expires or when the wallet files or key change.  A device's key is
+still checked against the one that unlocked the wallets.
+
 This command is currently available only on Linux-based platforms.
 """.format(pnm=prog_name,wd=wallet_dir,td=tx_dir,kf=key_fn,mp=mountpoint)
 	}
 }
 
-cmd_args = opts.init(opts_data,add_opts=['mmgen_keys_from_file','in_fmt'])
+cmd_args = opts.init(opts_data,add_opts=['mmgen_keys_from_file','in_fmt','subseed_index'])
 
 exit_if_mswin('autosigning')
 
 import mmgen.tx
 import mmgen.altcoins.eth.tx
+import mmgen.txsign
 from mmgen.txsign import txsign
 from mmgen.protocol import CoinProtocol,init_coin
 
@@ -117,6 +133,7 @@ if opt.stealth_led: opt.led = True
 
 if opt.mountpoint: mountpoint = opt.mountpoint # TODO: make global
 opt.outdir = tx_dir = os.path.join(mountpoint,'tx')
+opt.subseed_index = True # subseed indexes are kept in the wallet directory
 
 def check_daemons_running():
 	if opt.coin:
@@ -194,7 +211,7 @@ def sign_tx_file(txfile,signed_txs):
 		if g.proto.sign_mode == 'daemon':
 			rpc_init(reinit=True)
 
-		if txsign(tx,wfs,None,None):
+		if txsign(tx,[],None,None): # wallets were unlocked by decrypt_wallets()
 			tx.write_to_file(ask_write=False)
 			signed_txs.append(tx)
 			return True
@@ -234,22 +251,69 @@ def sign():
 		time.sleep(1)
 		return True
 
+wallet_cache = { 'sig': None, 'expires': 0 }
+
+def get_wallet_sig():
+	"wallet file mtimes plus a hash of the key file, for validating the wallet cache"
+	try: kdata = open(opt.passwd_file,'rb').read()
+	except: return None
+	from hashlib import sha256
+	return (tuple(os.stat(wf).st_mtime_ns for wf in wfs),sha256(kdata).digest())
+
+def clear_wallet_cache():
+	for d in ('saved_seeds','seed_dirs','subseed_indexes'):
+		getattr(mmgen.txsign,d).clear()
+	mmgen.txsign.key_cache = {} if opt.cache_lifetime else None
+	wallet_cache.update(sig=None,expires=0)
+
+def precompute_wallet_keys():
+	"run the wallets' key derivations in parallel, leaving the results for the serial unlock to use"
+	mem = unlock_mem_dfl if opt.unlock_mem == None else int(opt.unlock_mem)
+	from mmgen.seed import Wallet
+	from mmgen.crypto import precompute_scrypt_hashes
+	try: pw = ' '.join(open(opt.passwd_file,'rb').read().decode().split())
+	except: return # the serial unlock will report the error
+	params = [Wallet.get_key_params(wf) for wf in wfs]
+	precompute_scrypt_hashes([(pw,)+p for p in params if p],mem*1024*1024)
+
 def decrypt_wallets():
 	opt.hash_preset = '1'
 	opt.set_by_user = ['hash_preset']
 	opt.passwd_file = os.path.join(tx_dir,key_fn)
 #	opt.passwd_file = '/tmp/key'
+
+	sig = get_wallet_sig()
+	if sig and sig == wallet_cache['sig'] and time.time() < wallet_cache['expires']:
+		msg('Using cached wallet data')
+		return True
+
+	clear_wallet_cache()
 	from mmgen.seed import SeedSource
 	msg("Unlocking wallet{} with key from '{}'".format(suf(wfs),opt.passwd_file))
+	from mmgen.crypto import scrypt_key_cache
 	fails = 0
-	for wf in wfs:
-		try:
-			SeedSource(wf)
-		except SystemExit as e:
-			if e.code != 0:
-				fails += 1
+	try:
+		if len(wfs) > 1:
+			precompute_wallet_keys()
+		for wf in wfs:
+			try:
+				seed = SeedSource(wf).seed
+			except SystemExit as e:
+				if e.code != 0:
+					fails += 1
+			else:
+				mmgen.txsign.saved_seeds[seed.sid] = seed
+				mmgen.txsign.seed_dirs[seed.sid] = wallet_dir
+	finally:
+		scrypt_key_cache.clear() # don't leave unused passphrase-derived keys in memory
+
+	if fails:
+		clear_wallet_cache()
+		return False
 
-	return False if fails else True
+	if opt.cache_lifetime:
+		wallet_cache.update(sig=sig,expires=time.time()+int(opt.cache_lifetime))
+	return True
 
 
 def print_summary(signed_txs):
@@ -400,8 +464,11 @@ def do_loop():
 		status = get_insert_status()
 		if status and not prev_status:
 			msg('Device insertion detected')
-			do_sign()
+			if not do_sign():
+				clear_wallet_cache() # don't keep possibly bad wallet data around after a failure
 		prev_status = status
+		if wallet_cache['expires'] and time.time() >= wallet_cache['expires']:
+			clear_wallet_cache() # don't keep unlocked seeds in memory past the cache lifetime
 		if not n % 10:
 			msg_r('\r{}\rWaiting'.format(' '*17))
 			sys.stderr.flush()
@@ -52,6 +52,7 @@ opts_data = {
 -H, --hidden-incog-input-params=f,o  Read hidden incognito data from file
                       'f' at offset 'o' (comma-separated)
 -O, --old-incog-fmt   Specify old-format incognito input
+-j, --jobs=        n  Generate passwords in 'n' parallel worker processes
 -L, --passwd-len=  l  Specify length of generated passwords
                       (default: {d58} chars [base58], {d32} chars [base32],
                       {dhex} chars [hex]).  An argument of 'h' will generate
@@ -66,6 +67,8 @@ opts_data = {
 -q, --quiet           Produce quieter output; suppress some warnings
 -r, --usr-randchars=n Get 'n' characters of additional randomness from user
                       (min={g.min_urandchars}, max={g.max_urandchars}, default={g.usr_randchars})
+-s, --stream          Generate, checksum and write passwords in a single pass,
+                      with constant memory use (for very large ranges)
 -S, --stdout          Print passwords to stdout
 -v, --verbose         Produce more verbose output
 """,
@@ -144,7 +147,8 @@ do_license_msg()
 
 ss = SeedSource(sf)
 
-al = PasswordList(seed=ss.seed,pw_idxs=pw_idxs,pw_id_str=pw_id_str,pw_len=pw_len,pw_fmt=pw_fmt)
+al = PasswordList(seed=ss.seed,pw_idxs=pw_idxs,pw_id_str=pw_id_str,pw_len=pw_len,pw_fmt=pw_fmt,
+					stream=opt.stream)
 
 al.format()
 
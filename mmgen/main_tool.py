@@ -60,6 +60,7 @@ opts_data = {
 		'options': """
 -d, --outdir=       d Specify an alternate directory 'd' for output
 -h, --help            Print this help message
+-j, --jobs=         n Generate subseeds in 'n' parallel worker processes
 --, --longhelp        Print help message for long options (common options)
 -k, --use-internal-keccak-module Force use of the internal keccak module
 -p, --hash-preset= p  Use the scrypt hash parameters defined by preset 'p'
@@ -49,6 +49,8 @@ opts_data = {
 -H, --hidden-incog-input-params=f,o  Read hidden incognito data from file
                       'f' at offset 'o' (comma-separated)
 -i, --in-fmt=        f Input is from wallet format 'f' (see FMT CODES below)
+-j, --jobs=          n Scan for subseeds and verify the keys of key-address
+                       files in 'n' parallel worker processes
 -I, --inputs=        i Specify transaction inputs (comma-separated list of
                        MMGen IDs or coin addresses).  Note that ALL unspent
                        outputs associated with each address will be included.
@@ -76,6 +78,8 @@ opts_data = {
 -u, --subseeds=      n The number of subseed pairs to scan for (default: {ss},
                        maximum: {ss_max}). Only the default or first supplied
                        wallet is scanned for subseeds.
+-U, --subseed-index    Keep an encrypted index of scanned subseeds next to the
+                       scanned wallet, so they needn't be rescanned next time
 -v, --verbose          Produce more verbose output
 -V, --vsize-adj=     f Adjust transaction's estimated vsize by factor 'f'
 -y, --yes              Answer 'yes' to prompts, suppress non-essential output
@@ -60,10 +60,14 @@ opts_data = {
 -P, --passwd-file= f  Get {pnm} wallet or {dn} passphrase from file 'f'
 -q, --quiet           Suppress warnings; overwrite files without prompting
 -I, --info            Display information about the transaction and exit
+-j, --jobs=        n  Scan for subseeds and verify the keys of key-address
+                      files in 'n' parallel worker processes
 -t, --terse-info      Like '--info', but produce more concise output
 -u, --subseeds=     n The number of subseed pairs to scan for (default: {ss},
                       maximum: {ss_max}). Only the default or first supplied
                       wallet is scanned for subseeds.
+-U, --subseed-index   Keep an encrypted index of scanned subseeds next to the
+                      scanned wallet, so they needn't be rescanned next time
 -v, --verbose         Produce more verbose output
 -V, --vsize-adj=   f  Adjust transaction's estimated vsize by factor 'f'
 -y, --yes             Answer 'yes' to prompts, suppress non-essential output
@@ -146,6 +146,17 @@ class InitErrors(object):
 			if errmsg: msg(errmsg)
 			return None                       # TODO: here too?
 
+def _unpickle_str(cls,s,attrs):
+	me = str.__new__(cls,s)
+	me.__dict__.update(attrs)
+	return me
+
+# Instances of these str subclasses were checked on creation, so unpickle them
+# without re-running their constructors (e.g. when returned from a worker process)
+class PicklableStr(object):
+	def __reduce__(self):
+		return (_unpickle_str,(type(self),str.__str__(self),self.__dict__))
+
 class Hilite(object):
 
 	color = 'red'
@@ -473,7 +484,7 @@ class XMRAmt(BTCAmt): min_coin_unit = Decimal('0.000000000001')
 
 from mmgen.altcoins.eth.obj import ETHAmt,ETHNonce
 
-class CoinAddr(str,Hilite,InitErrors,MMGenObject):
+class CoinAddr(str,Hilite,InitErrors,MMGenObject,PicklableStr):
 	color = 'cyan'
 	hex_width = 40
 	width = 1
@@ -650,7 +661,7 @@ class TwLabel(str,InitErrors,MMGenObject):
 		except Exception as e:
 			return cls.init_fail(e,s)
 
-class HexStr(str,Hilite,InitErrors):
+class HexStr(str,Hilite,InitErrors,PicklableStr):
 	color = 'red'
 	width = None
 	hexcase = 'lower'
@@ -676,7 +687,7 @@ class WalletPassword(HexStr): color,width,hexcase = 'blue',32,'lower'
 class MoneroViewKey(HexStr):  color,width,hexcase = 'cyan',64,'lower'
 class MMGenTxID(HexStr):      color,width,hexcase = 'red',6,'upper'
 
-class WifKey(str,Hilite,InitErrors):
+class WifKey(str,Hilite,InitErrors,PicklableStr):
 	width = 53
 	color = 'blue'
 	def __new__(cls,s,on_fail='die'):
@@ -701,7 +712,7 @@ class PubKey(HexStr,MMGenObject): # TODO: add some real checks
 			me.compressed = compressed
 			return me
 
-class PrivKey(str,Hilite,InitErrors,MMGenObject):
+class PrivKey(str,Hilite,InitErrors,MMGenObject,PicklableStr):
 
 	color = 'red'
 	width = 64
@@ -500,6 +500,12 @@ def check_opts(usr_opts):       # Returns false if any check fails
 		elif key == 'vsize_adj':
 			if not opt_is_float(val,desc): return False
 			ymsg('Adjusting transaction vsize by a factor of {:1.2f}'.format(float(val)))
+		elif key == 'jobs':
+			if not opt_is_int(val,desc): return False
+			if not opt_compares(int(val),'>',0,desc): return False
+		elif key in ('cache_lifetime','unlock_mem'):
+			if not opt_is_int(val,desc): return False
+			if not opt_compares(int(val),'>=',0,desc): return False
 		elif key == 'key_generator':
 			if not opt_compares(val,'<=',len(g.key_generators),desc): return False
 			if not opt_compares(val,'>',0,desc): return False
@@ -24,15 +24,21 @@ import sys,os,hashlib
 from mmgen.util import msg,pmsg,ymsg,Msg,pdie,ydie
 from mmgen.obj import MMGenObject,BTCAmt,LTCAmt,BCHAmt,B2XAmt,ETHAmt
 from mmgen.globalvars import g
-import mmgen.bech32 as bech32
+import mmgen.addrcodec as addrcodec
 
-def hash160(hexnum): # take hex, return hex - OP_HASH160
-	return hashlib.new('ripemd160',hashlib.sha256(bytes.fromhex(hexnum)).digest()).hexdigest()
+def hash160_bin(data): # take bytes, return bytes - OP_HASH160
+	return hashlib.new('ripemd160',hashlib.sha256(data).digest()).digest()
 
-def hash256(hexnum): # take hex, return hex - OP_HASH256
-	return hashlib.sha256(hashlib.sha256(bytes.fromhex(hexnum)).digest()).hexdigest()
+def hash256_bin(data): # take bytes, return bytes - OP_HASH256
+	return hashlib.sha256(hashlib.sha256(data).digest()).digest()
 
-_b58a='123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+def hash160(hexnum): # take hex, return hex
+	return hash160_bin(bytes.fromhex(hexnum)).hex()
+
+def hash256(hexnum): # take hex, return hex
+	return hash256_bin(bytes.fromhex(hexnum)).hex()
+
+_b58a = addrcodec.b58a
 
 # From en.bitcoin.it:
 #  The Base58 encoding used is home made, and has some differences.
@@ -41,24 +47,13 @@ _b58a='123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
 # The 'zero address':
 # 1111111111111111111114oLvT2 (pubkeyhash = '\0'*20)
 
+_b58chk_encode_bin = addrcodec.b58chk_encode
+
 def _b58chk_encode(hexstr):
-	lzeroes = (len(hexstr) - len(hexstr.lstrip('0'))) // 2
-	def b58enc(n):
-		while n:
-			yield _b58a[n % 58]
-			n //= 58
-	return ('1' * lzeroes) + ''.join(b58enc(int(hexstr+hash256(hexstr)[:8],16)))[::-1]
+	return addrcodec.b58chk_encode(bytes.fromhex(hexstr))
 
 def _b58chk_decode(s):
-	lzeroes = len(s) - len(s.lstrip('1'))
-	hexstr = '{}{:x}'.format(
-				'00' * lzeroes,
-				sum(_b58a.index(ch) * 58**n for n,ch in enumerate(s[::-1])) )
-	if len(hexstr) % 2: hexstr = '0' + hexstr
-	if hexstr[-8:] != hash256(hexstr[:-8])[:8]:
-		fs = '_b58chk_decode(): {}: incorrect checksum for {!r}, expected {}'
-		raise ValueError(fs.format(hexstr[-8:],hexstr[:-8],hash256(hexstr[:-8])[:8]))
-	return hexstr[:-8]
+	return addrcodec.b58chk_decode(s).hex()
 
 # chainparams.cpp
 class BitcoinProtocol(MMGenObject):
@@ -151,22 +146,24 @@ class BitcoinProtocol(MMGenObject):
 	def verify_addr(cls,addr,hex_width,return_dict=False):
 
 		if 'B' in cls.mmtypes and addr[:len(cls.bech32_hrp)] == cls.bech32_hrp:
-			ret = bech32.decode(cls.bech32_hrp,addr)
+			ret = addrcodec.bech32_decode(cls.bech32_hrp,addr)
 			if ret[0] != cls.witness_vernum:
 				msg('{}: Invalid witness version number'.format(ret[0]))
 			elif ret[1]:
 				return {
-					'hex': bytes(ret[1]).hex(),
+					'hex': ret[1].hex(),
 					'format': 'bech32'
 				} if return_dict else True
 			return False
 
+		addr_hex = None
 		for addr_fmt in cls.addr_ver_num:
 			ver_num,pfx = cls.addr_ver_num[addr_fmt]
 			if type(pfx) == tuple:
 				if addr[0] not in pfx: continue
 			elif addr[:len(pfx)] != pfx: continue
-			addr_hex = _b58chk_decode(addr)
+			if addr_hex is None: # decode only once
+				addr_hex = _b58chk_decode(addr)
 			if addr_hex[:len(ver_num)] != ver_num: continue
 			return {
 				'hex': addr_hex[len(ver_num):],
@@ -179,28 +176,45 @@ class BitcoinProtocol(MMGenObject):
 
 		return False
 
+	# The *_bin() methods take and return bytes, and are used for address generation.
+	# Their hex counterparts are thin wrappers.
+	@classmethod
+	def pubhash2addr_bin(cls,pubkey_hash,p2sh):
+		assert len(pubkey_hash) == 20,'{}: invalid length for pubkey hash'.format(len(pubkey_hash)*2)
+		return _b58chk_encode_bin(bytes.fromhex(cls.addr_ver_num[('p2pkh','p2sh')[p2sh]][0]) + pubkey_hash)
+
 	@classmethod
 	def pubhash2addr(cls,pubkey_hash,p2sh):
 		assert len(pubkey_hash) == 40,'{}: invalid length for pubkey hash'.format(len(pubkey_hash))
-		s = cls.addr_ver_num[('p2pkh','p2sh')[p2sh]][0] + pubkey_hash
-		return _b58chk_encode(s)
+		return cls.pubhash2addr_bin(bytes.fromhex(pubkey_hash),p2sh)
 
 	# Segwit:
 	@classmethod
-	def pubhex2redeem_script(cls,pubhex):
+	def pubkey2redeem_script_bin(cls,pubkey):
 		# https://bitcoincore.org/en/segwit_wallet_dev/
 		# The P2SH redeemScript is always 22 bytes. It starts with a OP_0, followed
 		# by a canonical push of the keyhash (i.e. 0x0014{20-byte keyhash})
-		return cls.witness_vernum_hex + '14' + hash160(pubhex)
+		return bytes([cls.witness_vernum,0x14]) + hash160_bin(pubkey)
+
+	@classmethod
+	def pubhex2redeem_script(cls,pubhex):
+		return cls.pubkey2redeem_script_bin(bytes.fromhex(pubhex)).hex()
+
+	@classmethod
+	def pubkey2segwitaddr_bin(cls,pubkey):
+		return cls.pubhash2addr_bin(hash160_bin(cls.pubkey2redeem_script_bin(pubkey)),p2sh=True)
 
 	@classmethod
 	def pubhex2segwitaddr(cls,pubhex):
-		return cls.pubhash2addr(hash160(cls.pubhex2redeem_script(pubhex)),p2sh=True)
+		return cls.pubkey2segwitaddr_bin(bytes.fromhex(pubhex))
+
+	@classmethod
+	def pubhash2bech32addr_bin(cls,pubhash):
+		return addrcodec.bech32_encode(cls.bech32_hrp,cls.witness_vernum,pubhash)
 
 	@classmethod
 	def pubhash2bech32addr(cls,pubhash):
-		d = list(bytes.fromhex(pubhash))
-		return bech32.bech32_encode(cls.bech32_hrp,[cls.witness_vernum]+bech32.convertbits(d,8,5))
+		return cls.pubhash2bech32addr_bin(bytes.fromhex(pubhash))
 
 class BitcoinTestnetProtocol(BitcoinProtocol):
 	addr_ver_num         = { 'p2pkh': ('6f',('m','n')), 'p2sh':  ('c4','2') }
@@ -227,9 +241,9 @@ class BitcoinCashProtocol(BitcoinProtocol):
 	max_tx_fee      = BCHAmt('0.1')
 
 	@classmethod
-	def pubhex2redeem_script(cls,pubhex): raise NotImplementedError
+	def pubkey2redeem_script_bin(cls,pubkey): raise NotImplementedError
 	@classmethod
-	def pubhex2segwitaddr(cls,pubhex):    raise NotImplementedError
+	def pubkey2segwitaddr_bin(cls,pubkey):    raise NotImplementedError
 
 class BitcoinCashTestnetProtocol(BitcoinCashProtocol):
 	rpc_port      = 18442
@@ -334,6 +348,10 @@ class EthereumProtocol(DummyWIF,BitcoinProtocol):
 		assert not p2sh,'Ethereum has no P2SH address format'
 		return pubkey_hash
 
+	@classmethod
+	def pubhash2addr_bin(cls,pubkey_hash,p2sh):
+		return cls.pubhash2addr(pubkey_hash.hex(),p2sh)
+
 class EthereumTestnetProtocol(EthereumProtocol):
 	data_subdir = 'testnet'
 	rpc_port    = 8547 # start Parity with --jsonrpc-port=8547 or --ports-shift=2
@@ -28,10 +28,120 @@ from decimal import Decimal
 def dmsg_rpc(s):
 	if g.debug_rpc: msg(s)
 
+class RPCJSONEncoder(json.JSONEncoder):
+
+	def __init__(self,rpch):
+		from mmgen.obj import HexStr
+		self.rpch,self.HexStr = rpch,HexStr
+		json.JSONEncoder.__init__(self)
+
+	def default(self,obj):
+		if isinstance(obj,g.proto.coin_amt):
+			# looked up on each call, as coin_amt_type is set only after the daemon version is known
+			return getattr(self.rpch,'coin_amt_type',str)(obj)
+		elif isinstance(obj,self.HexStr):
+			return obj
+		else:
+			return json.JSONEncoder.default(self,obj)
+
+def parse_satoshis(s):
+	"""
+	parse_float hook for json: convert decimal string 's' directly to an integer number of
+	satoshis (1e-8 coin units), bypassing Decimal for the common fixed-point case
+	"""
+	i,dot,f = s.partition('.')
+	if len(f) > 8 or 'e' in s or 'E' in s:
+		d = Decimal(s) * 100000000
+		if d != d.to_integral_value():
+			raise ValueError('{}: amount has more than 8 decimal places'.format(s))
+		return int(d)
+	return int(i + f.ljust(8,'0'))
+
+def iter_json_result(read,parse_float=Decimal,read_size=1<<16):
+	"""
+	Incrementally decode a JSON-RPC reply object, reading it with read(read_size), and yield
+	the elements of its 'result' array one by one, so that the full reply is never held in
+	memory.  Raises RPCFailure on an error reply or invalid or truncated data.
+	"""
+	import codecs
+	dec = json.JSONDecoder(parse_float=parse_float)
+	utf8 = codecs.getincrementaldecoder('utf-8')()
+	ws = ' \t\n\r'
+	buf,pos,eof = '',0,False
+
+	def more():
+		nonlocal buf,pos,eof
+		d = read(read_size)
+		if not d: eof = True
+		buf = buf[pos:] + utf8.decode(d,final=eof)
+		pos = 0
+
+	def peek():
+		nonlocal pos
+		while True:
+			while pos < len(buf) and buf[pos] in ws:
+				pos += 1
+			if pos < len(buf):
+				return buf[pos]
+			if eof:
+				raise RPCFailure('Truncated JSON-RPC reply')
+			more()
+
+	def expect(chars):
+		nonlocal pos
+		ch = peek()
+		if ch not in chars:
+			raise RPCFailure('Invalid JSON-RPC reply: expected {!r} at {!r}'.format(chars,buf[pos:pos+20]))
+		pos += 1
+		return ch
+
+	def value():
+		nonlocal pos
+		while True:
+			peek()
+			try:
+				obj,end = dec.raw_decode(buf,pos)
+			except ValueError:
+				if eof:
+					raise RPCFailure('Invalid JSON-RPC reply: {!r}'.format(buf[pos:pos+20]))
+			else:
+				if end < len(buf) or eof: # a number at the end of the buffer may be incomplete
+					pos = end
+					return obj
+			more()
+
+	expect('{')
+	have_result = False
+	if peek() != '}':
+		while True:
+			key = value()
+			expect(':')
+			if key == 'result' and peek() == '[':
+				have_result = True
+				pos += 1
+				if peek() == ']':
+					pos += 1
+				else:
+					while True:
+						yield value()
+						if expect(',]') == ']': break
+			else:
+				v = value()
+				if key == 'error' and v is not None:
+					raise RPCFailure('{} returned an error: {}'.format(g.proto.daemon_name.capitalize(),v))
+			if expect(',}') == '}': break
+
+	if not have_result:
+		raise RPCFailure('Missing JSON-RPC result array')
+
 class CoinDaemonRPCConnection(object):
 
 	auth = True
 	db_fs = '    host [{h}] port [{p}] user [{u}] passwd [{pw}] auth_cookie [{c}]\n'
+	max_idle_connections = 4
+	# the daemon runs these one at a time under its wallet lock, so chunks of large batch
+	# requests for them are sent one after another rather than concurrently
+	wallet_lock_methods = ('importaddress',)
 
 	def __init__(self,host=None,port=None,user=None,passwd=None,auth_cookie=None):
 
@@ -66,15 +176,89 @@ class CoinDaemonRPCConnection(object):
 
 		self.host = host
 		self.port = port
+		self.pool = [] # idle keep-alive connections
+		self.json_enc = RPCJSONEncoder(self)
+
+		self.http_hdr = { 'Content-Type': 'application/json' }
+		if self.auth:
+			fs = '    RPC AUTHORIZATION data ==> raw: [{}]\n{:>31}enc: [Basic {}]\n'
+			as_enc = base64.b64encode(self.auth_str.encode())
+			dmsg_rpc(fs.format(self.auth_str,'',as_enc))
+			self.http_hdr.update({ 'Host':self.host, 'Authorization':'Basic {}'.format(as_enc.decode()) })
+
+		from mmgen.rpccache import RPCResponseCache
+		self.cache = RPCResponseCache(self)
 
 		for method in self.rpcmethods:
 			exec('{c}.{m} = lambda self,*args,**kwargs: self.request("{m}",*args,**kwargs)'.format(
 						c=type(self).__name__,m=method))
 
+	def get_connection(self,timeout):
+		"return an idle connection from the pool, or a new one, plus a flag indicating reuse"
+		while self.pool:
+			hc = self.pool.pop()
+			if hc.sock: # not closed by a previous request
+				hc.timeout = timeout
+				hc.sock.settimeout(timeout)
+				return hc,True
+		return http.client.HTTPConnection(self.host,self.port,timeout),False
+
+	def put_connection(self,hc,resp):
+		"return a connection to the pool after its response has been read"
+		if resp.will_close or len(self.pool) >= self.max_idle_connections:
+			hc.close()
+		else:
+			self.pool.append(hc)
+
+	def close(self):
+		while self.pool:
+			self.pool.pop().close()
+
+	def run_async(self,func,max_concurrency=None,timeout=None):
+		"run coroutine func(client), where 'client' is an AsyncRPCClient for this connection"
+		import asyncio
+		loop = asyncio.new_event_loop()
+		client = AsyncRPCClient(self,max_concurrency,timeout)
+		try:
+			return loop.run_until_complete(func(client))
+		finally:
+			client.close()
+			loop.close()
+
+	def gather(self,cmd,args_list,max_concurrency=None):
+		"""
+		Call method 'cmd' once for each argument list in 'args_list', running the calls
+		concurrently via AsyncRPCClient, and return the results in input order
+		"""
+		return self.run_async(lambda client: client.gather(cmd,args_list),max_concurrency)
+
+	def stream_result(self,hc,r,parse_float):
+		"yield the elements of the result array of response 'r', then release connection 'hc'"
+		ok = False
+		try:
+			for item in iter_json_result(r.read,parse_float):
+				yield item
+			ok = not r.read()
+		finally: # a partially read response leaves the connection unusable
+			if ok: self.put_connection(hc,r)
+			else:  hc.close()
+
 	# Normal mode: call with arg list unrolled, exactly as with cli
 	# Batch mode:  call with list of arg lists as first argument
 	# kwargs are for local use and are not passed to server
 
+	# Batch requests longer than 'chunk_size' (default: g.rpc_batch_chunk_size) are sent in
+	# chunks, several at a time (one at a time for wallet_lock_methods), with 'progress' (if
+	# supplied) called after each chunk as progress(num_completed,total).  Results are returned
+	# in the original order.
+
+	# With 'stream', a generator is returned that yields the elements of the (array) result
+	# as they're decoded from the socket.  Errors are then raised during iteration regardless
+	# of 'on_fail'.  With 'satoshis', float values in the reply are parsed to integer satoshis.
+
+	# Calls to methods in RPCResponseCache.policies without kwargs are served from self.cache.
+	# Pass nocache=True to bypass it.
+
 	# By default, raises RPCFailure exception with an error msg on all errors and exceptions
 	# on_fail is one of 'raise' (default), 'return' or 'silent'
 	# With on_fail='return', returns 'rpcfail',(resp_object,(die_args))
@@ -83,7 +267,13 @@ class CoinDaemonRPCConnection(object):
 		if g.rpc_fail_on_command == cmd:
 			cmd = 'badcommand_' + cmd
 
-		cf = { 'timeout':g.http_timeout, 'batch':False, 'on_fail':'raise' }
+		if not kwargs and cmd in self.cache.policies:
+			return self.cache.get(cmd,args)
+
+		cf = {
+			'timeout':g.http_timeout, 'batch':False, 'on_fail':'raise',
+			'chunk_size':g.rpc_batch_chunk_size, 'progress':None, 'stream':False, 'satoshis':False,
+			'nocache':False }
 
 		if cf['on_fail'] not in ('raise','return','silent'):
 			raise ValueError("request(): {}: illegal value for 'on_fail'".format(cf['on_fail']))
@@ -91,7 +281,20 @@ class CoinDaemonRPCConnection(object):
 		for k in cf:
 			if k in kwargs and kwargs[k]: cf[k] = kwargs[k]
 
-		hc = http.client.HTTPConnection(self.host,self.port,cf['timeout'])
+		if cf['stream'] and cf['batch']:
+			raise ValueError("request(): 'stream' is not supported for batch requests")
+
+		parse_float = parse_satoshis if cf['satoshis'] else Decimal
+
+		if cf['batch'] and len(args[0]) > cf['chunk_size']:
+			try:
+				return self.run_async(
+					lambda client: client.chunked_batch_request(cmd,args[0],cf['chunk_size'],cf['progress']),
+					max_concurrency = 1 if cmd in self.wallet_lock_methods else None,
+					timeout = cf['timeout'] )
+			except RPCFailure as e:
+				if cf['on_fail'] in ('return','silent'): return 'rpcfail',(None,1,e.args[0])
+				raise
 
 		if cf['batch']:
 			p = [{'method':cmd,'params':r,'id':n,'jsonrpc':'2.0'} for n,r in enumerate(args[0],1)]
@@ -114,35 +317,30 @@ class CoinDaemonRPCConnection(object):
 		dmsg_rpc('=== request() debug ===')
 		dmsg_rpc('    RPC POST data ==> {}\n'.format(p))
 
-		ca_type = self.coin_amt_type if hasattr(self,'coin_amt_type') else str
-		from mmgen.obj import HexStr
-		class MyJSONEncoder(json.JSONEncoder):
-			def default(self,obj):
-				if isinstance(obj,g.proto.coin_amt):
-					return ca_type(obj)
-				elif isinstance(obj,HexStr):
-					return obj
-				else:
-					return json.JSONEncoder.default(self,obj)
+		data = self.json_enc.encode(p)
 
-		http_hdr = { 'Content-Type': 'application/json' }
-		if self.auth:
-			fs = '    RPC AUTHORIZATION data ==> raw: [{}]\n{:>31}enc: [Basic {}]\n'
-			as_enc = base64.b64encode(self.auth_str.encode())
-			dmsg_rpc(fs.format(self.auth_str,'',as_enc))
-			http_hdr.update({ 'Host':self.host, 'Authorization':'Basic {}'.format(as_enc.decode()) })
+		while True:
+			hc,reused = self.get_connection(cf['timeout'])
 
-		try:
-			hc.request('POST','/',json.dumps(p,cls=MyJSONEncoder),http_hdr)
-		except Exception as e:
-			m = '{}\nUnable to connect to {} at {}:{}'
-			return do_fail(None,2,m.format(e.args[0],g.proto.daemon_name,self.host,self.port))
+			try:
+				hc.request('POST','/',data,self.http_hdr)
+			except Exception as e:
+				hc.close()
+				if reused: continue # stale keep-alive connection: retry with a new one
+				m = '{}\nUnable to connect to {} at {}:{}'
+				return do_fail(None,2,m.format(e.args[0],g.proto.daemon_name,self.host,self.port))
 
-		try:
-			r = hc.getresponse() # returns HTTPResponse instance
-		except Exception:
-			m = 'Unable to connect to {} at {}:{} (but port is bound?)'
-			return do_fail(None,2,m.format(g.proto.daemon_name,self.host,self.port))
+			try:
+				r = hc.getresponse() # returns HTTPResponse instance
+			except Exception as e:
+				hc.close()
+				# The daemon may have executed the request, so retry only if a reused connection
+				# was closed without a single byte of response, as when it times out while idle
+				if reused and isinstance(e,http.client.RemoteDisconnected): continue
+				m = 'Unable to connect to {} at {}:{} (but port is bound?)'
+				return do_fail(None,2,m.format(g.proto.daemon_name,self.host,self.port))
+
+			break
 
 		dmsg_rpc('    RPC GETRESPONSE data ==> {}\n'.format(r.__dict__))
 
@@ -151,6 +349,7 @@ class CoinDaemonRPCConnection(object):
 				msg_r(yellow('{} RPC Error: '.format(g.proto.daemon_name.capitalize())))
 				msg(red('{} {}'.format(r.status,r.reason)))
 			e1 = r.read().decode()
+			hc.close()
 			try:
 				e3 = json.loads(e1)['error']
 				e2 = '{} (code {})'.format(e3['message'],e3['code'])
@@ -158,14 +357,18 @@ class CoinDaemonRPCConnection(object):
 				e2 = str(e1)
 			return do_fail(r,1,e2)
 
+		if cf['stream']:
+			return self.stream_result(hc,r,parse_float)
+
 		r2 = r.read().decode()
+		self.put_connection(hc,r)
 
 		dmsg_rpc('    RPC REPLY data ==> {}\n'.format(r2))
 
 		if not r2:
 			return do_fail(r,2,'Empty reply')
 
-		r3 = json.loads(r2,parse_float=Decimal)
+		r3 = json.loads(r2,parse_float=parse_float)
 		ret = []
 
 		for resp in r3 if cf['batch'] else [r3]:
@@ -189,6 +392,7 @@ class CoinDaemonRPCConnection(object):
 		'getaddressesbyaccount',
 		'getaddressesbylabel',
 		'getbalance',
+		'getbestblockhash',
 		'getblock',
 		'getblockchaininfo',
 		'getblockcount',
@@ -258,6 +462,166 @@ class EthereumRPCConnection(CoinDaemonRPCConnection):
 		'parity_versionInfo',
 	)
 
+class AsyncRPCClient(object):
+	"""
+	Asyncio JSON-RPC client for the daemon of connection 'rpch'.  It shares the host, port,
+	HTTP headers, JSON encoder and method table of 'rpch', with each RPC method available as
+	a coroutine.  gather() runs many calls concurrently, and chunked_batch_request() splits a
+	large batch request into chunks and sends those concurrently.  Up to 'max_concurrency'
+	requests (default: g.rpc_max_concurrency) are in flight at a time, each over its own
+	keep-alive connection.  Errors raise RPCFailure.
+	"""
+	class StaleConnection(Exception):
+		"the connection was closed before any of the response arrived"
+
+	def __init__(self,rpch,max_concurrency=None,timeout=None):
+		from functools import partial
+		self.rpch = rpch
+		self.max_concurrency = max_concurrency or g.rpc_max_concurrency
+		self.timeout = timeout or g.http_timeout
+		self.pool = [] # idle (reader,writer) pairs
+		hdr = dict(rpch.http_hdr,Host=rpch.host)
+		self.hdr_fs = 'POST / HTTP/1.1\r\n' + ''.join(
+			'{}: {}\r\n'.format(k,v) for k,v in hdr.items()) + 'Content-Length: {}\r\n\r\n'
+		for method in rpch.rpcmethods:
+			setattr(self,method,partial(self.request,method))
+
+	async def get_connection(self):
+		import asyncio
+		if self.pool:
+			return self.pool.pop(),True
+		return await asyncio.open_connection(self.rpch.host,self.rpch.port),False
+
+	async def http_post(self,conn,data):
+		"""
+		send a POST request over 'conn', and return the response's status, headers and body.
+		Raise StaleConnection if the connection is closed before any of the response arrives
+		"""
+		reader,writer = conn
+		try:
+			writer.write(self.hdr_fs.format(len(data)).encode() + data)
+			await writer.drain()
+			line = await reader.readline()
+		except (ConnectionResetError,BrokenPipeError) as e:
+			raise self.StaleConnection(e)
+		if not line:
+			raise self.StaleConnection('connection closed by server')
+		status,hdrs = int(line.split()[1]),{}
+		while True:
+			line = await reader.readline()
+			if line in (b'\r\n',b'\n',b''): break
+			k,v = line.decode().split(':',1)
+			hdrs[k.strip().lower()] = v.strip()
+		if 'content-length' in hdrs:
+			body = await reader.readexactly(int(hdrs['content-length']))
+		elif hdrs.get('transfer-encoding','').lower() == 'chunked':
+			body = b''
+			while True:
+				size = int((await reader.readline()).split(b';')[0],16)
+				if size == 0:
+					while (await reader.readline()) not in (b'\r\n',b'\n',b''): pass # trailers
+					break
+				body += await reader.readexactly(size)
+				await reader.readexactly(2)
+		else:
+			body = await reader.read()
+			hdrs['connection'] = 'close'
+		return status,hdrs,body
+
+	async def post(self,p):
+		"POST JSON-RPC payload 'p' and return the decoded response"
+		import asyncio
+		data = self.rpch.json_enc.encode(p).encode()
+		dmsg_rpc('    async RPC POST data ==> {}\n'.format(data))
+		while True:
+			conn,reused = await self.get_connection()
+			try:
+				status,hdrs,body = await asyncio.wait_for(self.http_post(conn,data),self.timeout)
+			except (self.StaleConnection,OSError,EOFError,ValueError,asyncio.TimeoutError) as e:
+				conn[1].close()
+				# The daemon may have executed the request, so retry only if a reused connection
+				# was closed without a single byte of response.  Never retry after a timeout
+				if reused and type(e) == self.StaleConnection: continue
+				m = 'Unable to connect to {} at {}:{} ({})'
+				raise RPCFailure(m.format(g.proto.daemon_name,self.rpch.host,self.rpch.port,e))
+			break
+
+		if hdrs.get('connection','').lower() == 'close':
+			conn[1].close()
+		else:
+			self.pool.append(conn)
+
+		dmsg_rpc('    async RPC REPLY data ==> {}\n'.format(body))
+
+		if status != 200:
+			try:
+				e = json.loads(body.decode())['error']
+				raise RPCFailure('{} (code {})'.format(e['message'],e['code']))
+			except (ValueError,KeyError,TypeError):
+				raise RPCFailure(body.decode() or str(status))
+
+		return json.loads(body.decode(),parse_float=Decimal)
+
+	@staticmethod
+	def get_result(resp):
+		if 'error' in resp and resp['error'] != None:
+			raise RPCFailure('{} returned an error: {}'.format(g.proto.daemon_name.capitalize(),resp['error']))
+		elif 'result' not in resp:
+			raise RPCFailure('Missing JSON-RPC result\n' + repr(resp))
+		return resp['result']
+
+	async def request(self,cmd,*args):
+		return self.get_result(await self.post({'method':cmd,'params':args,'id':1,'jsonrpc':'2.0'}))
+
+	async def batch_request(self,cmd,arg_lists):
+		"send a batch request, returning the results in the order of 'arg_lists'"
+		p = [{'method':cmd,'params':r,'id':n,'jsonrpc':'2.0'} for n,r in enumerate(arg_lists)]
+		resps = await self.post(p)
+		try:
+			resps = sorted(resps,key=lambda r: r['id'])
+			assert [r['id'] for r in resps] == list(range(len(p)))
+		except (AssertionError,KeyError,TypeError):
+			raise RPCFailure('Invalid reply to JSON-RPC batch request')
+		return [self.get_result(resp) for resp in resps]
+
+	async def run_bounded(self,coros):
+		"run coroutines 'coros' concurrently, at most 'max_concurrency' at a time, returning the results in order"
+		import asyncio
+		sem = asyncio.Semaphore(self.max_concurrency)
+		async def run(coro):
+			async with sem:
+				return await coro
+		tasks = [asyncio.ensure_future(run(coro)) for coro in coros]
+		try:
+			return await asyncio.gather(*tasks)
+		except:
+			for t in tasks: t.cancel()
+			raise
+
+	async def gather(self,cmd,args_list):
+		"call method 'cmd' once for each argument list in 'args_list', returning the results in order"
+		return await self.run_bounded([self.request(cmd,*args) for args in args_list])
+
+	async def chunked_batch_request(self,cmd,arg_lists,chunk_size,progress=None):
+		"""
+		Split batch request 'arg_lists' into chunks of 'chunk_size' requests and send them,
+		up to 'max_concurrency' at a time.  After each chunk completes, call 'progress' (if supplied) with the
+		number of requests completed and the total.  Return the results in input order
+		"""
+		done = [0]
+		async def do_chunk(chunk):
+			ret = await self.batch_request(cmd,chunk)
+			done[0] += len(chunk)
+			if progress:
+				progress(done[0],len(arg_lists))
+			return ret
+		chunks = [arg_lists[i:i+chunk_size] for i in range(0,len(arg_lists),chunk_size)]
+		return [r for ret in await self.run_bounded([do_chunk(c) for c in chunks]) for r in ret]
+
+	def close(self):
+		while self.pool:
+			self.pool.pop()[1].close()
+
 def rpc_error(ret):
 	return type(ret) is tuple and ret and ret[0] == 'rpcfail'
 
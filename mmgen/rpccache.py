@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+#
+# mmgen = Multi-Mode GENerator, command-line Bitcoin cold storage solution
+# Copyright (C)2013-2019 The MMGen Project <mmgen@tuta.io>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+rpccache.py:  Block-aware RPC response cache for the MMGen suite
+"""
+
+import os,json,time,copy
+from decimal import Decimal
+from mmgen.common import *
+from mmgen.obj import MMGenObject
+from mmgen.rpc import dmsg_rpc
+
+class RPCResponseCache(MMGenObject):
+	"""
+	Cache for the results of RPC calls that change at most once per block.
+
+	Each cached method has a policy (per_block,max_age): if 'per_block' is set, entries are
+	dropped when the daemon's best block hash changes, and if 'max_age' is set, entries older
+	than 'max_age' seconds are refetched.  The best block hash is itself rechecked at most
+	once every g.rpc_cache_check_interval seconds.
+
+	With g.rpc_cache_persist, entries are saved to a JSON file in the data dir, so that they
+	can be reused by subsequent commands.  Decimal values are stored as floats.  This is exact
+	only for values of up to 15 significant digits, which holds for the fee rates returned by
+	the cached methods, but not for coin amounts in general: don't add methods returning
+	balances or other large fixed-point amounts without changing the storage format.
+	"""
+	policies = {
+		'getblockchaininfo': (True,None),
+		'getblockcount':     (True,None),
+		'estimatesmartfee':  (True,300), # also depends on the mempool
+		'getnetworkinfo':    (False,60),
+	}
+	fn_fs = 'rpc_cache-{}.json'
+
+	def __init__(self,rpch):
+		self.rpch = rpch
+		self.daemon_id = '{}:{}'.format(rpch.host,rpch.port)
+		self.entries = {}  # key: (time,result)
+		self.best_block = None
+		self.checked = 0   # time of last best block check
+		self.hits = {}
+		self.misses = {}
+		self.fn = None
+
+	def get(self,cmd,args):
+		per_block,max_age = self.policies[cmd]
+		key = json.dumps([cmd,args],default=str)
+		now = time.time()
+		if per_block and now - self.checked >= g.rpc_cache_check_interval:
+			self.check_best_block(now)
+		if key in self.entries:
+			t,ret = self.entries[key]
+			if max_age is None or now - t < max_age:
+				self.hits[cmd] = self.hits.get(cmd,0) + 1
+				dmsg_rpc('    RPC cache hit: {}'.format(key))
+				return copy.deepcopy(ret) if type(ret) in (dict,list) else ret
+		self.misses[cmd] = self.misses.get(cmd,0) + 1
+		ret = self.rpch.request(cmd,*args,nocache=True)
+		self.entries[key] = (now,copy.deepcopy(ret) if type(ret) in (dict,list) else ret)
+		self.save()
+		return ret
+
+	def check_best_block(self,now):
+		h = self.rpch.request('getbestblockhash',nocache=True)
+		if h != self.best_block:
+			if self.best_block:
+				dmsg_rpc('    RPC cache: new best block {}, invalidating'.format(h))
+			self.invalidate(per_block_only=True)
+			self.best_block = h
+		self.checked = now
+
+	def invalidate(self,per_block_only=False):
+		self.entries = { k:v for k,v in self.entries.items()
+							if per_block_only and not self.policies[json.loads(k)[0]][0] }
+
+	def stats(self):
+		"return a dict of (hits,misses) pairs for each cached method called"
+		return { k:(self.hits.get(k,0),self.misses.get(k,0)) for k in set(self.hits) | set(self.misses) }
+
+	def format_stats(self):
+		fs = '  {:20} {:>6} {:>6}\n'
+		return fs.format('RPC cache','hits','misses') + ''.join(
+			fs.format(k,*v) for k,v in sorted(self.stats().items()))
+
+	def load(self,data_dir):
+		"enable on-disk backing, loading entries saved by a previous command"
+		self.fn = os.path.join(data_dir,self.fn_fs.format(g.coin.lower()))
+		try:
+			d = json.loads(open(self.fn).read(),parse_float=Decimal)
+			if d['daemon'] != self.daemon_id: return
+			self.entries = { k:(float(v[0]),v[1]) for k,v in d['entries'].items() if json.loads(k)[0] in self.policies }
+			self.best_block = d['best_block']
+		except FileNotFoundError:
+			pass
+		except Exception as e:
+			qmsg("Warning: RPC cache file '{}' is corrupted, ignoring ({})".format(self.fn,e.args[0]))
+		# 'checked' is left at zero, so the best block is verified before any per-block entry is used
+
+	def save(self):
+		"write the entries to file.  Failure is only a warning, as the file is just a cache"
+		if not self.fn: return
+		data = json.dumps({
+			'daemon': self.daemon_id,
+			'best_block': self.best_block,
+			'entries': self.entries },default=float)
+		import tempfile
+		tmp_fn = None
+		try:
+			fd,tmp_fn = tempfile.mkstemp(dir=os.path.dirname(self.fn),prefix='.rpc_cache-') # unique per process
+			with os.fdopen(fd,'w') as f:
+				f.write(data)
+			os.replace(tmp_fn,self.fn)
+		except OSError as e:
+			ymsg("Warning: unable to write RPC cache file '{}': {}".format(self.fn,e.strerror or e))
+			if tmp_fn:
+				try: os.unlink(tmp_fn)
+				except OSError: pass
+			self.fn = None # don't retry on every miss
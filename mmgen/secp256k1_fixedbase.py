@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+#
+# mmgen = Multi-Mode GENerator, command-line Bitcoin cold storage solution
+# Copyright (C)2013-2019 The MMGen Project <mmgen@tuta.io>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+secp256k1_fixedbase.py:  Pure-Python fixed-base secp256k1 public key generation
+                         for the MMGen suite
+
+Points are kept in Jacobian coordinates (X,Y,Z), representing the affine point
+(X/Z^2,Y/Z^3).  The point at infinity is None.  Formulas are from:
+  http://www.hyperelliptic.org/EFD/g1p/auto-shortw-jacobian-0.html
+Specifically dbl-2009-l, add-2007-bl and madd-2007-bl.
+
+Like the Python ECDSA library, this code contains no protection against timing
+attacks, so it should be used only on offline machines.
+"""
+
+# secp256k1: http://www.oid-info.com/get/1.3.132.0.10
+p  = 0xfffffffffffffffffffffffffffffffffffffffffffffffffffffffefffffc2f
+n  = 0xfffffffffffffffffffffffffffffffebaaedce6af48a03bbfd25e8cd0364141
+Gx = 0x79be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798
+Gy = 0x483ada7726a3c4655da4fbfc0e1108a8fd17b448a68554199c47d08ffb10d4b8
+
+table_bits = 8
+table_rows,table_cols = (256 + table_bits - 1) // table_bits, 2**table_bits - 1
+table_mask = table_cols
+
+def inv(x):
+	return pow(x,p-2,p)
+
+def batch_inv(xs): # Montgomery's trick: a single modular inversion for the whole list
+	acc,prods = 1,[]
+	for x in xs:
+		prods.append(acc)
+		acc = (acc*x) % p
+	acc = inv(acc)
+	ret = [0] * len(xs)
+	for i in range(len(xs)-1,-1,-1):
+		ret[i] = (acc*prods[i]) % p
+		acc = (acc*xs[i]) % p
+	return ret
+
+def jpt_double(pt): # dbl-2009-l
+	if pt is None: return None
+	X1,Y1,Z1 = pt
+	if Y1 == 0: return None
+	A = (X1*X1) % p
+	B = (Y1*Y1) % p
+	C = (B*B) % p
+	D = 2*((X1+B)**2 - A - C) % p
+	E = 3*A
+	F = (E*E) % p
+	X3 = (F - 2*D) % p
+	return (X3, (E*(D-X3) - 8*C) % p, (2*Y1*Z1) % p)
+
+def jpt_add(pt1,pt2): # add-2007-bl
+	if pt1 is None: return pt2
+	if pt2 is None: return pt1
+	X1,Y1,Z1 = pt1
+	X2,Y2,Z2 = pt2
+	Z1Z1 = (Z1*Z1) % p
+	Z2Z2 = (Z2*Z2) % p
+	U1 = (X1*Z2Z2) % p
+	U2 = (X2*Z1Z1) % p
+	S1 = (Y1*Z2*Z2Z2) % p
+	S2 = (Y2*Z1*Z1Z1) % p
+	H = (U2-U1) % p
+	r = 2*(S2-S1) % p
+	if H == 0:
+		return jpt_double(pt1) if r == 0 else None
+	I = (4*H*H) % p
+	J = (H*I) % p
+	V = (U1*I) % p
+	X3 = (r*r - J - 2*V) % p
+	return (X3, (r*(V-X3) - 2*S1*J) % p, (((Z1+Z2)**2 - Z1Z1 - Z2Z2)*H) % p)
+
+def jpt_madd(pt1,apt2): # madd-2007-bl: Jacobian + affine
+	if pt1 is None: return apt2 + (1,)
+	X1,Y1,Z1 = pt1
+	x2,y2 = apt2
+	Z1Z1 = (Z1*Z1) % p
+	U2 = (x2*Z1Z1) % p
+	S2 = (y2*Z1*Z1Z1) % p
+	H = (U2-X1) % p
+	r = 2*(S2-Y1) % p
+	if H == 0:
+		return jpt_double(pt1) if r == 0 else None
+	HH = (H*H) % p
+	I = 4*HH
+	J = (H*I) % p
+	V = (X1*I) % p
+	X3 = (r*r - J - 2*V) % p
+	return (X3, (r*(V-X3) - 2*Y1*J) % p, ((Z1+H)**2 - Z1Z1 - HH) % p)
+
+def to_affine_batch(pts):
+	"convert a list of finite Jacobian points to affine coordinates with a single inversion"
+	ret = []
+	for (X,Y,Z),zi in zip(pts,batch_inv([pt[2] for pt in pts])):
+		zi2 = (zi*zi) % p
+		ret.append(((X*zi2) % p, (Y*zi2*zi) % p))
+	return ret
+
+def make_base_table():
+	pts = []
+	P = (Gx,Gy,1)
+	for i in range(table_rows):
+		Q = P
+		for j in range(table_cols):
+			pts.append(Q) # (j+1) * 2**(table_bits*i) * G
+			Q = jpt_add(Q,P)
+		P = Q
+	ret = to_affine_batch(pts)
+	return [ret[i*table_cols:(i+1)*table_cols] for i in range(table_rows)]
+
+base_table = None
+
+def scalarmult_base_jacobian(k):
+	"return k*G in Jacobian coordinates, using the precomputed table (built on first call)"
+	global base_table
+	if base_table is None:
+		base_table = make_base_table()
+	if not 0 < k < n:
+		raise ValueError('private key out of range')
+	pt = None
+	for row in base_table:
+		if k & table_mask:
+			pt = jpt_madd(pt,row[(k & table_mask) - 1])
+		k >>= table_bits
+	return pt
+
+def encode_pubkey(x,y,compressed):
+	if compressed:
+		return (b'\x02',b'\x03')[y & 1] + x.to_bytes(32,'big')
+	else:
+		return b'\x04' + x.to_bytes(32,'big') + y.to_bytes(32,'big')
+
+def privnums2pubkeys(ks,compressed):
+	"return a list of serialized public keys for the private key integers in 'ks'"
+	pts = to_affine_batch([scalarmult_base_jacobian(k) for k in ks]) if ks else []
+	return [encode_pubkey(x,y,compressed) for x,y in pts]
@@ -64,11 +64,118 @@ class SeedBase(MMGenObject):
 		self.sid       = SeedID(seed=self)
 		self.length    = len(seed_bin) * 8
 
+class SubSeedList(MMGenObject):
+	"""
+	Table of the Seed IDs of a seed's subseeds of one length, in index order, so that
+	position n holds subseed idx n+1.  Seed IDs are stored packed as 4-byte integers,
+	with nonces in a side array and an open-addressing hash table mapping Seed IDs to
+	positions (plus one, so that zero marks an empty slot).  Seed IDs are random, so
+	their low bits serve as the hash.  Memory use is 6 bytes per subseed for the Seed ID
+	and nonce arrays, plus 4 bytes per hash table slot, for a total of about 11-17 bytes
+	per subseed, depending on the table's load factor (0.375-0.75).
+
+	Lookups by Seed ID return (idx,nonce) pairs, as with a dict.
+	"""
+	max_load = 0.75
+
+	def __init__(self):
+		from array import array
+		self.sids = array('I')
+		self.nonces = array('H')
+		assert self.sids.itemsize == 4,"array type 'I' must be 4 bytes on this platform"
+		self._make_index(16)
+
+	def _make_index(self,size):
+		from array import array
+		self.index = array('I',bytes(4*size))
+		self.mask = size - 1
+		for pos,sid in enumerate(self.sids):
+			self._insert(sid,pos)
+
+	def _insert(self,sid,pos):
+		index,mask = self.index,self.mask
+		h = sid & mask
+		while index[h]:
+			h = (h + 1) & mask
+		index[h] = pos + 1
+
+	def _find(self,sid): # return position of Seed ID int 'sid', or -1
+		index,mask,sids = self.index,self.mask,self.sids
+		h = sid & mask
+		while index[h]:
+			if sids[index[h]-1] == sid:
+				return index[h] - 1
+			h = (h + 1) & mask
+		return -1
+
+	def append(self,sid,nonce):
+		sid = int(sid,16)
+		self.sids.append(sid)
+		self.nonces.append(nonce)
+		if len(self.sids) > self.max_load * (self.mask + 1):
+			self._make_index((self.mask + 1) * 2)
+		else:
+			self._insert(sid,len(self.sids)-1)
+
+	def get_by_idx(self,idx):
+		"return the (Seed ID,nonce) pair for subseed index 'idx'"
+		return '{:08X}'.format(self.sids[idx-1]),self.nonces[idx-1]
+
+	def __len__(self):
+		return len(self.sids)
+
+	def _find_sid(self,sid): # like _find(), but for a Seed ID string, which may be invalid
+		if not SeedID(sid=sid,on_fail='silent'):
+			return -1
+		return self._find(int(sid,16))
+
+	def __contains__(self,sid):
+		return self._find_sid(sid) != -1
+
+	def __getitem__(self,sid):
+		pos = self._find_sid(sid)
+		if pos == -1:
+			raise KeyError(sid)
+		return (pos+1,self.nonces[pos])
+
+	def __iter__(self):
+		return ('{:08X}'.format(sid) for sid in self.sids)
+
+	keys = __iter__
+
+	def items(self):
+		return (('{:08X}'.format(sid),(pos+1,nonce))
+					for pos,(sid,nonce) in enumerate(zip(self.sids,self.nonces)))
+
+	def tobytes(self):
+		"serialize the table, in little-endian byte order"
+		from array import array
+		sids,nonces = array('I',self.sids),array('H',self.nonces)
+		if sys.byteorder == 'big':
+			sids.byteswap(); nonces.byteswap()
+		return sids.tobytes() + nonces.tobytes()
+
+	@classmethod
+	def frombytes(cls,data):
+		assert len(data) % 6 == 0,'invalid subseed table data length'
+		me = cls()
+		n = len(data) // 6
+		me.sids.frombytes(data[:n*4])
+		me.nonces.frombytes(data[n*4:])
+		if sys.byteorder == 'big':
+			me.sids.byteswap(); me.nonces.byteswap()
+		size = 16
+		while n > me.max_load * size:
+			size *= 2
+		me._make_index(size)
+		return me
+
 class Seed(SeedBase):
 
+	gen_mp_min = 1000 # minimum number of subseed pairs for parallel generation
+
 	def __init__(self,seed_bin=None):
-		from collections import OrderedDict
-		self.subseeds = { 'long': OrderedDict(), 'short': OrderedDict() }
+		self.subseeds = { 'long': SubSeedList(), 'short': SubSeedList() }
 		SeedBase.__init__(self,seed_bin=seed_bin)
 
 	def subseed(self,ss_idx_in,print_msg=False):
@@ -81,12 +188,10 @@ class Seed(SeedBase):
 			))
 		if ss_idx.idx > len(self.subseeds['long']):
 			self.gen_subseeds(ss_idx.idx)
-		sid = list(self.subseeds[ss_idx.type].keys())[ss_idx.idx-1]
-		idx,nonce = self.subseeds[ss_idx.type][sid]
+		sid,nonce = self.subseeds[ss_idx.type].get_by_idx(ss_idx.idx)
 		if print_msg:
 			msg('\b\b\b => {}'.format(SeedID.hlc(sid)))
-		assert idx == ss_idx.idx, "{} != {}: subseed list idx does not match subseed idx!".format(idx,ss_idx.idx)
-		return SubSeed(self,idx,nonce,length=ss_idx.type)
+		return SubSeed(self,ss_idx.idx,nonce,length=ss_idx.type)
 
 	def existing_subseed_by_seed_id(self,sid):
 		for k in ('long','short'):
@@ -136,11 +241,13 @@ class Seed(SeedBase):
 		if last_sid != None:
 			last_sid = SeedID(sid=last_sid)
 
-		def add_subseed(idx,length):
+		def add_subseed(idx,length,sid): # 'sid' is the precomputed Seed ID for nonce 0
 			for nonce in range(SubSeed.max_nonce): # use nonce to handle Seed ID collisions
-				sid = make_chksum_8(SubSeedBase.make_subseed_bin(self,idx,nonce,length))
+				if nonce:
+					sid = make_chksum_8(SubSeedBase.make_subseed_bin(self,idx,nonce,length))
 				if not (sid in self.subseeds['long'] or sid in self.subseeds['short'] or sid == self.sid):
-					self.subseeds[length][sid] = (idx,nonce)
+					assert idx == len(self.subseeds[length]) + 1,'subseed list idx does not match subseed idx!'
+					self.subseeds[length].append(sid,nonce)
 					return last_sid == sid
 				elif g.debug_subseed: # should get ≈450 collisions for first 1,000,000 subseeds
 					k = ('long','short')[sid in self.subseeds['short']]
@@ -153,9 +260,30 @@ class Seed(SeedBase):
 			else: # must exit here, as this could leave self.subseeds in inconsistent state
 				raise SubSeedNonceRangeExceeded('add_subseed(): nonce range exceeded')
 
-		for idx in SubSeedIdxRange(first_idx,last_idx).iterate():
-			if add_subseed(idx,'long') + add_subseed(idx,'short'):
-				break
+		# The nonce-0 Seed IDs, which account for all but a handful of subseeds, are computed
+		# in chunks, in parallel for large ranges if --jobs is set.  Collisions are then resolved
+		# serially in index order, so the result is identical to that of a serial scan.
+		def gen_sids(idxs):
+			mk = SubSeedBase.make_subseed_bin
+			return [(idx,make_chksum_8(mk(self,idx,0,'long')),make_chksum_8(mk(self,idx,0,'short')))
+						for idx in idxs]
+
+		idxs = SubSeedIdxRange(first_idx,last_idx).iterate()
+		n = last_idx - first_idx + 1
+		jobs = get_mp_jobs() if n >= self.gen_mp_min else 0
+		if jobs:
+			res = mp_imap(gen_sids,get_chunks(idxs,mp_chunksize(n,jobs,max_size=1000)),jobs)
+		else:
+			res = map(gen_sids,get_chunks(idxs,1))
+
+		try:
+			for chunk in res:
+				for idx,sid_long,sid_short in chunk:
+					if add_subseed(idx,'long',sid_long) + add_subseed(idx,'short',sid_short):
+						return
+		finally:
+			if jobs:
+				res.close() # terminate the workers if we're exiting early
 
 	def fmt_subseeds(self,first_idx,last_idx):
 
@@ -171,12 +299,83 @@ class Seed(SeedBase):
 		hdr += fs1.format('Long Subseeds','Short Subseeds')
 		hdr += fs1.format('-------------','--------------')
 
-		sl = tuple(self.subseeds['long'])
-		ss = tuple(self.subseeds['short'])
-		body = (fs2.format(sl[n-1],ss[n-1],i=n) for n in r.iterate())
+		sl,ss = self.subseeds['long'],self.subseeds['short']
+		body = (fs2.format(sl.get_by_idx(n)[0],ss.get_by_idx(n)[0],i=n) for n in r.iterate())
 
 		return hdr + ''.join(body)
 
+class SubSeedIndex(MMGenObject):
+	"""
+	Persistent cache of a seed's subseed tables, stored encrypted in a file named
+	after the parent Seed ID in directory 'outdir'.  The encryption key is derived
+	from the parent seed, so the file reveals nothing without it.
+
+	load() populates the seed's subseed tables from the file, after which the seed
+	extends them as needed; save() then writes them out if they've grown.
+	"""
+	ext = 'ssidx'
+	desc = 'subseed index'
+	hdr_fmt = '<8sI' # parent Seed ID, subseed pair count
+
+	def __init__(self,seed,outdir):
+		import hmac
+		self.seed = seed
+		self.fn = os.path.join(outdir,'{}.{}'.format(seed.sid,self.ext))
+		self.key = hmac.new(seed.data,b'mmgen subseed index',sha256).digest()
+		self.saved_len = 0
+
+	def load(self):
+		"read the index from file, if present.  Return the number of subseed pairs read"
+		if not os.path.exists(self.fn):
+			return 0
+		from struct import calcsize,unpack_from
+		d = get_data_from_file(self.fn,self.desc,binary=True,quiet=True)
+		il = g.aesctr_iv_len
+		d = decrypt_data(d[il:],self.key,iv=d[:il],desc=self.desc)
+		hl = calcsize(self.hdr_fmt)
+		if len(d) < 32 + hl or sha256(d[32:]).digest() != d[:32]:
+			qmsg("{}: {} is corrupted or doesn't match seed, ignoring".format(self.fn,self.desc))
+			return 0
+		sid,n = unpack_from(self.hdr_fmt,d,32)
+		assert sid.decode() == self.seed.sid,'{}: Seed ID mismatch'.format(self.fn)
+		tl = n * 6
+		assert len(d) == 32 + hl + 2*tl,'{}: invalid {} length'.format(self.fn,self.desc)
+		if n > len(self.seed.subseeds['long']):
+			self.seed.subseeds = {
+				'long':  SubSeedList.frombytes(d[32+hl:32+hl+tl]),
+				'short': SubSeedList.frombytes(d[32+hl+tl:]) }
+		self.saved_len = n
+		vmsg('Read {} subseed pairs from {} {!r}'.format(n,self.desc,self.fn))
+		return n
+
+	def save(self):
+		"""
+		write the index to file if the seed's subseed tables have grown since the last load or
+		save.  Failure to write is only a warning, as the index is just a cache
+		"""
+		n = len(self.seed.subseeds['long'])
+		if n <= self.saved_len:
+			return False
+		from struct import pack
+		ss = self.seed.subseeds
+		d = pack(self.hdr_fmt,self.seed.sid.encode(),n) + ss['long'].tobytes() + ss['short'].tobytes()
+		iv = os.urandom(g.aesctr_iv_len)
+		data = iv + encrypt_data(sha256(d).digest()+d,self.key,iv=iv,desc=self.desc,verify=False)
+		tmp_fn = self.fn + '.tmp'
+		try:
+			with open(tmp_fn,'wb') as fp:
+				os.chmod(tmp_fn,0o600)
+				fp.write(data)
+			os.replace(tmp_fn,self.fn)
+		except OSError as e:
+			ymsg('Warning: unable to write {} {!r}: {}'.format(self.desc,self.fn,e.strerror or e))
+			try: os.unlink(tmp_fn)
+			except OSError: pass
+			return False
+		self.saved_len = n
+		vmsg('Wrote {} subseed pairs to {} {!r}'.format(n,self.desc,self.fn))
+		return True
+
 class SubSeedBase(MMGenObject):
 
 	max_nonce = 1000
@@ -744,6 +943,18 @@ class Wallet (SeedSourceEnc):
 	ext = 'mmdat'
 	require_utf8_input = True # label is UTF-8
 
+	@staticmethod
+	def get_key_params(fn):
+		"return the (salt,hash_preset) pair of wallet file 'fn' without checking or decrypting it, or None"
+		try:
+			lines = open(fn).read().splitlines()
+			hp = lines[3].split()[0][:-1]
+			salt = baseconv.b58decode(''.join(lines[4].split(' ')[1:]),pad=True)
+			assert hp in g.hash_presets and salt
+			return (salt,hp)
+		except:
+			return None
+
 	def _get_label_from_user(self,old_lbl=''):
 		d = "to reuse the label '{}'".format(old_lbl.hl()) if old_lbl else 'for no label'
 		p = 'Enter a wallet label, or hit ENTER {}: '.format(d)
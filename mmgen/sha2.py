@@ -17,9 +17,9 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 """
-sha2.py: A non-optimized but very compact implementation of the SHA2 hash
-         algorithm for the MMGen suite.  Implements SHA256, SHA512 and
-         SHA256Compress (unpadded SHA256, required for Zcash addresses)
+sha2.py: A compact pure-Python implementation of the SHA2 hash algorithm for
+         the MMGen suite.  Implements SHA256, SHA512 and SHA256Compress
+         (unpadded SHA256, required for Zcash addresses)
 """
 
 from struct import pack,unpack
@@ -72,7 +72,6 @@ class Sha2(object):
 			type(self).initConstants()
 		self.H = list(self.H_init)
 		self.M = message
-		self.W = [0] * self.nRounds
 		if preprocess:
 			self.padMessage()
 		self.bytesToWords()
@@ -96,7 +95,7 @@ class Sha2(object):
 	def bytesToWords(self):
 		ws = self.wordSize
 		assert len(self.M) % ws == 0
-		self.M = tuple([unpack(self.word_fmt,self.M[i*ws:ws+(i*ws)])[0] for i in range(len(self.M) // ws)])
+		self.M = unpack('>{}{}'.format(len(self.M) // ws,self.word_fmt[1]),bytes(self.M))
 
 	def digest(self):
 		return b''.join((pack(self.word_fmt,w) for w in self.H))
@@ -110,48 +109,62 @@ class Sha2(object):
 
 	def processBlock(self,offset):
 		'Process a blkSize-byte chunk of the message'
+		self.H = self.compress(self.H,self.M[offset:offset+16])
 
-		def rrotate(a,b): return ((a << self.wordBits-b) & self.wordMask) | (a >> b)
-		def addm(a,b): return (a + b) & self.wordMask
-
-		# Copy chunk into first 16 words of message schedule array
-		for i in range(16):
-			self.W[i] = self.M[offset + i]
+	@classmethod
+	def compress(cls,H,block):
+		"""
+		Apply the compression function to hash state H and the 16-word message block 'block',
+		returning the new state.  Class attributes are hoisted into locals, and rotations and
+		additions are done inline, masking only where the result is needed as a word.
+		"""
+		bits,M,K = cls.wordBits,cls.wordMask,cls.K
+		g0r1,g0r2,g0r3 = cls.g0r1,cls.g0r2,cls.g0r3
+		g1r1,g1r2,g1r3 = cls.g1r1,cls.g1r2,cls.g1r3
+		s0r1,s0r2,s0r3 = cls.s0r1,cls.s0r2,cls.s0r3
+		s1r1,s1r2,s1r3 = cls.s1r1,cls.s1r2,cls.s1r3
+		l0r1,l0r2,l1r1,l1r2 = bits-g0r1,bits-g0r2,bits-g1r1,bits-g1r2
+		m0r1,m0r2,m0r3,m1r1,m1r2,m1r3 = bits-s0r1,bits-s0r2,bits-s0r3,bits-s1r1,bits-s1r2,bits-s1r3
+
+		# Extend the 16 words of the block into the nRounds-word message schedule array.
+		# Bits shifted above the word size by the left shifts don't affect the low bits
+		# of the sum, so they're simply masked off at the end.
+		W = list(block)
+		for i in range(16,cls.nRounds):
+			x = W[i-15]
+			y = W[i-2]
+			W.append((
+				((x >> g0r1 | x << l0r1) ^ (x >> g0r2 | x << l0r2) ^ (x >> g0r3)) + W[i-7] +
+				((y >> g1r1 | y << l1r1) ^ (y >> g1r2 | y << l1r2) ^ (y >> g1r3)) + W[i-16]
+			) & M)
 
-		# Extend the first 16 words into the remaining nRounds words of message schedule array
-		for i in range(16,self.nRounds):
-			g0 = self.W[i-15]
-			gamma0 = rrotate(g0,self.g0r1) ^ rrotate(g0,self.g0r2) ^ (g0 >> self.g0r3)
-			g1 = self.W[i-2]
-			gamma1 = rrotate(g1,self.g1r1) ^ rrotate(g1,self.g1r2) ^ (g1 >> self.g1r3)
-			self.W[i] = addm(addm(addm(gamma0,self.W[i-7]),gamma1),self.W[i-16])
+		# Compression function main loop
+		a,b,c,d,e,f,g,h = H
+		for k,w in zip(K,W):
+			t1 = (h + ((e >> s1r1 | e << m1r1) ^ (e >> s1r2 | e << m1r2) ^ (e >> s1r3 | e << m1r3))
+					+ (g ^ (e & (f ^ g))) + k + w)
+			t2 = ((a >> s0r1 | a << m0r1) ^ (a >> s0r2 | a << m0r2) ^ (a >> s0r3 | a << m0r3)) \
+					+ ((a & b) | (c & (a | b)))
+			h,g,f,e,d,c,b,a = g,f,e,(d + t1) & M,c,b,a,(t1 + t2) & M
 
-		# Initialize working variables from current hash state
-		a,b,c,d,e,f,g,h = self.H
+		return [(x + y) & M for x,y in zip(H,(a,b,c,d,e,f,g,h))]
 
-		# Compression function main loop
-		for i in range(self.nRounds):
-			ch = (e & f) ^ (~e & g)
-			maj = (a & b) ^ (a & c) ^ (b & c)
-
-			sigma0 = rrotate(a,self.s0r1) ^ rrotate(a,self.s0r2) ^ rrotate(a,self.s0r3)
-			sigma1 = rrotate(e,self.s1r1) ^ rrotate(e,self.s1r2) ^ rrotate(e,self.s1r3)
-
-			t1 = addm(addm(addm(addm(h,sigma1),ch),self.K[i]),self.W[i])
-			t2 = addm(sigma0,maj)
-
-			h = g
-			g = f
-			f = e
-			e = addm(d,t1)
-			d = c
-			c = b
-			b = a
-			a = addm(t1,t2)
-
-		# Save hash state
-		for n,v in enumerate((a,b,c,d,e,f,g,h)):
-			self.H[n] = addm(self.H[n],v)
+	@classmethod
+	def compress_blocks(cls,blocks):
+		"""
+		Batch API for unpadded hashing (e.g. SHA256Compress): compress each blkSize-byte block
+		in 'blocks' independently, starting from the initial hash state, and return the list
+		of digests.
+		"""
+		if cls.K == None:
+			cls.initConstants()
+		H_init,compress = cls.H_init,cls.compress
+		in_fmt,out_fmt = '>16' + cls.word_fmt[1],'>8' + cls.word_fmt[1]
+		ret = []
+		for block in blocks:
+			assert len(block) == cls.blkSize,'{}: incorrect block length'.format(len(block))
+			ret.append(pack(out_fmt,*compress(H_init,unpack(in_fmt,bytes(block)))))
+		return ret
 
 class Sha256(Sha2):
 	use_gmp = False
@@ -558,13 +558,14 @@ class MMGenToolCmdFileCrypt(MMGenToolCmdBase):
 
 		MMGen encryption suite:
 		* Key: Scrypt (user-configurable hash parameters, 32-byte salt)
-		* Enc: AES256_CTR, 16-byte rand IV, sha256 hash + 32-byte nonce + data
+		* Enc: AES256_CTR, 16-byte rand IV, data in 1MB chunks, each with an HMAC-SHA256 tag
 		* The encrypted file is indistinguishable from random data
+		* Files in the original format (sha256 hash + 32-byte nonce + data) are also decrypted
 	"""
 	def encrypt(self,infile:str,outfile='',hash_preset=''):
 		"encrypt a file"
-		data = get_data_from_file(infile,'data for encryption',binary=True)
-		enc_d = mmgen_encrypt(data,'user data',hash_preset)
+		data = get_mmap_from_file(infile,'data for encryption')
+		enc_d = mmgen_encrypt_chunked(data,'user data',hash_preset)
 		if not outfile:
 			outfile = '{}.{}'.format(os.path.basename(infile),g.mmenc_ext)
 		write_data_to_file(outfile,enc_d,'encrypted data',binary=True)
@@ -572,9 +573,9 @@ class MMGenToolCmdFileCrypt(MMGenToolCmdBase):
 
 	def decrypt(self,infile:str,outfile='',hash_preset=''):
 		"decrypt a file"
-		enc_d = get_data_from_file(infile,'encrypted data',binary=True)
+		enc_d = get_mmap_from_file(infile,'encrypted data')
 		while True:
-			dec_d = mmgen_decrypt(enc_d,'user data',hash_preset)
+			dec_d = mmgen_decrypt_chunked(enc_d,'user data',hash_preset)
 			if dec_d: break
 			msg('Trying again...')
 		if not outfile:
@@ -718,6 +719,25 @@ class MMGenToolCmdWallet(MMGenToolCmdBase):
 		ret = d.sec.wif if target=='wif' else d.addr
 		return ret
 
+	def list_chain_ckpts(self):
+		"list the files in the seed chain checkpoint cache"
+		from mmgen.chaincache import ChainCheckpointCache
+		fns = ChainCheckpointCache.get_files()
+		if not fns:
+			return 'Seed chain checkpoint cache is empty'
+		fs = '{:24} {:>8} {}'
+		return '\n'.join([fs.format('File','Size','Last used')] + [fs.format(
+			os.path.basename(fn),
+			os.stat(fn).st_size,
+			make_timestr(os.stat(fn).st_mtime)) for fn in fns])
+
+	def purge_chain_ckpts(self,seed_id=''):
+		"delete the seed chain checkpoint cache, or the cached checkpoints for a single Seed ID"
+		from mmgen.chaincache import ChainCheckpointCache
+		n = ChainCheckpointCache.purge(SeedID(sid=seed_id) if seed_id else None)
+		msg('{} seed chain checkpoint file{} deleted'.format(n,suf(n)))
+		return True
+
 class MMGenToolCmdRPC(MMGenToolCmdBase):
 	"tracking wallet commands using the JSON-RPC interface"
 
@@ -108,7 +108,10 @@ watch-only wallet using '{}-addrimport' and then re-run this program.
 		return sum(i.amt for i in self.unspent)
 
 	def get_unspent_rpc(self):
-		return g.rpch.listunspent(self.minconf)
+		# stream the reply: large wallets may have hundreds of thousands of unspent outputs
+		for o in g.rpch.listunspent(self.minconf,stream=True,satoshis=True):
+			o['amount'] = g.proto.coin_amt(o['amount'],from_unit='satoshi')
+			yield o
 
 	def get_unspent_data(self):
 		if g.bogus_wallet_data: # for debugging purposes only
@@ -118,11 +121,11 @@ watch-only wallet using '{}-addrimport' and then re-run this program.
 #		write_data_to_file('bogus_unspent.json', repr(us), 'bogus unspent data')
 #		sys.exit(0)
 
-		if not us_rpc: die(0,self.wmsg['no_spendable_outputs'])
 		confs_per_day = 60*60*24 // g.proto.secs_per_block
 		tr_rpc = []
 		lbl_id = ('account','label')['label_api' in g.rpch.caps]
-		for o in us_rpc:
+		n = 0
+		for n,o in enumerate(us_rpc,1):
 			if not lbl_id in o: continue          # coinbase outputs have no account field
 			l = TwLabel(o[lbl_id],on_fail='silent')
 			if l:
@@ -135,6 +138,7 @@ watch-only wallet using '{}-addrimport' and then re-run this program.
 					'confs':  o['confirmations']
 				})
 				tr_rpc.append(o)
+		if not n: die(0,self.wmsg['no_spendable_outputs'])
 		self.unspent = self.MMGenTwOutputList(
 						self.MMGenTwUnspentOutput(
 							**{k:v for k,v in o.items() if k in dir(self.MMGenTwUnspentOutput)}
@@ -416,7 +420,8 @@ class TwAddrList(MMGenDict):
 		rpc_init()
 
 		lbl_id = ('account','label')['label_api' in g.rpch.caps]
-		for d in g.rpch.listunspent(0):
+		sats = {} # sum amounts as integer satoshis, converting at the end
+		for d in g.rpch.listunspent(0,stream=True,satoshis=True):
 			if not lbl_id in d: continue  # skip coinbase outputs with missing account
 			if d['confirmations'] < minconf: continue
 			label = TwLabel(d[lbl_id],on_fail='silent')
@@ -431,8 +436,12 @@ class TwAddrList(MMGenDict):
 										'lbl':  label,
 										'addr': CoinAddr(d['address'])}
 					self[label.mmid]['lbl'].mmid.confs = d['confirmations']
-				self[label.mmid]['amt'] += d['amount']
-				self.total += d['amount']
+					sats[label.mmid] = 0
+				sats[label.mmid] += d['amount']
+
+		for mmid,amt in sats.items():
+			self[mmid]['amt'] = g.proto.coin_amt(amt,from_unit='satoshi')
+		self.total = g.proto.coin_amt(sum(sats.values()),from_unit='satoshi')
 
 		# We use listaccounts only for empty addresses, as it shows false positive balances
 		if showempty or all_labels:
@@ -537,8 +546,8 @@ class TrackingWallet(MMGenObject):
 		return g.rpch.importaddress(addr,label,rescan,timeout=(False,3600)[rescan])
 
 	@write_mode
-	def batch_import_address(self,arg_list):
-		return g.rpch.importaddress(arg_list,batch=True)
+	def batch_import_address(self,arg_list,progress=None):
+		return g.rpch.importaddress(arg_list,batch=True,progress=progress)
 
 	@write_mode
 	def write(self): pass
@@ -636,23 +645,27 @@ class TwGetBalance(MMGenObject):
 	def create_data(self):
 		# 0: unconfirmed, 1: below minconf, 2: confirmed, 3: spendable
 		lbl_id = ('account','label')['label_api' in g.rpch.caps]
-		for d in g.rpch.listunspent(0):
+		sats = {k:[0] * 4 for k in self.data} # sum amounts as integer satoshis, converting at the end
+		for d in g.rpch.listunspent(0,stream=True,satoshis=True):
 			try: lbl = TwLabel(d[lbl_id],on_fail='silent')
 			except: lbl = None
 			if lbl:
 				if lbl.mmid.type == 'mmgen':
 					key = lbl.mmid.obj.sid
-					if key not in self.data:
-						self.data[key] = [g.proto.coin_amt('0')] * 4
+					if key not in sats:
+						sats[key] = [0] * 4
 				else: key = 'Non-MMGen'
 			else: key = 'Non-wallet'
 
 			conf_level = 0 if not d['confirmations'] else 1 if d['confirmations'] < self.minconf else 2
 
-			self.data['TOTAL'][conf_level] += d['amount']
-			self.data[key][conf_level] += d['amount']
+			sats['TOTAL'][conf_level] += d['amount']
+			sats[key][conf_level] += d['amount']
 			if d['spendable']:
-				self.data[key][3] += d['amount']
+				sats[key][3] += d['amount']
+
+		for key,amts in sats.items():
+			self.data[key] = [g.proto.coin_amt(n,from_unit='satoshi') for n in amts]
 
 	def format(self):
 		if self.quiet:
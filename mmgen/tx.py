@@ -390,14 +390,13 @@ Selected non-{pnm} inputs: {{}}""".strip().format(pnm=g.proj_name,pnl=g.proj_nam
 		return g.proto.coin_amt(sum(e.amt for e in olist))
 
 	def add_mmaddrs_to_outputs(self,ad_w,ad_f):
-		a = [e.addr for e in self.outputs]
-		d = ad_w.make_reverse_dict(a)
-		if ad_f:
-			d.update(ad_f.make_reverse_dict(a))
 		for e in self.outputs:
-			if e.addr and e.addr in d:
-				e.mmid,f = d[e.addr]
-				if f: e.label = f
+			if not e.addr: continue
+			# data from address files takes precedence over tracking wallet data
+			ret = (ad_f and ad_f.coinaddr2entry(e.addr)) or ad_w.coinaddr2entry(e.addr)
+			if ret:
+				e.mmid = ret[0]
+				if ret[1].label: e.label = ret[1].label
 
 	def check_dup_addrs(self,io_str):
 		assert io_str in ('inputs','outputs')
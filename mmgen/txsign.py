@@ -40,6 +40,20 @@ ERROR: a key file must be supplied for the following non-{pnm} address{{}}:\n
 
 from collections import OrderedDict
 saved_seeds = OrderedDict()
+seed_dirs = {}        # Seed ID -> directory of seed source file
+subseed_indexes = {}  # Seed ID -> SubSeedIndex
+key_cache = None      # (protocol,Seed ID,mmtype,idx) -> AddrListEntry; enabled by setting to a dict
+
+def find_subseed(parent,sid):
+	"search the parent seed's subseeds for Seed ID 'sid', using a persistent index if requested"
+	if not (opt.subseed_index and parent.sid in seed_dirs):
+		return parent.subseed_by_seed_id(sid,print_msg=True)
+	if parent.sid not in subseed_indexes:
+		subseed_indexes[parent.sid] = SubSeedIndex(parent,seed_dirs[parent.sid])
+		subseed_indexes[parent.sid].load()
+	seed = parent.subseed_by_seed_id(sid,print_msg=True)
+	subseed_indexes[parent.sid].save()
+	return seed
 
 def get_seed_for_seed_id(sid,infiles,saved_seeds):
 
@@ -49,9 +63,11 @@ def get_seed_for_seed_id(sid,infiles,saved_seeds):
 	subseeds_checked = False
 	while True:
 		if infiles:
-			seed = SeedSource(infiles.pop(0),ignore_in_fmt=True).seed
+			fn = infiles.pop(0)
+			seed = SeedSource(fn,ignore_in_fmt=True).seed
+			seed_dirs[seed.sid] = os.path.dirname(fn) or os.curdir
 		elif subseeds_checked == False:
-			seed = saved_seeds[list(saved_seeds)[0]].subseed_by_seed_id(sid,print_msg=True)
+			seed = find_subseed(saved_seeds[list(saved_seeds)[0]],sid)
 			subseeds_checked = True
 			if not seed: continue
 		elif opt.in_fmt:
@@ -79,10 +95,25 @@ def generate_kals_for_mmgen_addrs(need_keys,infiles,saved_seeds):
 		for t in MMGenAddrType.mmtypes:
 			idx_list = [i.idx for i in mmids if i.sid == sid and i.mmtype == t]
 			if idx_list:
-				addr_idxs = AddrIdxList(idx_list=idx_list)
-				d.append(KeyAddrList(seed=seed,addr_idxs=addr_idxs,mmtype=MMGenAddrType(t)))
+				if key_cache is None:
+					addr_idxs = AddrIdxList(idx_list=idx_list)
+					d.append(KeyAddrList(seed=seed,addr_idxs=addr_idxs,mmtype=MMGenAddrType(t)))
+				else:
+					d.append(get_cached_kal(seed,idx_list,MMGenAddrType(t)))
 	return d
 
+def get_cached_kal(seed,idx_list,mmtype):
+	"like KeyAddrList(seed=seed,...), but generate only the keys not already in key_cache"
+	pfx = (g.proto.__name__,seed.sid,mmtype)
+	missing = [idx for idx in idx_list if pfx+(idx,) not in key_cache]
+	if missing:
+		kal = KeyAddrList(seed=seed,addr_idxs=AddrIdxList(idx_list=missing),mmtype=mmtype)
+		key_cache.update((pfx+(e.idx,),e) for e in kal.data)
+	else:
+		vmsg('Using cached keys for {}:{}'.format(seed.sid,mmtype))
+	adata = AddrListList([key_cache[pfx+(idx,)] for idx in sorted(set(idx_list))])
+	return KeyAddrList(al_id=AddrListID(seed.sid,mmtype),adata=adata)
+
 def add_keys(tx,src,infiles=None,saved_seeds=None,keyaddr_list=None):
 	need_keys = [e for e in getattr(tx,src) if e.mmid and not e.have_wif]
 	if not need_keys: return []
@@ -94,15 +125,15 @@ def add_keys(tx,src,infiles=None,saved_seeds=None,keyaddr_list=None):
 	new_keys = []
 	for e in need_keys:
 		for kal in d:
-			for f in kal.data:
-				mmid = '{}:{}'.format(kal.al_id,f.idx)
-				if mmid == e.mmid:
-					if f.addr == e.addr:
-						e.have_wif = True
-						if src == 'inputs':
-							new_keys.append(f)
-					else:
-						die(3,wmsg['mapping_error'].format(m1,mmid,f.addr,'tx file:',e.mmid,e.addr))
+			f = kal.entry(e.mmid.idx) if kal.al_id == e.mmid.al_id else None
+			if f:
+				if f.addr == e.addr:
+					e.have_wif = True
+					if src == 'inputs':
+						new_keys.append(f)
+				else:
+					mmid = '{}:{}'.format(kal.al_id,f.idx)
+					die(3,wmsg['mapping_error'].format(m1,mmid,f.addr,'tx file:',e.mmid,e.addr))
 	if new_keys:
 		vmsg('Added {} wif key{} from {}'.format(len(new_keys),suf(new_keys,'s'),desc))
 	return new_keys
@@ -149,8 +180,7 @@ def txsign(tx,seed_files,kl,kal,tx_num_str=''):
 		if not kl:
 			die(2,'Transaction has non-{} inputs, but no flat key list is present'.format(g.proj_name))
 		tmp = KeyAddrList(addrlist=non_mm_addrs)
-		tmp.add_wifs(kl)
-		m = tmp.list_missing('sec')
+		m = tmp.merge_keylist(kl)
 		if m: die(2,wmsg['missing_keys_error'].format(suf(m,'es'),'\n    '.join(m)))
 		keys += tmp.data
 
@@ -453,6 +453,74 @@ def get_hash_params(hash_preset):
 	else: # Shouldn't be here
 		die(3,"{}: invalid 'hash_preset' value".format(hash_preset))
 
+def get_mp_jobs(jobs=None):
+	"""
+	Return the number of worker processes for parallelized operations, or 0 for serial execution.
+	Workers are forked so that they inherit the parent's state (g, opt, keys), which rules out
+	platforms lacking the 'fork' start method.
+	"""
+	jobs = int(jobs or getattr(opt,'jobs',None) or 1)
+	if jobs == 1: return 0
+	import multiprocessing as mp
+	if 'fork' not in mp.get_all_start_methods():
+		qmsg('Parallel processing unavailable on this platform, continuing in serial mode')
+		return 0
+	return jobs
+
+class MPWorkerExit(object):
+	def __init__(self,code): self.code = code
+
+_mp_func = None
+
+def _mp_call(arg):
+	try:
+		return _mp_func(arg)
+	except SystemExit as e: # die() was called in worker: pass exit to parent instead of hanging the pool
+		return MPWorkerExit(e.code)
+
+def mp_imap(func,iterable,jobs,max_pending=None):
+	"""
+	Apply 'func' to the items of 'iterable' in 'jobs' forked worker processes, yielding the
+	results in input order.  'func' is inherited by the workers, so it needn't be picklable,
+	but its arguments and return values must be.  No more than 'max_pending' items (default:
+	four per worker) are in flight at a time, so 'iterable' is consumed only as fast as the
+	results are, and memory use is bounded.
+	"""
+	global _mp_func
+	_mp_func = func
+	max_pending = max_pending or jobs * 4
+	import multiprocessing as mp
+	from collections import deque
+
+	def get_result(res):
+		ret = res.get()
+		if type(ret) == MPWorkerExit:
+			sys.exit(ret.code)
+		return ret
+
+	pending = deque()
+	with mp.get_context('fork').Pool(jobs) as pool:
+		for arg in iterable:
+			pending.append(pool.apply_async(_mp_call,(arg,)))
+			if len(pending) >= max_pending:
+				yield get_result(pending.popleft())
+		while pending:
+			yield get_result(pending.popleft())
+
+def get_chunks(iterable,chunksize):
+	"split 'iterable' into lists of length 'chunksize' (the last list may be shorter)"
+	chunk = []
+	for e in iterable:
+		chunk.append(e)
+		if len(chunk) == chunksize:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
+def mp_chunksize(nitems,jobs,max_size=100):
+	return max(1,min(max_size,nitems // (jobs*4)))
+
 def compare_chksums(chk1,desc1,chk2,desc2,hdr='',die_on_fail=False,verbose=False):
 
 	if not chk1 == chk2:
@@ -585,6 +653,10 @@ def write_data_to_file( outfile,data,desc='data',
 	if quiet: ask_tty = ask_overwrite = False
 	if opt.quiet: ask_overwrite = False
 
+	# 'data' may also be an iterable of str or bytes chunks, for streamed output
+	streamed = not isinstance(data,(str,bytes,bytearray,memoryview))
+	chunks = data if streamed else (data,)
+
 	if ask_write_default_yes == False or ask_write_prompt:
 		ask_write = True
 
@@ -615,7 +687,8 @@ def write_data_to_file( outfile,data,desc='data',
 			import msvcrt
 			msvcrt.setmode(sys.stdout.fileno(),os.O_BINARY)
 
-		sys.stdout.write(data.decode() if issubclass(type(data),bytes) else data)
+		for d in chunks:
+			sys.stdout.write(d if isinstance(d,str) else bytes(d).decode())
 
 	def do_file(outfile,ask_write_prompt):
 		if opt.outdir and not ignore_opt_outdir and not os.path.isabs(outfile):
@@ -648,13 +721,26 @@ def write_data_to_file( outfile,data,desc='data',
 
 		# To maintain portability, always open files in binary mode
 		# If 'binary' option not set, encode/decode data before writing and after reading
-		f = open_file_or_exit(outfile,'wb')
+		# Streamed data goes to a temporary file, which replaces 'outfile' only once the stream
+		# is exhausted, so that an error raised by the data source leaves no partial output
+		fn = outfile + '.tmp' if streamed else outfile
+		f = open_file_or_exit(fn,'wb')
 
 		try:
-			f.write(data if binary else data.encode())
-		except:
-			die(2,"Failed to write {} to file '{}'".format(desc,outfile))
-		f.close
+			for d in chunks:
+				try:
+					f.write(d if binary else d.encode())
+				except OSError:
+					die(2,"Failed to write {} to file '{}'".format(desc,outfile))
+			f.close()
+			if streamed:
+				os.replace(fn,outfile)
+		except BaseException:
+			f.close()
+			if streamed:
+				try: os.unlink(fn)
+				except OSError: pass
+			raise
 
 		if not (hush or quiet):
 			msg("{} written to file '{}'".format(capfirst(desc),outfile))
@@ -730,6 +816,20 @@ def get_data_from_file(infile,desc='data',dash=False,silent=False,binary=False,q
 
 	return data
 
+def get_mmap_from_file(infile,desc='data',quiet=False):
+	"""
+	Like get_data_from_file(binary=True), but return a read-only memory map of the file, which
+	isn't subject to the input size limit.  An empty file yields empty bytes
+	"""
+	if not opt.quiet and not quiet and desc:
+		qmsg("Getting {} from file '{}'".format(desc,infile))
+	import mmap
+	f = open_file_or_exit(infile,'rb')
+	try:
+		return mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b''
+	finally:
+		f.close() # the map remains valid
+
 def pwfile_reuse_warning():
 	if 'passwd_file_used' in globals():
 		qmsg("Reusing passphrase from file '{}' at user request".format(opt.passwd_file))
@@ -956,6 +1056,8 @@ def rpc_init_bitcoind():
 	if g.bob or g.alice:
 		from . import regtest as rt
 		rt.user(('alice','bob')[g.bob],quiet=True)
+	if g.rpc_cache_persist:
+		conn.cache.load(g.data_dir)
 	conn.daemon_version = int(conn.getnetworkinfo()['version'])
 	conn.coin_amt_type = (float,str)[conn.daemon_version>=120000]
 	g.chain = conn.getblockchaininfo()['chain']
@@ -82,8 +82,10 @@ setup(
 		py_modules = [
 			'mmgen.__init__',
 			'mmgen.addr',
+			'mmgen.addrcodec',
 			'mmgen.altcoin',
 			'mmgen.bech32',
+			'mmgen.chaincache',
 			'mmgen.color',
 			'mmgen.common',
 			'mmgen.crypto',
@@ -101,6 +103,8 @@ setup(
 			'mmgen.protocol',
 			'mmgen.regtest',
 			'mmgen.rpc',
+			'mmgen.rpccache',
+			'mmgen.secp256k1_fixedbase',
 			'mmgen.seed',
 			'mmgen.sha2',
 			'mmgen.term',
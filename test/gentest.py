@@ -38,10 +38,17 @@ opts_data = {
 		'options': """
 -h, --help       Print this help message
 -a, --all        Test all supported coins for external generator 'ext'
+-b, --benchmark  Run the benchmark suite (see BENCHMARKS below)
+-c, --compare=f  Compare benchmark results against baseline file 'f'
+-f, --filter=s   Run only the benchmarks whose names contain string 's'
 -k, --use-internal-keccak-module Force use of the internal keccak module
 --, --longhelp   Print help message for long options (common options)
+-o, --outfile=f  Save benchmark results to file 'f' in JSON format
 -q, --quiet      Produce quieter output
+-r, --reps=n     Run each benchmark 'n' times, reporting the best (default: 3)
 -t, --type=t     Specify address type (valid options: 'compressed','segwit','zcash_z')
+-T, --tolerance=n Report benchmarks more than 'n' percent slower than the
+                 baseline as regressions (default: 10)
 -v, --verbose    Produce more verbose output
 """,
 	'notes': """
@@ -52,10 +59,13 @@ opts_data = {
           where a and b are one of:
              '1' - native Python ecdsa library (very slow)
              '2' - bitcoincore.org's secp256k1 library (default from v0.8.6)
+             '3' - native Python fixed-base secp256k1 engine (fallback for '2')
 
 EXAMPLES:
   {prog} 1:2 100
     (compare output of native Python ECDSA with secp256k1 library, 100 rounds)
+  {prog} 3:2 100
+    (compare output of native Python fixed-base engine with secp256k1 library, 100 rounds)
   {prog} 2:ext 100
     (compare output of secp256k1 library with external library (see below), 100 rounds)
   {prog} 2 1000
@@ -63,6 +73,19 @@ EXAMPLES:
   {prog} 2 my.dump
     (compare addrs generated with secp256k1 library to {dn} wallet dump)
 
+BENCHMARKS:
+  {prog} -b [rounds]
+    (time key/address generation for each address type and available key
+    generator, plus seed scrambling, Base58Check/Bech32 encoding and decoding,
+    and address file formatting and parsing.  Rates are per second, measured
+    after a warm-up run.  Slow methods are run for a fraction of the rounds.
+    Default rounds: 1000)
+  {prog} -b -o bench.json
+    (save the results, with version and platform info, as a baseline)
+  {prog} -b -c bench.json
+    (compare results against the saved baseline, exiting with an error if
+    anything has regressed beyond the tolerance)
+
   External libraries required for the 'ext' generator:
     + pyethereum (for ETH,ETC)           https://github.com/ethereum/pyethereum
     + zcash-mini (for zcash_z addresses) https://github.com/FiloSottile/zcash-mini
@@ -84,6 +107,158 @@ sys.argv = [sys.argv[0]] + ['--skip-cfg-file'] + sys.argv[1:]
 
 cmd_args = opts.init(opts_data,add_opts=['exact_output','use_old_ed25519'])
 
+def run_benchmarks():
+
+	import time,json,platform
+	from mmgen.protocol import init_coin
+	from mmgen.addr import KeyGenerator,AddrGenerator,AddrList
+	from mmgen.obj import PrivKey,AddrIdxList
+	from mmgen.seed import Seed
+
+	try:
+		n = int(cmd_args[0]) if cmd_args else 1000
+		assert n > 0 and len(cmd_args) < 2
+	except:
+		die(1,'Benchmark mode takes one optional argument: a positive number of rounds')
+	reps = int(opt.reps or 3)
+	tolerance = float(opt.tolerance or 10)
+	results = {}
+	opt.quiet = True
+
+	def wanted(name):
+		return not opt.filter or opt.filter in name
+
+	def run(name,func,count,unit):
+		if not wanted(name):
+			return
+		msg_r('{:32} '.format(name))
+		func() # warm-up: builds lookup tables, imports modules, etc.
+		times = []
+		for i in range(reps):
+			start = time.time()
+			func()
+			times.append(time.time() - start)
+		results[name] = count / max(min(times),1e-9)
+		msg('{:>12.1f} {}'.format(results[name],unit))
+
+	def skip(name,reason):
+		if wanted(name):
+			msg('{:32} {:>12} ({})'.format(name,'skipped',reason))
+
+	def addrgen_bench(name,mmtype,count,generator=None):
+		if not wanted(name):
+			return
+		kg = KeyGenerator(mmtype,generator,silent=True)
+		if generator == 2 and type(kg).__name__ != 'KeyGeneratorSecp256k1':
+			return skip(name,'secp256k1 extension not available')
+		ag = AddrGenerator(mmtype)
+		privkeys = [bytes.fromhex(PrivKey(os.urandom(32),compressed=mmtype.compressed,pubkey_type=mmtype.pubkey_type))
+						for i in range(count)]
+		def func():
+			ag.to_addr_bin_batch(kg.to_pubkey_bin_batch(privkeys,mmtype.compressed))
+		run(name,func,count,'keys/s')
+
+	init_coin('btc')
+	for t in ('L','C','S','B'):
+		for gen in (1,2,3):
+			addrgen_bench('addrgen:btc:{}:{}'.format(t,g.key_generators[gen-1]),
+							MMGenAddrType(t),(n,n//10)[gen==1] or 1,gen)
+
+	init_coin('eth')
+	for internal in (True,False):
+		name = 'addrgen:eth:E:keccak-{}'.format(('pysha3','internal')[internal])
+		if not internal:
+			try: import sha3
+			except: skip(name,'pysha3 not available'); continue
+		g.use_internal_keccak_module = internal
+		addrgen_bench(name,MMGenAddrType('E'),n)
+
+	init_coin('zec')
+	try:
+		import nacl
+	except:
+		skip('addrgen:zec:Z','nacl not available')
+	else:
+		addrgen_bench('addrgen:zec:Z',MMGenAddrType('Z'),n)
+
+	init_coin('xmr')
+	g.use_internal_keccak_module = True
+	for old in (False,True):
+		opt.use_old_ed25519 = old
+		addrgen_bench('addrgen:xmr:M:ed25519-{}'.format(('table','old')[old]),MMGenAddrType('M'),(n,n//100)[old] or 1)
+	opt.use_old_ed25519 = False
+
+	init_coin('btc')
+	from mmgen.crypto import scramble_seed
+	seed_bytes = os.urandom(32)
+	def func():
+		for i in range(n):
+			scramble_seed(seed_bytes,'bench{}'.format(i).encode(),g.scramble_hash_rounds)
+	run('scramble_seed',func,n,'seeds/s')
+
+	from mmgen import addrcodec
+	payloads = [b'\x00' + os.urandom(20) for i in range(n)]
+	b58addrs = addrcodec.b58chk_encode_many(payloads)
+	b32addrs = addrcodec.bech32_encode_many('bc',0,[p[1:] for p in payloads])
+	run('codec:b58chk_encode',lambda: addrcodec.b58chk_encode_many(payloads),n,'addrs/s')
+	run('codec:b58chk_decode',lambda: addrcodec.b58chk_verify_many(b58addrs),n,'addrs/s')
+	run('codec:bech32_encode',lambda: addrcodec.bech32_encode_many('bc',0,[p[1:] for p in payloads]),n,'addrs/s')
+	run('codec:bech32_decode',lambda: addrcodec.bech32_verify_many('bc',b32addrs),n,'addrs/s')
+
+	if wanted('addrlist:'):
+		seed = Seed(seed_bytes)
+		idxs = AddrIdxList('1-{}'.format(n))
+		al = AddrList(seed=seed,addr_idxs=idxs,mmtype=MMGenAddrType('C'))
+		run('addrlist:generate:C',lambda: AddrList(seed=seed,addr_idxs=idxs,mmtype=MMGenAddrType('C')),n,'addrs/s')
+		run('addrlist:format',al.format,n,'addrs/s')
+		import tempfile
+		with tempfile.TemporaryDirectory() as tmpdir:
+			fn = os.path.join(tmpdir,'bench.addrs')
+			with open(fn,'w') as fp:
+				fp.write(al.fmt_data)
+			run('addrlist:parse_file',lambda: AddrList(addrfile=fn),n,'addrs/s')
+
+	data = {
+		'mmgen_version': g.version,
+		'python_version': platform.python_version(),
+		'platform': platform.platform(),
+		'timestamp': int(time.time()),
+		'rounds': n,
+		'reps': reps,
+		'results': { k: round(v,1) for k,v in results.items() } }
+
+	if opt.outfile:
+		with open(opt.outfile,'w') as fp:
+			json.dump(data,fp,indent=1,sort_keys=True)
+		msg('Benchmark results written to file {!r}'.format(opt.outfile))
+
+	if opt.compare:
+		try:
+			base = json.load(open(opt.compare))
+			base_results = base['results']
+		except Exception as e:
+			die(1,'{}: unable to load baseline file: {}'.format(opt.compare,e))
+		msg('\nComparison with baseline {!r} (MMGen {}, Python {}):'.format(
+			opt.compare,base.get('mmgen_version','?'),base.get('python_version','?')))
+		fs = '{:32} {:>12} {:>12} {:>8}  {}'
+		msg(fs.format('Benchmark','Baseline','Current','Change',''))
+		regressions = []
+		for k in sorted(results):
+			if k not in base_results: continue
+			chg = (results[k] / base_results[k] - 1) * 100
+			bad = chg < -tolerance
+			if bad: regressions.append(k)
+			msg(fs.format(k,base_results[k],'{:.1f}'.format(results[k]),'{:+.1f}%'.format(chg),
+				red('REGRESSION') if bad else ''))
+		if regressions:
+			die(1,'{} benchmark{} slower than baseline by more than {}%'.format(
+				len(regressions),suf(regressions),tolerance))
+		msg(green('No regressions'))
+
+if opt.benchmark:
+	run_benchmarks()
+	sys.exit(0)
+
 if not 1 <= len(cmd_args) <= 2: opts.usage()
 
 addr_type = MMGenAddrType(opt.type or g.proto.dfl_mmtype)
@@ -185,6 +360,7 @@ def compare_test():
 		return
 	qmsg(green(m.format(A,B,g.coin)))
 
+	secs = []
 	for i in range(rounds):
 		if opt.verbose or time.time() - last_t >= 0.1:
 			qmsg_r('\rRound {}/{} '.format(i+1,rounds))
@@ -206,10 +382,16 @@ def compare_test():
 				match_error(sec,sec.wif,sec.wif,b_wif,a,b)
 		else:
 			b_addr = ag.to_addr(kg_b.to_pubhex(sec))
+			secs.append((sec,b_addr))
 		vmsg('\nkey:  {}\naddr: {}\n'.format(sec.wif,a_addr))
 		if a_addr != b_addr:
 			match_error(sec,sec.wif,a_addr,b_addr,a,ext_lib if b == 'ext' else b)
 	qmsg_r('\rRound {}/{} '.format(i+1,rounds))
+	if secs: # check the batch interface too
+		for (sec,b_addr),ph in zip(secs,kg_a.to_pubhex_batch([e[0] for e in secs])):
+			a_addr = ag.to_addr(ph)
+			if a_addr != b_addr:
+				match_error(sec,sec.wif,a_addr,b_addr,a,b)
 	qmsg(green(('\n','')[bool(opt.verbose)] + 'OK'))
 
 def speed_test():
@@ -79,6 +79,8 @@ class TestHashFunc(object):
 			self.compare_hashes(dlen,os.urandom(dlen))
 		msg('OK\n')
 
+	def test_batch(self,rounds): pass
+
 class TestKeccak(TestHashFunc):
 	desc = 'keccak_256'
 	def __init__(self):
@@ -89,6 +91,17 @@ class TestKeccak(TestHashFunc):
 
 	def test_constants(self): pass
 
+	def test_batch(self,rounds):
+		msg('Testing batch hashing:        ')
+		from mmgen.keccak import keccak_256_many
+		data = [os.urandom(n*7 % 1000) for n in range(rounds)]
+		for d,ret in zip(data,keccak_256_many(data)):
+			ref = self.hashlib.keccak_256(d).digest()
+			if ret != ref:
+				m ='\nHashes do not match!\nReference {d}: {}\nMMGen {d}:     {}'
+				die(3,m.format(ref.hex(),ret.hex(),d=self.desc.upper()))
+		msg('OK\n')
+
 class TestSha2(TestHashFunc):
 
 	def __init__(self):
@@ -97,6 +110,21 @@ class TestSha2(TestHashFunc):
 		self.t_cls = { 'sha256':Sha256, 'sha512':Sha512 }[self.desc]
 		self.hashlib = hashlib
 
+	def test_batch(self,rounds):
+		"single-block messages padded by hand, so compressing them must yield the standard hash"
+		msg('Testing batch compression:    ')
+		bs = self.t_cls.blkSize
+		lsize = bs // 8
+		data = [os.urandom(n % (bs - lsize)) for n in range(rounds)]
+		blocks = [d + b'\x80' + bytes(bs - lsize - 1 - len(d)) + (len(d)*8).to_bytes(lsize,'big')
+					for d in data]
+		for d,ret in zip(data,self.t_cls.compress_blocks(blocks)):
+			sha2_ref = getattr(self.hashlib,self.desc)(d).digest()
+			if ret != sha2_ref:
+				m ='\nHashes do not match!\nReference {d}: {}\nMMGen {d}:     {}'
+				die(3,m.format(sha2_ref.hex(),ret.hex(),d=self.desc.upper()))
+		msg('OK\n')
+
 class TestSha256(TestSha2):
 	desc = 'sha256'
 	H_ref = (
@@ -139,3 +167,4 @@ msg(green('Testing internal implementation of {}\n'.format(t.desc)))
 t.test_constants()
 t.test_ref()
 t.test_random(random_rounds)
+t.test_batch(random_rounds)
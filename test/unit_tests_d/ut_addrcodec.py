@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+test/unit_tests_d/ut_addrcodec: address codec unit test for the MMGen suite
+"""
+
+from mmgen.common import *
+
+class addrcodec(object):
+
+	def run_test(self,name):
+		import random
+		from hashlib import sha256
+		from mmgen import addrcodec as ac, bech32
+
+		def b58chk_encode_ref(data): # straightforward reference implementation
+			data += sha256(sha256(data).digest()).digest()[:4]
+			n,s = int.from_bytes(data,'big'),''
+			while n:
+				n,r = divmod(n,58)
+				s = ac.b58a[r] + s
+			return '1' * (len(data) - len(data.lstrip(b'\x00'))) + s
+
+		rounds = (1000,100)[bool(opt.fast)]
+
+		msg_r('Testing Base58Check codec...')
+		payloads = [bytes(random.randrange(3)) + os.urandom(random.randrange(1,40)) for i in range(rounds)]
+		addrs = ac.b58chk_encode_many(payloads)
+		assert addrs == [b58chk_encode_ref(d) for d in payloads]
+		assert ac.b58chk_verify_many(addrs) == payloads
+		bad = [a[:-1] + ('1','2')[a[-1]=='1'] for a in addrs[:10]] + ['1BoatSLRHtKNngkdXEeobR76b53LETtpy0']
+		assert ac.b58chk_verify_many(bad) == [None] * len(bad)
+		msg('OK')
+
+		msg_r('Testing Bech32 codec...')
+		for hrp in ('bc','tb','ltc'):
+			progs = [os.urandom(random.choice((20,32))) for i in range(rounds // 10)]
+			addrs = ac.bech32_encode_many(hrp,0,progs)
+			assert addrs == [bech32.encode(hrp,0,list(p)) for p in progs]
+			assert ac.bech32_verify_many(hrp,addrs) == [(0,p) for p in progs]
+			assert ac.bech32_verify_many(hrp,[a.upper() for a in addrs]) == [(0,p) for p in progs]
+			for a in addrs: # single-character substitutions
+				n = random.randrange(len(a))
+				b = a[:n] + random.choice(bech32.CHARSET + 'bB1') + a[n+1:]
+				ref = bech32.decode(hrp,b)
+				assert ac.bech32_decode(hrp,b) == (ref[0],None if ref[1] is None else bytes(ref[1])),b
+		msg('OK')
+
+		return True
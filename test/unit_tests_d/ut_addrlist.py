@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+test/unit_tests_d/ut_addrlist: address list unit test for the MMGen suite
+"""
+
+from mmgen.common import *
+
+class addrlist(object):
+
+	def run_test(self,name):
+		from mmgen.seed import Seed
+		from mmgen.addr import AddrList,KeyAddrList,PasswordList
+		from mmgen.obj import AddrIdxList,MMGenAddrType
+
+		seed = Seed(bytes.fromhex('deadbeef' * 8))
+
+		def parallel_gen():
+			msg_r('Testing parallel address generation...')
+			qsave,opt.quiet = opt.quiet,True
+			idxs = AddrIdxList('1-20,99,1001-1010')
+			for mmtype in map(MMGenAddrType,('L','C','S','B')):
+				for cls in (AddrList,KeyAddrList):
+					opt.jobs = None
+					a = cls(seed=seed,addr_idxs=idxs,mmtype=mmtype)
+					opt.jobs = 3
+					b = cls(seed=seed,addr_idxs=idxs,mmtype=mmtype)
+					assert a.chksum == b.chksum, (a.chksum,b.chksum)
+					a.format(); b.format()
+					assert a.fmt_data == b.fmt_data, mmtype
+			for jobs in (None,2):
+				opt.jobs = jobs
+				p = PasswordList(seed=seed,pw_idxs=idxs,pw_id_str='foo',pw_len=None,pw_fmt='b58')
+				p.format()
+				if jobs: assert p.fmt_data == fmt_data
+				fmt_data = p.fmt_data
+			opt.jobs,opt.quiet = None,qsave
+			msg('OK')
+
+		def stream_gen():
+			msg_r('Testing streamed address file generation...')
+			qsave,opt.quiet = opt.quiet,True
+			from mmgen.crypto import mmgen_encrypt_stream,encrypt_data
+			from hashlib import sha256
+			idxs = AddrIdxList('1-5,500-520')
+			for mmtype in map(MMGenAddrType,('L','S')):
+				a = KeyAddrList(seed=seed,addr_idxs=idxs,mmtype=mmtype)
+				b = KeyAddrList(seed=seed,addr_idxs=idxs,mmtype=mmtype,stream=True)
+				assert not b.data
+				assert a.chksum == b.chksum, (a.chksum,b.chksum)
+				a.format(); b.format()
+				assert a.fmt_data == ''.join(b.get_stream_data()), mmtype
+			b.spool.read_chunk_size = 100 # multiple chunks
+			params = (os.urandom(32),os.urandom(16),os.urandom(32),os.urandom(32))
+			salt,iv,nonce,key = params
+			d = a.fmt_data.encode()
+			chk = salt + iv + encrypt_data(sha256(nonce+d).digest()+nonce+d,key,iv)
+			b.enc_params,b.enc_desc = params,'key list'
+			assert b''.join(b.get_stream_data()) == chk
+			opt.quiet = qsave
+			msg('OK')
+
+		def indexes():
+			msg_r('Testing address list indexes...')
+			qsave,opt.quiet = opt.quiet,True
+			from mmgen.addr import AddrData
+			al = AddrList(seed=seed,addr_idxs=AddrIdxList('1-10'),mmtype=MMGenAddrType('C'))
+			for e in al.data:
+				assert al.entry(e.idx) is e
+				assert al.coinaddr(e.idx) == e.addr
+			assert al.entry(11) == None
+			al.set_comment(3,'foo')
+			assert al.comment(3) == 'foo'
+			addrs = al.coinaddrs()
+			d = al.make_reverse_dict(addrs[2:4] + ['1BoatSLRHtKNngkdXEeobR76b53LETtpyT'])
+			assert list(d) == addrs[2:4] and d[addrs[2]] == (al.al_id+':3','foo')
+			ad = AddrData()
+			ad.add(al)
+			assert ad.coinaddr2mmaddr(addrs[4]) == al.al_id+':5'
+			al.data.pop(4) # index must be rebuilt after mutation
+			assert al.entry(5) == None and al.entry(6).addr == addrs[5]
+			assert ad.coinaddr2mmaddr('1BoatSLRHtKNngkdXEeobR76b53LETtpyT') == None
+			opt.quiet = qsave
+			msg('OK')
+
+		def keylist_merge():
+			msg_r('Testing keylist merge...')
+			qsave,opt.quiet = opt.quiet,True
+			kal = KeyAddrList(seed=seed,addr_idxs=AddrIdxList('1-10'),mmtype=MMGenAddrType('C'))
+			kl = KeyAddrList(keylist=[e.sec.wif for e in kal.data[5:]] + [kal.data[0].sec.wif])
+			kl.generate_addrs_from_keys()
+			assert sorted(kl.coinaddrs()) == sorted(kal.coinaddrs()[5:] + [kal.data[0].addr])
+			tmp = KeyAddrList(addrlist=kal.coinaddrs()[4:8])
+			assert tmp.merge_keylist(kl) == [kal.data[4].addr]
+			assert {e.addr:e.sec for e in tmp.data if e.sec} == {e.addr:e.sec for e in kal.data[5:8]}
+			kl.remove_dup_keys(KeyAddrList(seed=seed,addr_idxs=AddrIdxList('1-7'),mmtype=MMGenAddrType('C')))
+			assert sorted(kl.coinaddrs()) == sorted(kal.coinaddrs()[7:])
+			opt.quiet = qsave
+			msg('OK')
+
+		def verify_keys():
+			msg_r('Testing parallel key verification...')
+			qsave,opt.quiet = opt.quiet,True
+			kal = KeyAddrList(seed=seed,addr_idxs=AddrIdxList('1-50'),mmtype=MMGenAddrType('S'))
+			kal.verify_mp_min = 1
+			from mmgen.addr import AddrListEntry
+			bad = [AddrListEntry(idx=e.idx,addr=e.addr,sec=(e.sec,kal.data[0].sec)[e.idx==31])
+						for e in kal.data]
+			for jobs in (1,3):
+				opt.jobs = jobs
+				kal.verify_keys(kal.data)
+				try:
+					kal.verify_keys(bad)
+				except AssertionError as e:
+					assert kal.data[30].addr in e.args[0]
+				else:
+					raise AssertionError('key mismatch not detected')
+			opt.jobs,opt.quiet = None,qsave
+			msg('OK')
+
+		def key_cache():
+			msg_r('Testing txsign key cache...')
+			qsave,opt.quiet = opt.quiet,True
+			import mmgen.txsign as ts
+			ts.key_cache = {}
+			mmtype = MMGenAddrType('C')
+			ref = KeyAddrList(seed=seed,addr_idxs=AddrIdxList('1-8'),mmtype=mmtype)
+			for idxs in ([2,5],[1,2,5,8],[1,3,4,6,7,8]):
+				kal = ts.get_cached_kal(seed,idxs,mmtype)
+				assert kal.al_id == ref.al_id
+				for idx in idxs:
+					assert kal.entry(idx).sec == ref.entry(idx).sec and kal.entry(idx).addr == ref.entry(idx).addr
+			assert len(ts.key_cache) == 8
+			ts.key_cache = None
+			opt.quiet = qsave
+			msg('OK')
+
+		parallel_gen()
+		stream_gen()
+		indexes()
+		keylist_merge()
+		verify_keys()
+		key_cache()
+
+		return True
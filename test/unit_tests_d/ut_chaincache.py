@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+test/unit_tests_d/ut_chaincache: seed chain checkpoint cache unit test for the MMGen suite
+"""
+
+from mmgen.common import *
+
+class chaincache(object):
+
+	def run_test(self,name):
+		import tempfile,shutil
+		from hashlib import sha512
+		from mmgen.seed import Seed
+		from mmgen.addr import AddrList
+		from mmgen.obj import AddrIdxList,MMGenAddrType
+		from mmgen.chaincache import ChainCheckpointCache as CC
+
+		save = g.data_dir_root,g.chain_ckpt_interval,g.chain_ckpt_max_size,g.stderr,opt.quiet
+		g.data_dir_root = tempfile.mkdtemp()
+		opt.quiet = True
+		seed = Seed(bytes.fromhex('deadbeef' * 8))
+		idxs = AddrIdxList('1-3,250,1001-1003')
+
+		def chain(scr_seed,rounds): # reference: the chain state after 'rounds' rounds
+			for i in range(rounds): scr_seed = sha512(scr_seed).digest()
+			return scr_seed
+
+		try:
+			msg_r('Testing round trip against the uncached seed chain...')
+			g.chain_ckpt_interval = 0
+			ref = AddrList(seed=seed,addr_idxs=idxs,mmtype=MMGenAddrType('C'))
+			assert CC.get_files() == []
+			g.chain_ckpt_interval = 100
+			for i in (1,2): # first run writes the checkpoints, second resumes from them
+				al = AddrList(seed=seed,addr_idxs=idxs,mmtype=MMGenAddrType('C'))
+				assert al.chksum == ref.chksum, i
+				assert len(CC.get_files(seed.sid)) == 1
+			msg('OK')
+
+			msg_r('Testing resumption from a checkpoint...')
+			scr_seed = os.urandom(64)
+			c = CC(seed.sid,scr_seed)
+			for n in range(1,451):
+				c.add(n,chain(scr_seed,n) if not n % 100 else None)
+			assert sorted(c.ckpts) == [100,200,300,400]
+			c.save()
+			c2 = CC(seed.sid,scr_seed)
+			assert c2.ckpts == c.ckpts
+			assert c2.get_start(250) == (200,chain(scr_seed,200))
+			assert c2.get_start(100) is None # checkpoints strictly precede the index
+			secs = list(ref.gen_secs(scr_seed,[1,250,420],c2))
+			assert secs == list(ref.gen_secs(scr_seed,[1,250,420]))
+			msg('OK')
+
+			msg_r('Testing rejection of corrupted and wrong-key cache files...')
+			g.stderr = open(os.devnull,'w')
+			data = open(c.fn,'rb').read()
+			open(c.fn,'wb').write(data[:-1] + bytes([data[-1]^1]))
+			assert CC(seed.sid,scr_seed).ckpts == {}
+			other = os.urandom(64)
+			open(CC(seed.sid,other).fn,'wb').write(data) # file encrypted with another seed's key
+			assert CC(seed.sid,other).ckpts == {}
+			g.stderr = save[3]
+			msg('OK')
+
+			msg_r('Testing eviction at the size limit...')
+			CC.purge()
+			fns = []
+			for i in range(4):
+				s = os.urandom(64)
+				c = CC('{:08X}'.format(i),s)
+				c.add(100,chain(s,100))
+				c.save()
+				fns.append(c.fn)
+				t = time.time() - 100 + i
+				os.utime(c.fn,(t,t))
+			size = os.stat(fns[0]).st_size
+			g.chain_ckpt_max_size = size * 2
+			CC.evict(keep=fns[0]) # least recently used, but kept
+			assert sorted(CC.get_files()) == sorted([fns[0],fns[3]]), CC.get_files()
+			msg('OK')
+
+			msg_r('Testing purge...')
+			assert CC.purge('00000003') == 1
+			assert CC.get_files() == [fns[0]]
+			assert CC.purge() == 1 and CC.get_files() == []
+			msg('OK')
+		finally:
+			shutil.rmtree(g.data_dir_root)
+			g.data_dir_root,g.chain_ckpt_interval,g.chain_ckpt_max_size,g.stderr,opt.quiet = save
+
+		return True
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+test/unit_tests_d/ut_mmenc: chunked encryption format unit test for the MMGen suite
+"""
+
+from mmgen.common import *
+
+class mmenc(object):
+
+	def run_test(self,name):
+		import tempfile,shutil
+		from mmgen.crypto import mmgen_encrypt,mmgen_encrypt_chunked,mmgen_decrypt_chunked,mmgen_decrypt,_mac_len
+
+		cs = 1024
+		tmpdir = tempfile.mkdtemp()
+		pw_fn = os.path.join(tmpdir,'passwd')
+		save = opt.passwd_file,opt.usr_randchars,opt.quiet
+		opt.usr_randchars,opt.quiet = 0,True
+
+		def set_pw(pw):
+			open(pw_fn,'w').write(pw+'\n')
+			opt.passwd_file = pw_fn
+
+		def encrypt(data):
+			return b''.join(mmgen_encrypt_chunked(data,'test data','1',chunk_size=cs))
+
+		def decrypt(enc):
+			ret = mmgen_decrypt_chunked(enc,'test data','1')
+			return ret and b''.join(ret)
+
+		def must_die(enc):
+			stderr_save,g.stderr = g.stderr,open(os.devnull,'w')
+			try: decrypt(enc)
+			except SystemExit as e: assert e.code == 2
+			else: assert False, 'bad data accepted'
+			finally: g.stderr = stderr_save
+
+		try:
+			set_pw('abc def')
+			msg_r('Testing chunked encryption round trip...')
+			for size in (0,1,cs-1,cs,cs+1,3*cs,3*cs+100):
+				data = os.urandom(size)
+				enc = encrypt(data)
+				assert decrypt(enc) == data, size
+				assert mmgen_decrypt(enc,'test data','1') == data, size
+			msg('OK')
+
+			msg_r('Testing recognition of the chunked and original formats...')
+			data = os.urandom(3*cs)
+			enc1,enc2 = encrypt(data),encrypt(data)
+			hl = len(enc1) - 3*(cs+_mac_len) - _mac_len
+			assert enc1[hl-4:hl] != enc2[hl-4:hl] # no constant header fields
+			for size in (0,1,3*cs):
+				enc = mmgen_encrypt(data[:size],'test data','1')
+				assert decrypt(enc) == data[:size], size
+				assert mmgen_decrypt(enc,'test data','1') == data[:size], size
+			set_pw('wrong passphrase')
+			stderr_save,g.stderr = g.stderr,open(os.devnull,'w')
+			assert decrypt(enc) == False and decrypt(enc1) == False
+			g.stderr = stderr_save
+			set_pw('abc def')
+			msg('OK')
+
+			msg_r('Testing tamper, truncation and extension detection...')
+			data = os.urandom(3*cs+100)
+			enc = encrypt(data)
+			rec_len = cs + _mac_len
+			hdr_len = len(enc) - 3*rec_len - (100+_mac_len)
+			for pos in (hdr_len+10,hdr_len+rec_len+5,len(enc)-1): # flip a byte in each chunk
+				must_die(enc[:pos] + bytes([enc[pos]^1]) + enc[pos+1:])
+			for n in (1,50,100+_mac_len,100+_mac_len+1,rec_len+100+_mac_len): # truncate
+				must_die(enc[:-n])
+			for ext in (b'\x00',os.urandom(_mac_len),os.urandom(rec_len)):
+				must_die(enc + ext)
+			small = encrypt(b'x' * 100) # truncation within the only chunk
+			for n in (1,50,100+_mac_len-1):
+				must_die(small[:-n])
+			set_pw('wrong passphrase')
+			stderr_save,g.stderr = g.stderr,open(os.devnull,'w')
+			assert decrypt(enc) == False
+			g.stderr = stderr_save
+			msg('OK')
+
+			msg_r('Testing that failed streamed decryption leaves no output file...')
+			set_pw('abc def')
+			bad = enc[:-1] + bytes([enc[-1]^1])
+			outfile = os.path.join(tmpdir,'dec')
+			stderr_save,g.stderr = g.stderr,open(os.devnull,'w')
+			try: write_data_to_file(outfile,mmgen_decrypt_chunked(bad,'test data','1'),binary=True,quiet=True)
+			except SystemExit as e: assert e.code == 2
+			else: assert False
+			finally: g.stderr = stderr_save
+			assert os.listdir(tmpdir) == ['passwd'], os.listdir(tmpdir)
+			write_data_to_file(outfile,mmgen_decrypt_chunked(enc,'test data','1'),binary=True,quiet=True)
+			assert open(outfile,'rb').read() == data and sorted(os.listdir(tmpdir)) == ['dec','passwd']
+			msg('OK')
+		finally:
+			opt.passwd_file,opt.usr_randchars,opt.quiet = save
+			shutil.rmtree(tmpdir)
+
+		return True
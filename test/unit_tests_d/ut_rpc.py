@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+test/unit_tests_d/ut_rpc: RPC client unit test for the MMGen suite
+"""
+
+from mmgen.common import *
+
+class StubRPCServer(object):
+	"""
+	Minimal JSON-RPC server for testing, run in background threads.  Methods are served
+	from the 'methods' dict.  The client ports of incoming connections are recorded in
+	'clients', and the greatest number of requests handled at once in 'max_active'.  If
+	'drop_connections' is set, each connection is closed after one response without
+	notifying the client, leaving it with a stale keep-alive connection.
+	"""
+	def __init__(self,methods):
+		import json,threading
+		from http.server import HTTPServer,BaseHTTPRequestHandler
+		from socketserver import ThreadingMixIn
+		srv = self
+		self.methods = methods
+		self.clients = []
+		self.drop_connections = False
+		self.active = self.max_active = 0
+		lock = threading.Lock()
+
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = 'HTTP/1.1'
+			def log_message(self,*args): pass
+			def do_POST(self):
+				if self.client_address[1] not in srv.clients:
+					srv.clients.append(self.client_address[1])
+				req = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode())
+				def call(r):
+					return {'id':r['id'],'error':None,'result':srv.methods[r['method']](*r['params'])}
+				with lock:
+					srv.active += 1
+					srv.max_active = max(srv.max_active,srv.active)
+				data = json.dumps([call(r) for r in req] if type(req) == list else call(req)).encode()
+				with lock:
+					srv.active -= 1
+				self.send_response(200)
+				self.send_header('Content-Type','application/json')
+				self.send_header('Content-Length',str(len(data)))
+				self.end_headers()
+				self.wfile.write(data)
+				self.close_connection = srv.drop_connections
+
+		class Server(ThreadingMixIn,HTTPServer):
+			daemon_threads = True
+			def handle_error(self,request,client_address): pass # e.g. client gone after a timeout
+
+		self.server = Server(('127.0.0.1',0),Handler)
+		self.port = self.server.server_address[1]
+		t = threading.Thread(target=self.server.serve_forever)
+		t.daemon = True
+		t.start()
+
+	def stop(self):
+		self.server.shutdown()
+		self.server.server_close()
+
+class rpc(object):
+
+	def run_test(self,name):
+		from mmgen.rpc import CoinDaemonRPCConnection
+
+		def getbalance(addr):
+			time.sleep(0.01)
+			return hex(int(addr,16) * 7)
+
+		srv = StubRPCServer({
+			'getblockcount': lambda: 1000,
+			'getbestblockhash': lambda: '00' * 32,
+			'getblockhash':  lambda n: '{:064x}'.format(n),
+			'eth_getBalance': getbalance })
+		rpch = CoinDaemonRPCConnection('127.0.0.1',srv.port,'user','passwd')
+
+		def keepalive():
+			msg_r('Testing keep-alive connection reuse...')
+			for i in range(20):
+				assert rpch.getblockcount(nocache=True) == 1000
+			assert rpch.getblockhash([[n] for n in range(10)],batch=True) == ['{:064x}'.format(n) for n in range(10)]
+			assert len(srv.clients) == 1, srv.clients
+			msg('OK')
+
+		def reconnect():
+			msg_r('Testing reconnection on stale connections...')
+			srv.drop_connections = True
+			for i in range(5):
+				assert rpch.getblockhash(i) == '{:064x}'.format(i)
+			assert len(srv.clients) == 5, srv.clients # first request reuses the existing connection
+			srv.drop_connections = False
+			calls = []
+			srv.methods['slow'] = lambda: calls.append(1) or time.sleep(1)
+			assert rpch.getblockhash(0) # leave a connection in the pool
+			try: rpch.request('slow',timeout=0.3)
+			except RPCFailure: pass
+			else: assert False
+			time.sleep(1)
+			assert calls == [1], calls # a timed-out request is never resent
+			msg('OK')
+
+		def gather():
+			msg_r('Testing concurrent requests...')
+			addrs = ['{:040x}'.format(n) for n in range(100)]
+			ret = rpch.gather('eth_getBalance',[(a,) for a in addrs],max_concurrency=4)
+			assert ret == [hex(n*7) for n in range(100)]
+			assert 1 < srv.max_active <= 4, srv.max_active
+			calls = []
+			srv.methods['slow'] = lambda: calls.append(1) or time.sleep(1)
+			async def slow_after_fast(client):
+				await client.request('getblockhash',0) # leave a connection in the pool
+				return await client.request('slow')
+			try: rpch.run_async(slow_after_fast,timeout=0.3)
+			except RPCFailure: pass
+			else: assert False
+			time.sleep(1)
+			assert calls == [1], calls # a timed-out request is never resent
+			srv.drop_connections = True
+			async def sequential(client):
+				return [await client.request('getblockhash',n) for n in range(3)]
+			assert rpch.run_async(sequential) == ['{:064x}'.format(n) for n in range(3)] # stale: retried
+			srv.drop_connections = False
+			msg('OK')
+
+		def chunked_batch():
+			msg_r('Testing chunked batch requests...')
+			prog = []
+			ret = rpch.getblockhash([[n] for n in range(50)],batch=True,chunk_size=7,
+						progress=lambda n,total: prog.append((n,total)))
+			assert ret == ['{:064x}'.format(n) for n in range(50)]
+			assert len(prog) == 8 and prog[-1] == (50,50) and prog == sorted(prog), prog # one call per chunk
+			assert rpch.getblockhash([[n] for n in range(5)],batch=True,chunk_size=7,
+						progress=lambda n,total: prog.append(None)) == ret[:5] # below chunk size
+			assert None not in prog
+			srv.methods['importaddress'] = lambda addr,lbl,rescan: time.sleep(0.01)
+			srv.max_active = 0
+			assert rpch.importaddress([[str(n),'',False] for n in range(50)],batch=True,chunk_size=7) == [None] * 50
+			assert srv.max_active == 1, srv.max_active # serialized by the daemon, so sent one at a time
+			msg('OK')
+
+		def stream():
+			msg_r('Testing streaming JSON decoding...')
+			from mmgen.rpc import iter_json_result,parse_satoshis
+			import json,io
+			assert [parse_satoshis(a) for a in ('0','1','0.1','20999999.99999999','1e-8','1.5E2','0.00001000')] == \
+					[0,100000000,10000000,2099999999999999,1,15000000000,1000]
+			from decimal import Decimal
+			items = [{'txid':'{:064x}'.format(n),'amount':n / 1000,'label':'\u00e4'*(n%5)} for n in range(3000)]
+			data = json.dumps({'result':items,'error':None,'id':1}).encode()
+			for read_size in (1,7,4096):
+				ret = list(iter_json_result(io.BytesIO(data).read,read_size=read_size))
+				assert [d['amount'] for d in ret] == [Decimal(n) / 1000 for n in range(3000)], read_size
+				assert [d['label'] for d in ret] == [d['label'] for d in items], read_size
+			ret = iter_json_result(io.BytesIO(data).read,parse_satoshis)
+			assert [d['amount'] for d in ret] == [n * 100000 for n in range(3000)]
+			for bad in (data[:-10],b'{"result":null,"error":{"code":-1},"id":1}',b'{"result":[1 2]}'):
+				try: list(iter_json_result(io.BytesIO(bad).read,read_size=100))
+				except RPCFailure: pass
+				else: assert False, bad
+			nclients = len(srv.clients)
+			srv.methods['listunspent'] = lambda minconf: items
+			ret = rpch.listunspent(0,stream=True,satoshis=True)
+			assert [d['amount'] for d in ret] == [n * 100000 for n in range(3000)]
+			assert rpch.getblockhash(1) == '{:064x}'.format(1)
+			assert len(srv.clients) == nclients, srv.clients # connection returned to pool
+			msg('OK')
+
+		def cache():
+			msg_r('Testing RPC response cache...')
+			import tempfile,shutil
+			from decimal import Decimal
+			from mmgen.rpccache import RPCResponseCache
+			calls,chain = [],{'height':1000}
+			def getblockcount():
+				calls.append('getblockcount')
+				return chain['height']
+			def getnetworkinfo():
+				calls.append('getnetworkinfo')
+				return {'relayfee':0.00001}
+			srv.methods.update({
+				'getblockcount':    getblockcount,
+				'getnetworkinfo':   getnetworkinfo,
+				'getbestblockhash': lambda: '{:064x}'.format(chain['height']) })
+			g.rpc_cache_check_interval,interval_save = 0,g.rpc_cache_check_interval
+			tmpdir = tempfile.mkdtemp()
+			try:
+				rpch.cache = RPCResponseCache(rpch)
+				rpch.cache.load(tmpdir)
+				assert [rpch.getblockcount() for i in range(3)] == [1000] * 3
+				assert [rpch.getnetworkinfo()['relayfee'] for i in range(3)] == [Decimal('0.00001')] * 3
+				assert calls == ['getblockcount','getnetworkinfo'], calls
+				assert rpch.getblockcount(nocache=True) == 1000 and len(calls) == 3
+				chain['height'] = 1001 # new block invalidates per-block entries only
+				assert rpch.getblockcount() == 1001
+				assert rpch.getnetworkinfo()['relayfee'] == Decimal('0.00001')
+				assert calls[3:] == ['getblockcount'], calls
+				assert rpch.cache.stats() == {'getblockcount':(2,2),'getnetworkinfo':(3,1)}, rpch.cache.stats()
+				rpch.cache = RPCResponseCache(rpch) # on-disk entries are reused by a new instance
+				rpch.cache.load(tmpdir)
+				assert rpch.getblockcount() == 1001 and rpch.getnetworkinfo()['relayfee'] == Decimal('0.00001')
+				assert len(calls) == 4 and rpch.cache.stats() == {'getblockcount':(1,0),'getnetworkinfo':(1,0)}
+				rpch.getnetworkinfo()['relayfee'] = 1 # callers get a copy
+				assert rpch.getnetworkinfo()['relayfee'] == Decimal('0.00001')
+				assert os.listdir(tmpdir) == ['rpc_cache-btc.json'], os.listdir(tmpdir) # no temp files left
+				rpch.cache = RPCResponseCache(rpch) # write failure is not fatal
+				stderr_save,g.stderr = g.stderr,open(os.devnull,'w')
+				rpch.cache.load(os.path.join(tmpdir,'nonexistent'))
+				assert rpch.getblockcount() == 1001 and rpch.cache.fn == None
+				g.stderr = stderr_save
+			finally:
+				g.rpc_cache_check_interval = interval_save
+				rpch.cache = RPCResponseCache(rpch)
+				shutil.rmtree(tmpdir)
+			msg('OK')
+
+		def amounts():
+			msg_r('Testing coin amount encoding...')
+			from decimal import Decimal
+			srv.methods['echo'] = lambda *args: list(args)
+			amt = g.proto.coin_amt('1.5')
+			assert rpch.request('echo',amt) == ['1.5']
+			rpch.coin_amt_type = float # set after connecting, as by rpc_init_bitcoind()
+			assert rpch.request('echo',amt) == [Decimal('1.5')]
+			del rpch.coin_amt_type
+			msg('OK')
+
+		keepalive()
+		amounts()
+		reconnect()
+		gather()
+		chunked_batch()
+		stream()
+		cache()
+
+		rpch.close()
+		srv.stop()
+		return True
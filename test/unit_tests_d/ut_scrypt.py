@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+test/unit_tests_d/ut_scrypt: scrypt key precomputation unit test for the MMGen suite
+"""
+
+from mmgen.common import *
+
+class scrypt(object):
+
+	def run_test(self,name):
+		from mmgen import crypto
+
+		params = [('passwd{}'.format(n),os.urandom(16),'1') for n in range(3)]
+		refs = [crypto.scrypt_hash_passphrase(*p) for p in params]
+
+		msg_r('Testing parallel scrypt key precomputation...')
+		assert crypto.precompute_scrypt_hashes(params,64*1024*1024,jobs=2) == 3
+		assert len(crypto.scrypt_key_cache) == 3
+		for p,ref in zip(params,refs):
+			assert crypto.scrypt_key_cache[(p[0].encode(),p[1],p[2],32)] == ref
+			assert crypto.scrypt_hash_passphrase(*p) == ref
+		assert crypto.scrypt_key_cache == {} # each key is used once
+		msg('OK')
+
+		msg_r('Testing fallback to serial computation...')
+		qsave,opt.quiet = opt.quiet,True
+		assert crypto.precompute_scrypt_hashes(params,4*1024*1024,jobs=2) == 0 # one job's worth of memory
+		assert crypto.precompute_scrypt_hashes(params,64*1024*1024,jobs=1) == 0
+		opt.quiet = qsave
+		assert crypto.scrypt_key_cache == {}
+		bad = params[:2] + [('passwd9',None,'1')] # failure in a worker is left to the serial pass
+		assert crypto.precompute_scrypt_hashes(bad,64*1024*1024,jobs=2) == 2
+		assert sorted(crypto.scrypt_key_cache.values()) == sorted(refs[:2])
+		crypto.scrypt_key_cache.clear()
+		msg('OK')
+
+		return True
@@ -166,15 +166,76 @@ class subseed(object):
 
 			collisions = 0
 			for k in ('short','long'):
-				for sid in ss[k]:
+				for n,sid in enumerate(ss[k],1):
+					assert ss[k][sid][0] == n and ss[k].get_by_idx(n)[0] == sid, (k,n,sid)
 					collisions += ss[k][sid][1]
 
 			assert collisions == collisions_chk, collisions
 			msg_r('({} collisions) '.format(collisions))
+
+			opt.jobs = 3 # parallel generation must resolve collisions identically
+			seed2 = Seed(seed_bin)
+			seed2.gen_subseeds(ss_count)
+			opt.jobs = None
+			for k in ('short','long'):
+				assert list(seed2.subseeds[k].items()) == list(ss[k].items()), k
+			msg('OK')
+
+		def index():
+			msg_r('Testing persistent subseed index...')
+			from mmgen.seed import SubSeedIndex
+			from tempfile import TemporaryDirectory
+			seed_bin = bytes.fromhex('feedbead' * 8)
+			with TemporaryDirectory() as d:
+				seed = Seed(seed_bin)
+				idx = SubSeedIndex(seed,d)
+				assert idx.load() == 0
+				seed.gen_subseeds(50)
+				assert idx.save() and not idx.save()
+				assert os.stat(idx.fn).st_mode & 0o777 == 0o600
+				ref = seed.subseed('40S').sid
+
+				seed2 = Seed(seed_bin)
+				idx2 = SubSeedIndex(seed2,d)
+				assert idx2.load() == 50
+				for k in ('short','long'):
+					assert list(seed2.subseeds[k].items()) == list(seed.subseeds[k].items()), k
+				assert seed2.existing_subseed_by_seed_id(ref).ss_idx == '40S'
+				seed2.gen_subseeds(60) # extend lazily
+				assert seed2.subseed('60L').sid == seed.subseed('60L').sid
+				assert idx2.save() and SubSeedIndex(Seed(seed_bin),d).load() == 60
+
+				seed3 = Seed(bytes.fromhex('beadfeed' * 8))
+				os.rename(idx2.fn,SubSeedIndex(seed3,d).fn) # file encrypted with wrong key
+				qsave,opt.quiet = opt.quiet,True
+				assert SubSeedIndex(seed3,d).load() == 0
+				opt.quiet = qsave
+
+				idx4 = SubSeedIndex(seed,os.path.join(d,'nonexistent')) # write failure is not fatal
+				stderr_save,g.stderr = g.stderr,open(os.devnull,'w')
+				assert idx4.save() == False and idx4.saved_len == 0
+				g.stderr = stderr_save
+			msg('OK')
+
+		def bad_seed_ids():
+			msg_r('Testing lookup of invalid Seed IDs...')
+			seed = Seed(bytes.fromhex('deadbeef' * 8))
+			seed.gen_subseeds(10)
+			sid = seed.subseed('10L').sid
+			assert sid in seed.subseeds['long']
+			assert seed.existing_subseed_by_seed_id(sid).ss_idx == '10L'
+			for bad_sid in (sid.lower(),'ZZZZ','ZZZZZZZZ','',sid+'0'):
+				assert bad_sid not in seed.subseeds['long'], bad_sid
+				try: seed.subseeds['long'][bad_sid]
+				except KeyError: pass
+				else: raise AssertionError('KeyError not raised for {!r}'.format(bad_sid))
+				assert seed.existing_subseed_by_seed_id(bad_sid) == None, bad_sid
 			msg('OK')
 
 		basic_ops()
+		bad_seed_ids()
 		defaults_and_limits()
 		collisions()
+		index()
 
 		return True